@@ -308,6 +308,7 @@ class AutomationDiscovery(DiscoveryAutomation):
             on_error=on_error,
             selected_sections=NO_SELECTION,
             simulation_mode=config.simulation_mode,
+            max_concurrent_fetches=config.max_concurrent_fetches,
             snmp_backend_override=None,
             password_store_file=cmk.utils.password_store.pending_password_store_path(),
         )
@@ -452,6 +453,7 @@ class AutomationDiscoveryPreview(Automation):
             on_error=on_error,
             selected_sections=NO_SELECTION,
             simulation_mode=config.simulation_mode,
+            max_concurrent_fetches=config.max_concurrent_fetches,
             snmp_backend_override=None,
             password_store_file=cmk.utils.password_store.pending_password_store_path(),
         )
@@ -754,6 +756,7 @@ def _execute_autodiscovery() -> tuple[Mapping[HostName, DiscoveryResult], bool]:
         on_error=OnError.IGNORE,
         selected_sections=NO_SELECTION,
         simulation_mode=config.simulation_mode,
+        max_concurrent_fetches=config.max_concurrent_fetches,
         snmp_backend_override=None,
         password_store_file=cmk.utils.password_store.core_password_store_path(LATEST_CONFIG),
     )
@@ -1180,6 +1183,7 @@ class AutomationRenameHosts(Automation):
 
         # SNMP walks
         if self._rename_host_file(snmpwalks_dir, oldname, newname):
+            self._rename_host_file(snmpwalks_dir + "/.index", oldname, newname)
             actions.append("snmpwalk")
 
         # HW/SW Inventory
@@ -1681,6 +1685,7 @@ class AutomationDeleteHosts(ABCDeleteHosts, Automation):
             f"{counters_dir}/{hostname}",
             f"{discovered_host_labels_dir}/{hostname}.mk",
             f"{tcp_cache_dir}/{hostname}",
+            f"{snmpwalks_dir}/.index/{hostname}",
             f"{var_dir}/persisted/{hostname}",
             f"{var_dir}/inventory/{hostname}",
             f"{var_dir}/inventory/{hostname}.gz",
@@ -1722,6 +1727,7 @@ class AutomationDeleteHostsKnownRemote(ABCDeleteHosts, Automation):
             f"{autochecks_dir}/{hostname}.mk",
             f"{counters_dir}/{hostname}",
             f"{tcp_cache_dir}/{hostname}",
+            f"{snmpwalks_dir}/.index/{hostname}",
             f"{var_dir}/persisted/{hostname}",
             f"{var_dir}/inventory/{hostname}",
             f"{var_dir}/inventory/{hostname}.gz",
@@ -2168,7 +2174,7 @@ class AutomationDiagHost(Automation):
                 snmpv3_privacy_proto, snmpv3_privacy_password = args[13:15]
 
         # No caching option over commandline here.
-        file_cache_options = FileCacheOptions()
+        file_cache_options = FileCacheOptions(compression=ConfigCache.file_cache_compression())
 
         if not ipaddress:
             if ConfigCache.ip_stack_config(host_name) is ip_lookup.IPStackConfig.NO_IP:
@@ -2736,7 +2742,7 @@ class AutomationGetAgentOutput(Automation):
         hosts_config = config.make_hosts_config()
 
         # No caching option over commandline here.
-        file_cache_options = FileCacheOptions()
+        file_cache_options = FileCacheOptions(compression=ConfigCache.file_cache_compression())
 
         success = True
         output = ""
@@ -10,9 +10,11 @@ from __future__ import annotations
 import functools
 import itertools
 import logging
+import posix
 import time
 from collections.abc import Callable, Container, Iterable, Iterator, Mapping, Sequence
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from functools import partial
 from pathlib import Path
 from typing import Final, Literal
@@ -38,7 +40,15 @@ from cmk.utils.timeperiod import timeperiod_active
 
 from cmk.snmplib import SNMPBackendEnum, SNMPRawData
 
-from cmk.fetchers import Fetcher, get_raw_data, Mode, SNMPScanConfig, TLSConfig
+from cmk.fetchers import (
+    Fetcher,
+    get_raw_data,
+    Mode,
+    ProgramFetcher,
+    SNMPFetcher,
+    SNMPScanConfig,
+    TLSConfig,
+)
 from cmk.fetchers.config import make_persisted_section_dir
 from cmk.fetchers.filecache import FileCache, FileCacheOptions, MaxAge
 
@@ -120,7 +130,12 @@ __all__ = [
 
 
 def _fetch_all(
-    sources: Iterable[Source], *, simulation: bool, file_cache_options: FileCacheOptions, mode: Mode
+    sources: Iterable[Source],
+    *,
+    simulation: bool,
+    file_cache_options: FileCacheOptions,
+    mode: Mode,
+    max_concurrent_fetches: int = 1,
 ) -> Sequence[
     tuple[
         SourceInfo,
@@ -129,15 +144,93 @@ def _fetch_all(
     ]
 ]:
     console.verbose(f"{tty.yellow}+{tty.normal} FETCHING DATA")
-    return [
-        _do_fetch(
+    fetches = [
+        (
             source.source_info(),
             source.file_cache(simulation=simulation, file_cache_options=file_cache_options),
             source.fetcher(),
-            mode=mode,
         )
         for source in sources
     ]
+    if max_concurrent_fetches <= 1 or len(fetches) <= 1:
+        return [
+            _do_fetch(source_info, file_cache, fetcher, mode=mode)
+            for source_info, file_cache, fetcher in fetches
+        ]
+
+    # The sources are independent of each other, fetching them at the same time
+    # makes the host wait for the slowest source instead of for all of them.
+    executor = ThreadPoolExecutor(
+        max_workers=min(max_concurrent_fetches, len(fetches)), thread_name_prefix="fetch"
+    )
+    start = Snapshot.take()
+    try:
+        futures = [
+            executor.submit(_do_fetch, source_info, file_cache, fetcher, mode=mode, per_thread=True)
+            for source_info, file_cache, fetcher in fetches
+        ]
+        fetched = [future.result() for future in futures]
+    finally:
+        # Cancel the fetchers which did not start yet and do not block the timeout here. Hung
+        # fetchers cannot be interrupted, the process still waits for them at interpreter exit.
+        executor.shutdown(wait=False, cancel_futures=True)
+    return _add_children_times(
+        fetched,
+        Snapshot.take() - start,
+        [_runs_child_processes(fetcher) for _source_info, _file_cache, fetcher in fetches],
+    )
+
+
+def _runs_child_processes(fetcher: Fetcher) -> bool:
+    return isinstance(fetcher, ProgramFetcher) or (
+        isinstance(fetcher, SNMPFetcher)
+        and fetcher.snmp_config.snmp_backend is SNMPBackendEnum.CLASSIC
+    )
+
+
+def _add_children_times(
+    fetched: Sequence[
+        tuple[SourceInfo, result.Result[AgentRawData | SNMPRawData, Exception], Snapshot]
+    ],
+    total: Snapshot,
+    spawning: Sequence[bool],
+) -> Sequence[
+    tuple[
+        SourceInfo,
+        result.Result[AgentRawData | SNMPRawData, Exception],
+        Snapshot,
+    ]
+]:
+    """Attribute the CPU times of the child processes to the sources
+
+    The threads only measure their own CPU times.  The times of the child
+    processes are only known for the whole process, so they are shared by the
+    sources that run child processes, in proportion to their elapsed time.
+    """
+    weights = [
+        duration.process.elapsed if spawns else 0.0
+        for (_source_info, _raw_data, duration), spawns in zip(fetched, spawning)
+    ]
+    if not sum(weights):
+        weights = [1.0] * len(fetched)
+    return [
+        (source_info, raw_data, duration + _children_times(total, weight / sum(weights)))
+        for (source_info, raw_data, duration), weight in zip(fetched, weights)
+    ]
+
+
+def _children_times(total: Snapshot, share: float) -> Snapshot:
+    return Snapshot(
+        posix.times_result(
+            (
+                0.0,
+                0.0,
+                total.process.children_user * share,
+                total.process.children_system * share,
+                0.0,
+            )
+        )
+    )
 
 
 def _do_fetch(
@@ -146,13 +239,14 @@ def _do_fetch(
     fetcher: Fetcher,
     *,
     mode: Mode,
+    per_thread: bool = False,
 ) -> tuple[
     SourceInfo,
     result.Result[AgentRawData | SNMPRawData, Exception],
     Snapshot,
 ]:
     console.debug(f"  Source: {source_info}")
-    with CPUTracker(console.debug) as tracker:
+    with CPUTracker(console.debug, per_thread=per_thread) as tracker:
         raw_data = get_raw_data(file_cache, fetcher, mode)
     return source_info, raw_data, tracker.duration
 
@@ -310,7 +404,9 @@ class SpecialAgentFetcher:
                 for cmd in self.cmds
             ],
             simulation=False,
-            file_cache_options=self.file_cache_options,
+            file_cache_options=replace(
+                self.file_cache_options, compression=ConfigCache.file_cache_compression()
+            ),
             mode=Mode.DISCOVERY,
         )
 
@@ -331,6 +427,7 @@ class CMKFetcher:
         selected_sections: SectionNameCollection,
         simulation_mode: bool,
         max_cachefile_age: MaxAge | None = None,
+        max_concurrent_fetches: int = 1,
         snmp_backend_override: SNMPBackendEnum | None,
     ) -> None:
         self.config_cache: Final = config_cache
@@ -344,6 +441,7 @@ class CMKFetcher:
         self.selected_sections: Final = selected_sections
         self.simulation_mode: Final = simulation_mode
         self.max_cachefile_age: Final = max_cachefile_age
+        self.max_concurrent_fetches: Final = max_concurrent_fetches
         self.snmp_backend_override: Final = snmp_backend_override
 
     def __call__(self, host_name: HostName, *, ip_address: HostAddress | None) -> Sequence[
@@ -395,6 +493,9 @@ class CMKFetcher:
             site_crt=Path(cmk.utils.paths.site_cert_file),
         )
         passwords = password_store.load(self.password_store_file)
+        file_cache_options = replace(
+            self.file_cache_options, compression=self.config_cache.file_cache_compression()
+        )
         return _fetch_all(
             itertools.chain.from_iterable(
                 make_sources(
@@ -422,7 +523,7 @@ class CMKFetcher:
                         self.force_snmp_cache_refresh if not is_cluster else False
                     ),
                     simulation_mode=self.simulation_mode,
-                    file_cache_options=self.file_cache_options,
+                    file_cache_options=file_cache_options,
                     file_cache_max_age=(
                         self.max_cachefile_age or self.config_cache.max_cachefile_age(host_name)
                     ),
@@ -455,8 +556,9 @@ class CMKFetcher:
                 for current_host_name, current_ip_stack_config, current_ip_address in hosts
             ),
             simulation=self.simulation_mode,
-            file_cache_options=self.file_cache_options,
+            file_cache_options=file_cache_options,
             mode=self.mode,
+            max_concurrent_fetches=self.max_concurrent_fetches,
         )
 
 
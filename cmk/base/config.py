@@ -91,7 +91,7 @@ from cmk.fetchers import (
     TLSConfig,
 )
 from cmk.fetchers.config import make_persisted_section_dir
-from cmk.fetchers.filecache import MaxAge
+from cmk.fetchers.filecache import FileCacheCompression, MaxAge
 
 from cmk.checkengine.checking import CheckPluginName, ConfiguredService, ServiceID
 from cmk.checkengine.discovery import AutochecksManager, CheckPreviewEntry, DiscoveryCheckParameters
@@ -503,6 +503,12 @@ def load_packed_config(config_path: ConfigPath) -> None:
     globals().update(PackedConfigStore.from_serial(config_path).read())
     _perform_post_config_loading_actions()
 
+    # Configurations created by older versions come without the match cache
+    with contextlib.suppress(FileNotFoundError):
+        get_config_cache().ruleset_matcher.ruleset_optimizer.load_match_cache(
+            RulesetMatchCacheStore.from_serial(config_path).read()
+        )
+
 
 def _initialize_config() -> None:
     load_default_config()
@@ -572,9 +578,18 @@ class SetFolderPathDict(SetFolderPathAbstract, dict):
         return super().__setitem__(cluster_name, value)
 
 
-def _load_config_file(file_to_load: Path, into_dict: dict[str, Any]) -> None:
+def _load_config_file(
+    file_to_load: Path, into_dict: dict[str, Any], code_cache: store.CodeCache | None = None
+) -> None:
+    source = file_to_load.read_text()
     exec(
-        compile(file_to_load.read_text(), file_to_load, "exec"), into_dict, into_dict
+        (
+            compile(source, file_to_load, "exec")
+            if code_cache is None
+            else code_cache.compile(source, str(file_to_load))
+        ),
+        into_dict,
+        into_dict,
     )  # nosec B102 # BNS:aee528
 
 
@@ -599,7 +614,9 @@ def _load_config(with_conf_d: bool) -> set[str]:
     if experimental_config.exists():
         _load_config_file(experimental_config, global_dict)
 
-    host_storage_loaders = get_host_storage_loaders(config_storage_format)
+    # The code of unchanged configuration files is not compiled again
+    code_cache = store.CodeCache(Path(cmk.utils.paths.tmp_dir, "compiled_config_files"))
+    host_storage_loaders = get_host_storage_loaders(config_storage_format, code_cache)
     config_dir_path = Path(cmk.utils.paths.check_mk_config_dir)
     for path in get_config_file_paths(with_conf_d):
         try:
@@ -621,7 +638,7 @@ def _load_config(with_conf_d: bool) -> set[str]:
             if path.name == "hosts.mk":
                 apply_hosts_file_to_object(path.with_suffix(""), host_storage_loaders, global_dict)
             else:
-                _load_config_file(path, global_dict)
+                _load_config_file(path, global_dict, code_cache)
 
             if not isinstance(all_hosts, SetFolderPathList):
                 raise MKGeneralException(
@@ -640,6 +657,8 @@ def _load_config(with_conf_d: bool) -> set[str]:
                 console.error(f"Cannot read in configuration file {path}: {e}", file=sys.stderr)
             sys.exit(1)
 
+    console.debug(f"Compiled configuration files: {code_cache.stats}")
+
     # Cleanup global helper vars
     for helper_var in helper_vars:
         del global_dict[helper_var]
@@ -713,6 +732,11 @@ def get_derived_config_variable_names() -> set[str]:
 def save_packed_config(config_path: ConfigPath, config_cache: ConfigCache) -> None:
     """Create and store a precompiled configuration for Checkmk helper processes"""
     PackedConfigStore.from_serial(config_path).write(PackedConfigGenerator(config_cache).generate())
+    # Creating the core config has matched most of the rules already. Save the
+    # helpers from doing it all over again.
+    RulesetMatchCacheStore.from_serial(config_path).write(
+        config_cache.ruleset_matcher.ruleset_optimizer.dump_match_cache()
+    )
 
 
 class PackedConfigGenerator:
@@ -868,6 +892,28 @@ class PackedConfigStore:
             return pickle.load(f)  # nosec B301 # BNS:c3c5e9
 
 
+class RulesetMatchCacheStore:
+    """Caring about persistence of the ruleset matches of the packed configuration"""
+
+    def __init__(self, path: Path) -> None:
+        self.path: Final = path
+
+    @classmethod
+    def from_serial(cls, config_path: ConfigPath) -> RulesetMatchCacheStore:
+        return cls(Path(config_path) / "ruleset_match_cache")
+
+    def write(self, match_cache: ruleset_matcher.RulesetMatchCache) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".new")
+        with tmp_path.open("wb") as f:
+            pickle.dump(match_cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.rename(self.path)
+
+    def read(self) -> ruleset_matcher.RulesetMatchCache:
+        with self.path.open("rb") as f:
+            return pickle.load(f)  # nosec B301 # BNS:c3c5e9
+
+
 @contextlib.contextmanager
 def set_use_core_config(
     *, autochecks_dir: Path, discovered_host_labels_dir: Path
@@ -1920,7 +1966,8 @@ class ConfigCache:
             ),
             clusters_of=self._clusters_of_cache,
             nodes_of=self._nodes_cache,
-            all_configured_hosts=list(set(self.hosts_config)),
+            # Sorted, so the host index is the same in every process (see RulesetMatchCache)
+            all_configured_hosts=sorted(set(self.hosts_config)),
             debug_matching_stats=ruleset_matching_stats,
         )
 
@@ -2985,6 +3032,10 @@ class ConfigCache:
             inventory=1.5 * check_interval,
         )
 
+    @staticmethod
+    def file_cache_compression() -> FileCacheCompression:
+        return FileCacheCompression(file_cache_compression)
+
     def exit_code_spec(self, hostname: HostName, data_source_id: str | None = None) -> ExitSpec:
         spec: _NestedExitSpec = {}
         # TODO: Can we use get_host_merged_dict?
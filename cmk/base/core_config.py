@@ -273,13 +273,16 @@ def do_create_config(
         )
 
     try:
-        _create_core_config(
-            core,
-            config_cache,
-            ip_address_of,
-            hosts_to_update=hosts_to_update,
-            duplicates=duplicates,
-        )
+        # Looking up the addresses of new hosts one by one would rewrite the
+        # IP lookup cache for every single one of them
+        with ip_lookup.persisting_batched():
+            _create_core_config(
+                core,
+                config_cache,
+                ip_address_of,
+                hosts_to_update=hosts_to_update,
+                duplicates=duplicates,
+            )
     except Exception as e:
         if cmk.ccc.debug.enabled():
             raise
@@ -110,9 +110,14 @@ class NagiosCore(core_config.MonitoringCore):
     def _precompile_hostchecks(self, config_path: VersionedConfigPath) -> None:
         with suppress(IOError):
             print("Precompiling host checks...", end="", flush=True, file=sys.stdout)
-        precompile_hostchecks(config_path, self._config_cache)
+        result = precompile_hostchecks(config_path, self._config_cache)
         with suppress(IOError):
-            print(tty.ok + "\n", end="", flush=True, file=sys.stdout)
+            print(
+                f" {result.rebuilt} compiled, {result.reused} unchanged..." + tty.ok + "\n",
+                end="",
+                flush=True,
+                file=sys.stdout,
+            )
 
 
 #   .--Create config-------------------------------------------------------.
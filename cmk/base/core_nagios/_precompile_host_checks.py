@@ -9,22 +9,30 @@ checks of that host. Also static data that cannot change during the
 normal monitoring process is being precomputed and hard coded. This
 all saves substantial CPU resources as opposed to running Checkmk
 in adhoc mode (about 75%).
+
+The host checks of hosts whose host check did not change since the previous
+configuration are taken over from there instead of being compiled again. The
+others are created by a pool of worker processes.
 """
 
 import itertools
+import multiprocessing
 import os
 import py_compile
 import re
 import socket
 import sys
+from collections.abc import Container, Sequence
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import NamedTuple
 
 import cmk.utils.config_path
 import cmk.utils.password_store
 import cmk.utils.paths
 from cmk.utils import tty
 from cmk.utils.check_utils import section_name_of
-from cmk.utils.config_path import VersionedConfigPath
+from cmk.utils.config_path import ConfigPath, LATEST_CONFIG, VersionedConfigPath
 from cmk.utils.hostaddress import HostAddress, HostName
 from cmk.utils.ip_lookup import IPStackConfig
 from cmk.utils.log import console
@@ -54,11 +62,11 @@ class HostCheckStore:
     """Caring about persistence of the precompiled host check files"""
 
     @staticmethod
-    def host_check_file_path(config_path: VersionedConfigPath, hostname: HostName) -> Path:
+    def host_check_file_path(config_path: ConfigPath, hostname: HostName) -> Path:
         return Path(config_path) / "host_checks" / hostname
 
     @staticmethod
-    def host_check_source_file_path(config_path: VersionedConfigPath, hostname: HostName) -> Path:
+    def host_check_source_file_path(config_path: ConfigPath, hostname: HostName) -> Path:
         # TODO: Use append_suffix(".py") once we are on Python 3.10
         path = HostCheckStore.host_check_file_path(config_path, hostname)
         return path.with_suffix(path.suffix + ".py")
@@ -85,8 +93,52 @@ class HostCheckStore:
 
         console.verbose(f" ==> {compiled_filename}.", file=sys.stderr)
 
+    def reuse(
+        self,
+        previous_config_path: VersionedConfigPath,
+        config_path: VersionedConfigPath,
+        hostname: HostName,
+        host_check: str,
+    ) -> bool:
+        """Take over the host check of the previous config if it is the same"""
+        previous_source = self.host_check_source_file_path(previous_config_path, hostname)
+        previous_compiled = self.host_check_file_path(previous_config_path, hostname)
+        try:
+            if previous_source.read_text() != host_check:
+                return False
+            if previous_compiled.is_symlink() != bool(config.delay_precompile):
+                # Compiled while delay_precompile was switched
+                return False
+
+            compiled_filename = self.host_check_file_path(config_path, hostname)
+            store.makedirs(compiled_filename.parent)
+            os.link(previous_source, self.host_check_source_file_path(config_path, hostname))
+            if config.delay_precompile:
+                compiled_filename.symlink_to(hostname + ".py")
+            else:
+                os.link(previous_compiled, compiled_filename)
+        except OSError:
+            return False
+
+        console.verbose(f" ==> {compiled_filename} (unchanged).", file=sys.stderr)
+        return True
+
+
+class PrecompileResult(NamedTuple):
+    rebuilt: int
+    reused: int
+
+
+# The configuration is handed over to the worker processes by forking
+_WORKER_CONFIG_CACHE: ConfigCache | None = None
+
 
-def precompile_hostchecks(config_path: VersionedConfigPath, config_cache: ConfigCache) -> None:
+def precompile_hostchecks(
+    config_path: VersionedConfigPath,
+    config_cache: ConfigCache,
+    *,
+    max_workers: int | None = None,
+) -> PrecompileResult:
     console.verbose("Creating precompiled host check config...")
     hosts_config = config_cache.hosts_config
 
@@ -94,46 +146,126 @@ def precompile_hostchecks(config_path: VersionedConfigPath, config_cache: Config
 
     console.verbose("Precompiling host checks...")
 
+    hostnames = sorted(
+        {
+            # Inconsistent with `create_config` above.
+            hn
+            for hn in itertools.chain(hosts_config.hosts, hosts_config.clusters)
+            if config_cache.is_active(hn) and config_cache.is_online(hn)
+        }
+    )
+    previous_config_path = _previous_config_path(config_path)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(hostnames) < 2 * max_workers or cmk.ccc.debug.enabled():
+        return _precompile_hostchecks(config_cache, previous_config_path, config_path, hostnames)
+
+    global _WORKER_CONFIG_CACHE
+    _WORKER_CONFIG_CACHE = config_cache
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            results = list(
+                executor.map(
+                    _precompile_hostchecks_of_worker,
+                    itertools.repeat(previous_config_path),
+                    itertools.repeat(config_path),
+                    # Interleaved, as the hosts are sorted by name and not by effort
+                    [hostnames[n :: max_workers * 4] for n in range(max_workers * 4)],
+                )
+            )
+    finally:
+        _WORKER_CONFIG_CACHE = None
+
+    return PrecompileResult(
+        rebuilt=sum(r.rebuilt for r in results), reused=sum(r.reused for r in results)
+    )
+
+
+def _previous_config_path(config_path: VersionedConfigPath) -> VersionedConfigPath:
+    # The core has not been switched to the new config yet
+    try:
+        previous_config_path = VersionedConfigPath(int(Path(LATEST_CONFIG).resolve().name))
+    except ValueError:
+        return config_path.previous_config_path()
+    return (
+        config_path.previous_config_path()
+        if previous_config_path == config_path
+        else previous_config_path
+    )
+
+
+def _precompile_hostchecks_of_worker(
+    previous_config_path: VersionedConfigPath,
+    config_path: VersionedConfigPath,
+    hostnames: Sequence[HostName],
+) -> PrecompileResult:
+    assert _WORKER_CONFIG_CACHE is not None
+    return _precompile_hostchecks(
+        _WORKER_CONFIG_CACHE, previous_config_path, config_path, hostnames
+    )
+
+
+def _precompile_hostchecks(
+    config_cache: ConfigCache,
+    previous_config_path: VersionedConfigPath,
+    config_path: VersionedConfigPath,
+    hostnames: Sequence[HostName],
+) -> PrecompileResult:
     host_check_store = HostCheckStore()
-    for hostname in {
-        # Inconsistent with `create_config` above.
-        hn
-        for hn in itertools.chain(hosts_config.hosts, hosts_config.clusters)
-        if config_cache.is_active(hn) and config_cache.is_online(hn)
-    }:
+    ssc_api_special_agents = {p.name for p in server_side_calls.load_special_agents()[1].values()}
+    rebuilt = reused = 0
+    for hostname in hostnames:
         try:
             console.verbose_no_lf(
                 f"{tty.bold}{tty.blue}{hostname:<16}{tty.normal}:", file=sys.stderr
             )
             host_check = dump_precompiled_hostcheck(
                 config_cache,
-                config_path,
+                # The core executes the host checks of the latest config. Referring to
+                # it keeps the host checks the same from one config to the next.
+                LATEST_CONFIG,
                 hostname,
+                ssc_api_special_agents=ssc_api_special_agents,
             )
             if host_check is None:
                 console.verbose("(no Checkmk checks)")
                 continue
 
+            if host_check_store.reuse(previous_config_path, config_path, hostname, host_check):
+                reused += 1
+                continue
+
             host_check_store.write(config_path, hostname, host_check)
+            rebuilt += 1
         except Exception as e:
             if cmk.ccc.debug.enabled():
                 raise
             console.error(f"Error precompiling checks for host {hostname}: {e}", file=sys.stderr)
             sys.exit(5)
 
+    return PrecompileResult(rebuilt=rebuilt, reused=reused)
+
 
 def dump_precompiled_hostcheck(  # pylint: disable=too-many-branches
     config_cache: ConfigCache,
-    config_path: VersionedConfigPath,
+    config_path: ConfigPath,
     hostname: HostName,
     *,
     verify_site_python: bool = True,
+    ssc_api_special_agents: Container[str] | None = None,
 ) -> str | None:
+    if ssc_api_special_agents is None:
+        ssc_api_special_agents = {
+            p.name for p in server_side_calls.load_special_agents()[1].values()
+        }
+
     (
         needed_legacy_check_plugin_names,
         needed_agent_based_check_plugin_names,
         needed_agent_based_inventory_plugin_names,
-    ) = _get_needed_plugin_names(config_cache, hostname)
+    ) = _get_needed_plugin_names(config_cache, hostname, ssc_api_special_agents)
 
     if hostname in config_cache.hosts_config.clusters:
         assert config_cache.nodes(hostname)
@@ -142,7 +274,7 @@ def dump_precompiled_hostcheck(  # pylint: disable=too-many-branches
                 node_needed_legacy_check_plugin_names,
                 node_needed_agent_based_check_plugin_names,
                 node_needed_agent_based_inventory_plugin_names,
-            ) = _get_needed_plugin_names(config_cache, node)
+            ) = _get_needed_plugin_names(config_cache, node, ssc_api_special_agents)
             needed_legacy_check_plugin_names.update(node_needed_legacy_check_plugin_names)
             needed_agent_based_check_plugin_names.update(node_needed_agent_based_check_plugin_names)
             needed_agent_based_inventory_plugin_names.update(
@@ -248,9 +380,8 @@ def dump_precompiled_hostcheck(  # pylint: disable=too-many-branches
 
 
 def _get_needed_plugin_names(
-    config_cache: ConfigCache, host_name: HostName
+    config_cache: ConfigCache, host_name: HostName, ssc_api_special_agents: Container[str]
 ) -> tuple[set[str], set[CheckPluginName], set[InventoryPluginName]]:
-    ssc_api_special_agents = {p.name for p in server_side_calls.load_special_agents()[1].values()}
     needed_legacy_check_plugin_names = {
         f"agent_{name}"
         for name, _p in config_cache.special_agents(host_name)
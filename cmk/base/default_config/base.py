@@ -49,6 +49,8 @@ agent_exclude_sections: list[RuleSpec[dict[str, str]]] = []
 # UDP ports used for SNMP
 snmp_ports: list[RuleSpec[int]] = []
 tcp_connect_timeout = 5.0
+# How many data sources of a host are fetched at the same time, 1 fetches one after another
+max_concurrent_fetches = 1
 tcp_connect_timeouts: list[RuleSpec[float]] = []
 use_dns_cache = True  # prevent DNS by using own cache file
 delay_precompile = False  # delay Python compilation to Nagios execution
@@ -57,6 +59,8 @@ check_submission: Literal["file", "pipe"] = "file"
 default_host_group = "check_mk"
 
 check_max_cachefile_age = 0  # per default do not use cache files when checking
+# Codec of the agent and SNMP cache files: "none", "zlib" or "lzma"
+file_cache_compression = "none"
 cluster_max_cachefile_age = 90  # secs.
 piggyback_max_cachefile_age = 3600  # secs
 # Ruleset for translating piggyback host names
@@ -245,7 +245,7 @@ def dump_host(
                 walk_cache_path=walk_cache_path,
             ),
             is_cluster=hostname in hosts_config.clusters,
-            file_cache_options=FileCacheOptions(),
+            file_cache_options=FileCacheOptions(compression=ConfigCache.file_cache_compression()),
             simulation_mode=simulation_mode,
             file_cache_max_age=MaxAge.zero(),
             snmp_backend=config_cache.get_snmp_backend(hostname),
@@ -19,6 +19,8 @@ from cmk.utils.servicename import ServiceName
 
 from cmk.snmplib import SNMPBackendEnum
 
+from cmk.fetchers.filecache import decode_cache_file
+
 from cmk.checkengine.checking import CheckPluginName
 
 import cmk.ccc.debug
@@ -166,8 +168,8 @@ def _read_agent_output(hostname: HostName) -> AgentRawData | None:
 
     cache_path = Path(cmk.utils.paths.tcp_cache_dir, hostname)
     try:
-        agent_outputs.append(cache_path.read_bytes())
-    except OSError:
+        agent_outputs.append(decode_cache_file(cache_path.read_bytes()))
+    except (OSError, ValueError):
         pass
 
     # Note: this is not quite what the fetcher does :(
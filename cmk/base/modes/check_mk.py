@@ -538,7 +538,9 @@ modes.register(
 
 
 def mode_dump_agent(options: Mapping[str, object], hostname: HostName) -> None:
-    file_cache_options = _handle_fetcher_options(options)
+    file_cache_options = _handle_fetcher_options(
+        options, defaults=FileCacheOptions(compression=ConfigCache.file_cache_compression())
+    )
 
     try:
         snmp_backend_override = parse_snmp_backend(options.get("snmp-backend"))
@@ -855,9 +857,19 @@ modes.register(
 #   '----------------------------------------------------------------------'
 
 
-def mode_cleanup_piggyback() -> None:
+def mode_cleanup_piggyback(options: Mapping[str, int]) -> None:
     max_age = config.get_config_cache().get_definitive_piggybacked_data_expiry_age()
-    piggyback.cleanup_piggyback_files(cut_off_timestamp=time.time() - max_age)
+    report = piggyback.cleanup_piggyback_files(
+        cut_off_timestamp=time.time() - max_age,
+        max_workers=options.get("workers", 1),
+    )
+    console.verbose(
+        f"Removed {report.removed_source_status_files}/{report.scanned_source_status_files}"
+        f" source status files, {report.removed_piggybacked_files}"
+        f"/{report.scanned_piggybacked_files} piggybacked files,"
+        f" {report.removed_piggybacked_folders} piggybacked folders and"
+        f" {report.removed_segment_payloads} segment payloads in {report.duration:.2f}s."
+    )
 
 
 modes.register(
@@ -865,6 +877,43 @@ modes.register(
         long_option="cleanup-piggyback",
         handler_function=mode_cleanup_piggyback,
         short_help="Cleanup outdated piggyback files",
+        sub_options=[
+            Option(
+                long_option="workers",
+                argument=True,
+                argument_descr="N",
+                argument_conv=int,
+                short_help="Process the piggybacked host folders with N threads",
+            ),
+        ],
+    )
+)
+
+
+def mode_migrate_piggyback_storage(layout: str) -> None:
+    try:
+        target = piggyback.StorageLayout(layout)
+    except ValueError as exc:
+        raise MKBailOut(f"Unknown piggyback storage layout: {layout}") from exc
+
+    migrated = piggyback.migrate_storage_layout(target)
+    print_(f"Migrated {migrated} piggyback payloads to the {target} layout.\n")
+
+
+modes.register(
+    Mode(
+        long_option="migrate-piggyback-storage",
+        handler_function=mode_migrate_piggyback_storage,
+        argument=True,
+        argument_descr="directory|segment",
+        short_help="Switch the piggyback storage layout and migrate existing data",
+        long_help=[
+            "The 'directory' layout stores one file per piggybacked host and source. "
+            "The 'segment' layout stores one indexed file per source, which reduces "
+            "the file system operations on sites with many piggybacked hosts.",
+        ],
+        needs_config=False,
+        needs_checks=False,
     )
 )
 
@@ -1789,6 +1838,7 @@ def mode_check_discovery(
             discovery=discovery_file_cache_max_age,
             inventory=1.5 * check_interval,
         ),
+        max_concurrent_fetches=config.max_concurrent_fetches,
         snmp_backend_override=snmp_backend_override,
         password_store_file=cmk.utils.password_store.core_password_store_path(LATEST_CONFIG),
     )
@@ -2115,6 +2165,7 @@ def mode_discover(options: _DiscoveryOptions, args: list[str]) -> None:
         on_error=on_error,
         selected_sections=selected_sections,
         simulation_mode=config.simulation_mode,
+        max_concurrent_fetches=config.max_concurrent_fetches,
         snmp_backend_override=snmp_backend_override,
         password_store_file=cmk.utils.password_store.pending_password_store_path(),
     )
@@ -2276,6 +2327,7 @@ def mode_check(
         on_error=OnError.RAISE,
         selected_sections=selected_sections,
         simulation_mode=config.simulation_mode,
+        max_concurrent_fetches=config.max_concurrent_fetches,
         snmp_backend_override=snmp_backend_override,
         password_store_file=(
             cmk.utils.password_store.core_password_store_path(LATEST_CONFIG)
@@ -2517,6 +2569,7 @@ def mode_inventory(options: _InventoryOptions, args: list[str]) -> None:
         on_error=OnError.RAISE,
         selected_sections=selected_sections,
         simulation_mode=config.simulation_mode,
+        max_concurrent_fetches=config.max_concurrent_fetches,
         snmp_backend_override=snmp_backend_override,
         password_store_file=cmk.utils.password_store.pending_password_store_path(),
     )
@@ -2769,6 +2822,7 @@ def mode_inventory_as_check(
         on_error=OnError.RAISE,
         selected_sections=NO_SELECTION,
         simulation_mode=config.simulation_mode,
+        max_concurrent_fetches=config.max_concurrent_fetches,
         snmp_backend_override=snmp_backend_override,
         password_store_file=cmk.utils.password_store.core_password_store_path(LATEST_CONFIG),
     )
@@ -2933,6 +2987,7 @@ def mode_inventorize_marked_hosts(options: Mapping[str, object]) -> None:
         on_error=OnError.RAISE,
         selected_sections=NO_SELECTION,
         simulation_mode=config.simulation_mode,
+        max_concurrent_fetches=config.max_concurrent_fetches,
         snmp_backend_override=snmp_backend_override,
         password_store_file=cmk.utils.password_store.core_password_store_path(LATEST_CONFIG),
     )
@@ -164,6 +164,7 @@ class SNMPSource(Source[SNMPRawData]):
             simulation=simulation,
             use_only_cache=file_cache_options.use_only_cache,
             file_cache_mode=file_cache_options.file_cache_mode(),
+            compression=file_cache_options.compression,
         )
 
 
@@ -217,6 +218,7 @@ class MgmtSNMPSource(Source[SNMPRawData]):
             simulation=simulation,
             use_only_cache=file_cache_options.use_only_cache,
             file_cache_mode=file_cache_options.file_cache_mode(),
+            compression=file_cache_options.compression,
         )
 
 
@@ -263,6 +265,7 @@ class IPMISource(Source[AgentRawData]):
             simulation=simulation,
             use_only_cache=file_cache_options.use_only_cache,
             file_cache_mode=file_cache_options.file_cache_mode(),
+            compression=file_cache_options.compression,
         )
 
 
@@ -311,6 +314,7 @@ class ProgramSource(Source[AgentRawData]):
             simulation=simulation,
             use_only_cache=file_cache_options.use_only_cache,
             file_cache_mode=file_cache_options.file_cache_mode(),
+            compression=file_cache_options.compression,
         )
 
 
@@ -416,6 +420,7 @@ class TCPSource(Source[AgentRawData]):
                 file_cache_options.tcp_use_only_cache or file_cache_options.use_only_cache
             ),
             file_cache_mode=file_cache_options.file_cache_mode(),
+            compression=file_cache_options.compression,
         )
 
 
@@ -471,6 +476,7 @@ class SpecialAgentSource(Source[AgentRawData]):
             simulation=simulation,
             use_only_cache=file_cache_options.use_only_cache,
             file_cache_mode=file_cache_options.file_cache_mode(),
+            compression=file_cache_options.compression,
         )
 
 
@@ -16,6 +16,7 @@ from typing import Any
 
 from cmk.ccc.exceptions import MKGeneralException, MKTerminate, MKTimeout
 from cmk.ccc.i18n import _
+from cmk.ccc.store._code_cache import CodeCache, CodeCacheStats
 from cmk.ccc.store._file import (
     BytesSerializer,
     DimSerializer,
@@ -39,6 +40,8 @@ from cmk.ccc.store._locks import (
 
 __all__ = [
     "BytesSerializer",
+    "CodeCache",
+    "CodeCacheStats",
     "DimSerializer",
     "ObjectStore",
     "PickleSerializer",
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Cache of the compiled code of configuration files
+
+The .mk files are Python code which is executed into the configuration
+namespace.  They modify the namespace (`all_hosts += [...]`), so only the
+compilation can be cached, not the result of the execution.  Compiling the
+big literals of the rule files takes most of the time of loading them.
+
+There is one cache file per source file, holding the hash of the source and
+the code.  A changed source simply replaces the entry.
+"""
+
+import hashlib
+import importlib.util
+import marshal
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import CodeType
+
+__all__ = ["CodeCache", "CodeCacheStats"]
+
+
+@dataclass
+class CodeCacheStats:
+    hits: int = 0
+    misses: int = 0
+    # Compile time of the hits when they were compiled minus the time to load them
+    seconds_saved: float = 0.0
+
+    def __str__(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses, {self.seconds_saved:.3f}s saved"
+
+
+class CodeCache:
+    """Compile sources, reuse the code compiled for the same source before"""
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.cache_dir = cache_dir
+        self.stats = CodeCacheStats()
+
+    def _entry_path(self, filename: str) -> Path:
+        return self.cache_dir / hashlib.sha256(filename.encode()).hexdigest()
+
+    @staticmethod
+    def _digest(source: bytes, filename: str) -> bytes:
+        # The code depends on the interpreter version and contains the file name
+        return hashlib.sha256(
+            b"\0".join((importlib.util.MAGIC_NUMBER, filename.encode(), source))
+        ).digest()
+
+    def compile(self, source: bytes | str, filename: str) -> CodeType:
+        """Like compile(source, filename, "exec")"""
+        start = time.perf_counter()
+        source_bytes = source.encode() if isinstance(source, str) else source
+        digest = self._digest(source_bytes, filename)
+        entry_path = self._entry_path(filename)
+
+        try:
+            entry_digest, compile_seconds, code = marshal.loads(entry_path.read_bytes())
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+        else:
+            if entry_digest == digest and isinstance(code, CodeType):
+                self.stats.hits += 1
+                self.stats.seconds_saved += compile_seconds - (time.perf_counter() - start)
+                return code
+
+        self.stats.misses += 1
+        compile_start = time.perf_counter()
+        code = compile(source, filename, "exec")
+        compile_seconds = time.perf_counter() - compile_start
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = entry_path.with_name(f".{entry_path.name}.new{os.getpid()}")
+            tmp_path.write_bytes(marshal.dumps((digest, compile_seconds, code)))
+            tmp_path.rename(entry_path)
+        except OSError:
+            pass  # Caching is optional
+        return code
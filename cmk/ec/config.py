@@ -333,6 +333,7 @@ class ConfigFromWATO(TypedDict):
     log_level: LogConfig  # TODO: Mutable???
     log_messages: bool
     log_rulehits: bool
+    message_batch_size: int
     remote_status: tuple[int, bool, Sequence[str] | None] | None
     replication: Replication | None
     retention_interval: int
@@ -63,6 +63,7 @@ def default_config() -> ConfigFromWATO:
         remote_status=None,
         socket_queue_len=10,
         eventsocket_queue_len=10,
+        message_batch_size=1,
         hostname_translation=TranslationOptions(),
         archive_orphans=False,
         archive_mode="sqlite",
@@ -51,6 +51,11 @@ class History(ABC):
     @abstractmethod
     def close(self) -> None: ...
 
+    @contextmanager
+    def batched(self) -> Iterator[None]:
+        """Entries added within the context may be written at once when leaving it"""
+        yield
+
 
 class TimedHistory(History):
     """Decorate History methods with timing information."""
@@ -89,6 +94,11 @@ class TimedHistory(History):
         with self._timing("close"):
             return self._history.close()
 
+    @contextmanager
+    def batched(self) -> Iterator[None]:
+        with self._history.batched(), self._timing("batched"):
+            yield
+
 
 def _log_event(
     config: Config, logger: Logger, event: Event, what: HistoryWhat, who: str, addinfo: str
@@ -8,7 +8,8 @@ import shlex
 import subprocess
 import threading
 import time
-from collections.abc import Callable, Iterable, Sequence
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from contextlib import contextmanager
 from logging import Logger
 from pathlib import Path
 from typing import Any
@@ -39,6 +40,7 @@ class FileHistory(History):
         self._history_columns = history_columns
         self._lock = threading.Lock()
         self._active_history_period = ActiveHistoryPeriod()
+        self._pending_lines: list[bytes] | None = None
 
     def flush(self) -> None:
         _expire_logfiles(self._settings, self._config, self._logger, self._lock, True)
@@ -65,13 +67,35 @@ class FileHistory(History):
                 quote_tab(event.get(colname[6:], defval))  # drop "event_"
                 for colname, defval in self._event_columns
             ]
-
-            with get_logfile(
-                self._config,
-                self._settings.paths.history_dir.value,
-                self._active_history_period,
-            ).open(mode="ab") as f:
-                f.write(b"\t".join(columns) + b"\n")
+            line = b"\t".join(columns) + b"\n"
+            if self._pending_lines is None:
+                self._write([line])
+            else:
+                self._pending_lines.append(line)
+
+    @contextmanager
+    def batched(self) -> Iterator[None]:
+        with self._lock:
+            outermost = self._pending_lines is None  # otherwise the outer batch writes
+            if outermost:
+                self._pending_lines = []
+        try:
+            yield
+        finally:
+            if outermost:
+                with self._lock:
+                    lines, self._pending_lines = self._pending_lines, None
+                    if lines:
+                        self._write(lines)
+
+    # protected by self._lock
+    def _write(self, lines: Sequence[bytes]) -> None:
+        with get_logfile(
+            self._config,
+            self._settings.paths.history_dir.value,
+            self._active_history_period,
+        ).open(mode="ab") as f:
+            f.write(b"".join(lines))
 
     def get(self, query: QueryGET) -> Iterable[Sequence[object]]:
         if not self._settings.paths.history_dir.value.exists():
@@ -6,8 +6,10 @@
 import itertools
 import json
 import sqlite3
+import threading
 import time
-from collections.abc import Iterable, Sequence
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import timedelta
 from logging import Logger
@@ -158,6 +160,8 @@ class SQLiteHistory(History):
         self._history_columns = history_columns
         self._last_housekeeping = 0.0
         self._page_size = 4096
+        self._lock = threading.Lock()
+        self._pending_rows: list[tuple[object, ...]] | None = None
 
         if isinstance(self._settings.database, Path):
             self._settings.database.parent.mkdir(parents=True, exist_ok=True)
@@ -229,23 +233,52 @@ class SQLiteHistory(History):
 
         No need to include the line column, as it is autoincremented.
         """
+        row = tuple(
+            itertools.chain(
+                (time.time(), what, who, addinfo),
+                [
+                    event.get(colname.removeprefix("event_"), defval)
+                    for colname, defval in self._event_columns
+                ],
+            )
+        )
+        with self._lock:
+            if self._pending_rows is not None:
+                self._pending_rows.append(row)
+                return
         with self.conn as connection:
             cur = connection.cursor()
             cur.execute(
                 f"""INSERT INTO
                     history ({', '.join(TABLE_COLUMNS[1:])})
                         VALUES ({', '.join(itertools.repeat('?', len(TABLE_COLUMNS[1:])))});""",
-                tuple(
-                    itertools.chain(
-                        (time.time(), what, who, addinfo),
-                        [
-                            event.get(colname.removeprefix("event_"), defval)
-                            for colname, defval in self._event_columns
-                        ],
-                    )
-                ),
+                row,
             )
 
+    @contextmanager
+    def batched(self) -> Iterator[None]:
+        """Insert the entries added within the context in a single transaction"""
+        with self._lock:
+            nested = self._pending_rows is not None  # the outer batch inserts
+            if not nested:
+                self._pending_rows = []
+        if nested:
+            yield
+            return
+        try:
+            yield
+        finally:
+            with self._lock:
+                rows, self._pending_rows = self._pending_rows, None
+            if rows:
+                with self.conn as connection:
+                    connection.cursor().executemany(
+                        f"""INSERT INTO
+                            history ({', '.join(TABLE_COLUMNS[1:])})
+                                VALUES ({', '.join(itertools.repeat('?', len(TABLE_COLUMNS[1:])))});""",
+                        rows,
+                    )
+
     def add_entries(self, entries: Sequence[Sequence[object]]) -> None:
         """Add multiple entries to the history table.
 
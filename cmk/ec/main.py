@@ -72,10 +72,12 @@ from .query import (
     QueryREPLICATE,
     StatusTable,
 )
+from .rule_index import RuleIndex
 from .rule_matcher import compile_rule, match, MatchFailure, MatchResult, MatchSuccess, RuleMatcher
 from .rule_packs import load_active_config
 from .settings import create_settings, FileDescriptor, PortNumber, Settings
 from .snmp import SNMPTrapParser
+from .status_store import PackedEventStatus, StatusStore
 from .syslog import SyslogFacility, SyslogPriority
 from .timeperiod import TimePeriods
 
@@ -89,13 +91,6 @@ def open_log(log_file_path: Path) -> None:
     log.setup_logging_handler(logfile)
 
 
-class PackedEventStatus(TypedDict):
-    next_event_id: int
-    events: list[Event]
-    rule_stats: dict[str, int]
-    interval_starts: dict[str, int]
-
-
 class SlaveStatus(TypedDict):
     last_master_down: float | None
     last_sync: float
@@ -263,6 +258,17 @@ def parse_address(what: str, address: object) -> tuple[str, int]:
     return unmap_ipv4_address(address[0]), address[1]
 
 
+def receive_datagrams(sock: socket.socket, bufsize: int, limit: int) -> list[tuple[bytes, Any]]:
+    """Receive up to limit datagrams from a readable socket without blocking"""
+    datagrams = [sock.recvfrom(bufsize)]
+    while len(datagrams) < limit:
+        try:
+            datagrams.append(sock.recvfrom(bufsize, socket.MSG_DONTWAIT))
+        except (BlockingIOError, InterruptedError):
+            break
+    return datagrams
+
+
 def terminate(
     terminate_main_event: threading.Event,
     event_server: EventServer,
@@ -381,6 +387,9 @@ class EventServer(ECServerThread):
         self._rules: list[Rule] = []
         self._rule_by_id: dict[str | None, Rule] = {}
         self._rule_hash: dict[int, dict[int, Any]] = {}
+        # Same as the rule hash, but as masks of the rule index
+        self._rule_hash_masks: dict[int, dict[int, int]] = {}
+        self._rule_index = RuleIndex([])
         self._hash_stats: list[list[int]] = []  # facility/priority
         for _unused_facility in range(32):
             self._hash_stats.append([0] * 8)
@@ -664,6 +673,8 @@ class EventServer(ECServerThread):
         select_timeout = 1
         unprocessed_pipe_data = b""
         while not self._terminate_event.is_set():
+            batch: list[Event] = []
+            batch_size = self._config["message_batch_size"]
             try:
                 readable: list[FileDescr | socket.socket] = select.select(
                     listen_list + list(client_sockets.keys()), [], [], select_timeout
@@ -707,7 +718,7 @@ class EventServer(ECServerThread):
                         messages, unprocessed = parse_bytes_into_syslog_messages(
                             previous_data + new_data
                         )
-                        self.process_syslog_messages(messages, address)
+                        batch += self.create_events_from_syslog_messages(messages, address)
                         client_sockets[fd] = (cs, address, unprocessed)
                     else:  # the other side is gone, no more data will ever come
                         del client_sockets[fd]  # discarding previous_data is OK, it's incomplete
@@ -723,31 +734,38 @@ class EventServer(ECServerThread):
                 messages, unprocessed_pipe_data = parse_bytes_into_syslog_messages(
                     unprocessed_pipe_data
                 )
-                self.process_syslog_messages(messages, None)
+                batch += self.create_events_from_syslog_messages(messages, None)
 
-            # Read events from builtin syslog server
+            # Read events from builtin syslog server. Under high load, reading
+            # several datagrams at once keeps the kernel from dropping them.
             if self._syslog_udp is not None and self._syslog_udp in readable:
-                message, address = self._syslog_udp.recvfrom(4096)
-                self.process_syslog_messages(
-                    [message], parse_address("syslog socket (UDP)", address)
-                )
+                for message, address in receive_datagrams(self._syslog_udp, 4096, batch_size):
+                    batch += self.create_events_from_syslog_messages(
+                        [message], parse_address("syslog socket (UDP)", address)
+                    )
 
             # Read events from builtin snmptrap server
             if self._snmp_trap_socket is not None and self._snmp_trap_socket in readable:
-                message, address = self._snmp_trap_socket.recvfrom(65535)
-                self.process_potential_event_instrumented(
-                    self.create_events_from_trap(message, parse_address("SNMP trap", address))
-                )
+                for message, address in receive_datagrams(
+                    self._snmp_trap_socket, 65535, batch_size
+                ):
+                    batch += self.create_events_from_trap(
+                        message, parse_address("SNMP trap", address)
+                    )
 
             if spool_files := sorted(
                 self.settings.paths.spool_dir.value.glob("[!.]*"), key=lambda x: x.stat().st_mtime
             ):
-                self.process_syslog_messages(spool_files[0].read_bytes().splitlines(), None)
+                batch += self.create_events_from_syslog_messages(
+                    spool_files[0].read_bytes().splitlines(), None
+                )
                 spool_files[0].unlink()
                 select_timeout = 0  # enable fast processing to process further files
             else:
                 select_timeout = 1  # restore default select timeout
 
+            self.process_event_batches(batch, batch_size)
+
     def create_events_from_trap(self, data: bytes, address: tuple[str, int]) -> Iterator[Event]:
         try:
             if varbinds_and_ipaddress := self._snmp_trap_parser(data, address):
@@ -771,13 +789,27 @@ class EventServer(ECServerThread):
             elapsed = time.time() - before
             self._perfcounters.count_time("processing", elapsed)
 
+    def process_event_batches(self, events: Sequence[Event], batch_size: int) -> None:
+        """Process the events in batches, writing the history once per batch"""
+        for start in range(0, len(events), batch_size):
+            batch = events[start : start + batch_size]
+            self._perfcounters.count_size("queue_depth", len(events) - start)
+            self._perfcounters.count_size("batch_size", len(batch))
+            with self._history.batched():
+                self.process_potential_event_instrumented(batch)
+
+    def create_events_from_syslog_messages(
+        self, messages: Iterable[bytes], address: tuple[str, int] | None
+    ) -> Iterable[Event]:
+        return create_events_from_syslog_messages(
+            messages, address, self._logger if self._config["debug_rules"] else None
+        )
+
     def process_syslog_messages(
         self, messages: Iterable[bytes], address: tuple[str, int] | None
     ) -> None:
         self.process_potential_event_instrumented(
-            create_events_from_syslog_messages(
-                messages, address, self._logger if self._config["debug_rules"] else None
-            )
+            self.create_events_from_syslog_messages(messages, address)
         )
 
     def do_housekeeping(self) -> None:
@@ -1124,6 +1156,7 @@ class EventServer(ECServerThread):
         self._rule_by_id = {}
         # Speedup-Hash for rule execution
         self._rule_hash = {}
+        self._rule_hash_masks = {}
         count_disabled = 0
         count_rules = 0
         count_unspecific = 0
@@ -1179,6 +1212,14 @@ class EventServer(ECServerThread):
                 len(self._rules) - count_unspecific,
                 count_unspecific,
             )
+            self._rule_index = RuleIndex(self._rules)
+            self._rule_hash_masks = {
+                facility: {
+                    prio: self._rule_index.mask(entries) for prio, entries in by_prio.items()
+                }
+                for facility, by_prio in self._rule_hash.items()
+            }
+            self._logger.info("Rule index: %s", self._rule_index.summary())
             for facility in list(range(23)) + [31]:
                 if facility in self._rule_hash:
                     stats = [
@@ -1241,6 +1282,14 @@ class EventServer(ECServerThread):
                 count,
                 (100.0 * count / float(total_count)),
             )
+        if events := self._rule_index.stats.events:
+            self._logger.info(
+                "Rule index: %d events, %.1f rules per event by facility/priority,"
+                " %.1f rules per event after indexing",
+                events,
+                self._rule_index.stats.candidates / events,
+                self._rule_index.stats.selected / events,
+            )
 
     def process_potential_event(self, event: Event) -> None:  # pylint: disable=too-many-branches
         self.do_translate_hostname(event)
@@ -1252,7 +1301,16 @@ class EventServer(ECServerThread):
         # Rule optimizer
         if self._config["rule_optimizer"]:
             self._hash_stats[event["facility"]][event["priority"]] += 1
-            rule_candidates = self._rule_hash.get(event["facility"], {}).get(event["priority"], [])
+            if self._config["debug_rules"]:
+                # Show why each of the rules does not match
+                rule_candidates = self._rule_hash.get(event["facility"], {}).get(
+                    event["priority"], []
+                )
+            else:
+                rule_candidates = self._rule_index.select(
+                    event,
+                    self._rule_hash_masks.get(event["facility"], {}).get(event["priority"], 0),
+                )
         else:
             rule_candidates = self._rules
 
@@ -2313,7 +2371,8 @@ class StatusServer(ECServerThread):
         """Erase our current state and history!."""
         self._history.flush()
         self._event_status.flush()
-        self._event_status.save_status()
+        # Compact, so that no flushed events are kept in the journal
+        self._event_status.save_status(compact=True)
         if is_replication_slave(self._config):
             with contextlib.suppress(Exception):
                 self.settings.paths.master_config_file.value.unlink()
@@ -2541,6 +2600,9 @@ class EventStatus:
         self.lock = threading.Lock()
         self._history = history
         self._logger = logger
+        self._store = StatusStore(
+            settings.paths.status_file.value, settings.paths.status_journal_file.value, logger
+        )
         self.flush()
 
     def reload_configuration(self, config: Config, history: History) -> None:
@@ -2629,19 +2691,14 @@ class EventStatus:
         self._rule_stats = status["rule_stats"]
         self._interval_starts = status["interval_starts"]
 
-    def save_status(self) -> None:
+    def save_status(self, *, compact: bool = False) -> None:
         now = time.time()
-        status = self.pack_status()
         path = self.settings.paths.status_file.value
-        path_new = path.parent / (path.name + ".new")
-        # Believe it or not: cPickle is more than two times slower than repr()
-        with path_new.open(mode="wb") as f:
-            f.write((repr(status) + "\n").encode("utf-8"))
-            f.flush()
-            os.fsync(f.fileno())
-        path_new.rename(path)
+        saved = self._store.save(self.pack_status(), compact=compact)
         elapsed = time.time() - now
-        self._logger.log(VERBOSE, "Saved event state to %s in %.3fms.", path, elapsed * 1000)
+        self._logger.log(
+            VERBOSE, "Saved event state to %s (%s) in %.3fms.", path, saved, elapsed * 1000
+        )
 
     def reset_counters(self, rule_id: str | None) -> None:
         if rule_id:
@@ -2653,17 +2710,13 @@ class EventStatus:
 
     def load_status(self, event_server: EventServer) -> None:
         path = self.settings.paths.status_file.value
-        if path.exists():
-            try:
-                status = ast.literal_eval(path.read_text(encoding="utf-8"))
-                self._next_event_id = status["next_event_id"]
-                self._events = status["events"]
-                self._rule_stats = status["rule_stats"]
-                self._interval_starts = status.get("interval_starts", {})
+        try:
+            if (status := self._store.load()) is not None:
+                self.unpack_status(status)
                 self._logger.info("Loaded event state from %s.", path)
-            except Exception:
-                self._logger.exception("Error loading event state from %s", path)
-                raise
+        except Exception:
+            self._logger.exception("Error loading event state from %s", path)
+            raise
 
         # Add new columns and fix broken events
         for event in self._events:
@@ -3499,7 +3552,7 @@ def main() -> None:
         os.close(pipe)  # Close pipe
 
         logger.log(VERBOSE, "Saving final event state")
-        event_status.save_status()
+        event_status.save_status(compact=True)
 
         logger.log(VERBOSE, "Cleaning up sockets")
         settings.paths.unix_socket.value.unlink()
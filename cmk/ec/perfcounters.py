@@ -37,6 +37,12 @@ class Perfcounters:
         "request": 0.95,  # Client requests
     }
 
+    # Average sizes
+    _size_weights: Mapping[str, float] = {
+        "batch_size": 0.95,  # messages processed in one batch
+        "queue_depth": 0.95,  # messages waiting for processing when a batch starts
+    }
+
     # TODO: Why aren't self._times / self._rates / ... not initialized with their defaults?
     def __init__(self, logger: Logger) -> None:
         self._lock = ECLock(logger)
@@ -47,6 +53,7 @@ class Perfcounters:
         self._rates: dict[str, float] = {}
         self._average_rates: dict[str, float] = {}
         self._times: dict[str, float] = {}
+        self._sizes: dict[str, float] = {}
         self._last_statistics: float | None = None
 
         self._logger = logger.getChild("Perfcounters")
@@ -62,6 +69,13 @@ class Perfcounters:
             else:
                 self._times[counter] = ptime
 
+    def count_size(self, counter: str, size: float) -> None:
+        with self._lock:
+            if counter in self._sizes:
+                self._sizes[counter] = lerp(size, self._sizes[counter], self._size_weights[counter])
+            else:
+                self._sizes[counter] = size
+
     def do_statistics(self) -> None:
         with self._lock:
             now = time.time()
@@ -96,6 +110,9 @@ class Perfcounters:
         for name in cls._weights:
             columns.append((f"status_average_{name}_time", 0.0))
 
+        for name in cls._size_weights:
+            columns.append((f"status_average_{name}", 0.0))
+
         return columns
 
     def get_status(self) -> Sequence[float]:
@@ -114,4 +131,7 @@ class Perfcounters:
             for name in self._weights:
                 row.append(self._times.get(name, 0.0))
 
+            for name in self._size_weights:
+                row.append(self._sizes.get(name, 0.0))
+
             return row
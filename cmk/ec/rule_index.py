@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Narrow down the rules which have to be tried for an event
+
+Most rules can only match an event if its host, syslog application or text
+contains a certain literal string: a plain text condition is such a literal,
+and a regular expression usually contains a sequence of literal characters
+which every match has to contain. The index collects these literals per event
+field and combines them into a single regular expression (shaped like a trie),
+so finding all literals contained in a field costs one regex scan regardless of
+the number of rules.
+
+The rules are represented by bit masks (bit i is the i-th rule), so combining
+the candidates of the different fields is a cheap integer operation. The index
+only ever rules out rules which can not match, the remaining candidates still
+have to be matched by the RuleMatcher.
+"""
+
+import re
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from re import _parser as sre_parse  # type: ignore[attr-defined]
+from typing import Final, TypeAlias
+
+from .config import Rule, TextPattern
+from .event import Event
+
+# Long literals do not make the index more selective, but the scanner bigger
+_MAX_LITERAL_LENGTH: Final = 64
+
+_Trie: TypeAlias = dict[str, "_Trie"]
+
+
+@dataclass(frozen=True)
+class Literal:
+    value: str
+    # False for literals taken from a case insensitive regular expression. Some
+    # non ASCII characters match ASCII characters in this case (e.g. "ı" and "i"),
+    # so these literals are only reliable for ASCII texts.
+    exact: bool
+
+
+@dataclass(frozen=True)
+class _Alternative:
+    literal: Literal
+    complete: bool
+
+
+_Requirement = Sequence[_Alternative] | None  # None: the field is not restricted
+
+
+def required_literal(pattern: TextPattern) -> Literal | None:
+    """Return a (lower case) literal which every text matching the pattern contains"""
+    if isinstance(pattern, str):
+        return Literal(pattern.lower()[:_MAX_LITERAL_LENGTH], exact=True)
+
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:  # pylint: disable=broad-except
+        return None
+
+    # All top level items of the pattern have to match one after the other, so
+    # every run of literal characters has to be contained in the text.
+    longest = run = ""
+    for op, av in parsed:
+        if op is sre_parse.LITERAL and (char := chr(av)).isascii():
+            run += char
+            continue
+        if op is sre_parse.AT:  # zero width (^, $, \b, ...)
+            continue
+        longest = max(longest, run, key=len)
+        run = ""
+    longest = max(longest, run, key=len)
+
+    if not longest:
+        return None
+    return Literal(longest.lower()[:_MAX_LITERAL_LENGTH], exact=False)
+
+
+def _trie_regex(literals: Iterable[str]) -> str:
+    """Build a regex matching the longest of the literals starting at a position"""
+    trie: _Trie = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: _Trie) -> str:
+        alternatives = [re.escape(char) + build(child) for char, child in node.items() if char]
+        if not alternatives:
+            return ""
+        regex = alternatives[0] if len(alternatives) == 1 else "(?:%s)" % "|".join(alternatives)
+        return f"(?:{regex})?" if "" in node else regex
+
+    return build(trie)
+
+
+class _FieldIndex:
+    def __init__(self, requirements: Sequence[_Requirement]) -> None:
+        self.unrestricted = 0
+        self._inexact = 0
+        self._equals: dict[str, int] = {}
+        contains: dict[str, int] = {}
+        for position, requirement in enumerate(requirements):
+            bit = 1 << position
+            if requirement is None:
+                self.unrestricted |= bit
+                continue
+            for alternative in requirement:
+                target = self._equals if alternative.complete else contains
+                target[alternative.literal.value] = target.get(alternative.literal.value, 0) | bit
+                if not alternative.literal.exact:
+                    self._inexact |= bit
+
+        self.num_literals = len(self._equals) + len(contains)
+
+        # The scanner only reports the longest literal starting at a position,
+        # so each literal also stands for the literals being a prefix of it.
+        self._contains = {
+            literal: _or(contains.get(literal[:length], 0) for length in range(1, len(literal) + 1))
+            for literal in contains
+        }
+        self._scanner = re.compile("(?=(%s))" % _trie_regex(sorted(contains))) if contains else None
+
+    def matching(self, value: str) -> int:
+        """Return the mask of the rules which are not ruled out by the value"""
+        lowered = value.lower()
+        mask = self.unrestricted | self._equals.get(lowered, 0)
+        if self._scanner is not None:
+            for found in self._scanner.finditer(lowered):
+                mask |= self._contains[found.group(1)]
+        if self._inexact and not value.isascii():
+            mask |= self._inexact
+        return mask
+
+
+def _or(masks: Iterable[int]) -> int:
+    result = 0
+    for mask in masks:
+        result |= mask
+    return result
+
+
+def _is_indexable(rule: Rule) -> bool:
+    # Inverted rules match exactly the events not fulfilling the conditions and
+    # broken rules shall fail the same way as without the index.
+    return not rule.get("invert_matching") and not rule.get("disabled")
+
+
+def _requirement(patterns: Iterable[TextPattern]) -> _Requirement:
+    """Any of the patterns has to be found in the field"""
+    alternatives = []
+    for pattern in patterns:
+        if (literal := required_literal(pattern)) is None:
+            return None
+        alternatives.append(_Alternative(literal, complete=False))
+    return alternatives
+
+
+def _host_requirement(rule: Rule) -> _Requirement:
+    if not _is_indexable(rule) or "match_host" not in rule:
+        return None
+    pattern = rule["match_host"]
+    if isinstance(pattern, str):
+        # The complete host name is compared, so the pattern must not be truncated
+        return [_Alternative(Literal(pattern.lower(), exact=True), complete=True)]
+    # Regular expressions are searched, even for the host name
+    return _requirement([pattern])
+
+
+def _application_requirement(rule: Rule) -> _Requirement:
+    patterns = [
+        *([rule["match_application"]] if "match_application" in rule else []),
+        *([rule["cancel_application"]] if "cancel_application" in rule else []),
+    ]
+    if not _is_indexable(rule) or not patterns:
+        return None
+    return _requirement(patterns)
+
+
+def _text_requirement(rule: Rule) -> _Requirement:
+    if not _is_indexable(rule) or "match" not in rule:
+        return None  # no message condition: every text matches
+    return _requirement([rule["match"], *([rule["match_ok"]] if "match_ok" in rule else [])])
+
+
+@dataclass
+class RuleIndexStats:
+    events: int = 0
+    candidates: int = 0
+    selected: int = 0
+
+
+class RuleIndex:
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self._rules = list(rules)
+        self._positions = {id(rule): position for position, rule in enumerate(self._rules)}
+        self._host = _FieldIndex([_host_requirement(r) for r in self._rules])
+        self._application = _FieldIndex([_application_requirement(r) for r in self._rules])
+        self._text = _FieldIndex([_text_requirement(r) for r in self._rules])
+        self.stats = RuleIndexStats()
+
+    def mask(self, rules: Iterable[Rule]) -> int:
+        """Return the mask of the given (indexed) rules"""
+        return _or(1 << self._positions[id(rule)] for rule in rules)
+
+    def summary(self) -> str:
+        all_rules = (1 << len(self._rules)) - 1
+        return ", ".join(
+            f"{name}: {(all_rules & ~field.unrestricted).bit_count()} rules"
+            f" ({field.num_literals} literals)"
+            for name, field in (
+                ("host", self._host),
+                ("application", self._application),
+                ("text", self._text),
+            )
+        )
+
+    def select(self, event: Event, mask: int) -> Sequence[Rule]:
+        """Return the rules of the mask which may match the event, in rule order"""
+        self.stats.events += 1
+        self.stats.candidates += mask.bit_count()
+        for field, value in (
+            (self._host, event["host"]),
+            (self._application, event["application"]),
+            (self._text, event["text"]),
+        ):
+            if not mask:
+                break
+            mask &= field.matching(value)
+
+        self.stats.selected += mask.bit_count()
+        selected = []
+        while mask:
+            lowest = mask & -mask
+            selected.append(self._rules[lowest.bit_length() - 1])
+            mask ^= lowest
+        return selected
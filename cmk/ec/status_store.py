@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Persist the event status incrementally
+
+Writing all events on every save gets slow with many open events. The status
+is therefore stored as a snapshot of all events plus a journal of the changes
+since the snapshot: each save appends a record with the events which have been
+added or changed and the IDs of the removed events. The journal is folded into
+a new snapshot as soon as it has grown larger than the snapshot itself.
+
+Both files contain marshal data, which is loaded a lot faster than the repr()
+format used before. Status files in the old format are still read once and are
+replaced by a snapshot on the next save.
+"""
+
+import ast
+import marshal
+import os
+import struct
+from collections.abc import Iterable
+from logging import Logger
+from pathlib import Path
+from typing import Final, NamedTuple, TypedDict
+
+from .event import Event
+
+_MAGIC: Final = b"CMKECST1"
+_RECORD_HEADER: Final = struct.Struct("!I")
+# Do not fold tiny journals into a new snapshot on every save
+_MIN_COMPACTION_SIZE: Final = 1024 * 1024
+
+
+class PackedEventStatus(TypedDict):
+    next_event_id: int
+    events: list[Event]
+    rule_stats: dict[str, int]
+    interval_starts: dict[str, int]
+
+
+class _JournalRecord(NamedTuple):
+    generation: int
+    changed: list[Event]
+    removed: list[int]
+    next_event_id: int
+    rule_stats: dict[str, int]
+    interval_starts: dict[str, int]
+
+
+_Fingerprint = tuple[tuple[str, ...], tuple[object, ...]]
+_Meta = tuple[int, dict[str, int], dict[str, int]]
+
+
+_SCALARS: Final = frozenset({str, int, float, bool, type(None)})
+
+
+def _plain(value: object) -> object:
+    """Strip the subclasses of str (e.g. HostName) which marshal does not support"""
+    if type(value) in _SCALARS:
+        return value
+    if isinstance(value, str):
+        return str(value)
+    if isinstance(value, list | tuple):
+        return type(value)(_plain(v) for v in value)
+    if isinstance(value, dict):
+        return {_plain(k): _plain(v) for k, v in value.items()}
+    return value
+
+
+def _plain_event(event: Event) -> Event:
+    return {key: _plain(value) for key, value in event.items()}  # type: ignore[return-value]
+
+
+def _meta(status: PackedEventStatus) -> _Meta:
+    return (
+        status["next_event_id"],
+        dict(status["rule_stats"]),
+        dict(status["interval_starts"]),
+    )
+
+
+class StatusStore:
+    def __init__(self, snapshot_path: Path, journal_path: Path, logger: Logger) -> None:
+        self._snapshot_path = snapshot_path
+        self._journal_path = journal_path
+        self._logger = logger
+        self._generation = 0
+        self._snapshot_size = 0
+        self._journal_size = 0
+        # Key layouts are shared between the fingerprints to save memory
+        self._layouts: dict[tuple[str, ...], tuple[str, ...]] = {}
+        # What has been written for each event ID. None: the files do not
+        # reflect a known state, so the next save has to write a snapshot.
+        self._saved: dict[int, _Fingerprint] | None = None
+        self._saved_meta: _Meta | None = None
+
+    def _fingerprint(self, event: Event) -> _Fingerprint:
+        layout = tuple(event)
+        return self._layouts.setdefault(layout, layout), tuple(event.values())
+
+    def _fingerprints(self, events: Iterable[Event]) -> dict[int, _Fingerprint]:
+        return {event["id"]: self._fingerprint(event) for event in events}
+
+    def save(self, status: PackedEventStatus, *, compact: bool = False) -> str:
+        """Write the changes since the last save, return a short summary for logging"""
+        fingerprints = self._fingerprints(status["events"])
+        if (
+            compact
+            or self._saved is None
+            # Events without unique IDs can not be tracked individually
+            or len(fingerprints) != len(status["events"])
+            or self._journal_size > max(self._snapshot_size, _MIN_COMPACTION_SIZE)
+        ):
+            self._write_snapshot(status, fingerprints)
+            return f"snapshot of {len(status['events'])} events"
+
+        changed: list[Event] = [
+            _plain_event(event)
+            for event in status["events"]
+            if self._saved.get(event["id"]) != fingerprints[event["id"]]
+        ]
+        removed = [event_id for event_id in self._saved if event_id not in fingerprints]
+        meta = _meta(status)
+        if not changed and not removed and meta == self._saved_meta:
+            return "no changes"
+
+        # marshal only supports the plain tuple
+        record = marshal.dumps(
+            tuple(
+                _JournalRecord(
+                    generation=self._generation,
+                    changed=changed,
+                    removed=removed,
+                    next_event_id=meta[0],
+                    rule_stats=meta[1],
+                    interval_starts=meta[2],
+                )
+            )
+        )
+        with self._journal_path.open(mode="ab") as f:
+            f.write(_RECORD_HEADER.pack(len(record)) + record)
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_size += _RECORD_HEADER.size + len(record)
+        self._saved = fingerprints
+        self._saved_meta = meta
+        return f"{len(changed)} changed and {len(removed)} removed events"
+
+    def _write_snapshot(
+        self, status: PackedEventStatus, fingerprints: dict[int, _Fingerprint]
+    ) -> None:
+        generation = self._generation + 1
+        data = _MAGIC + marshal.dumps(
+            (
+                generation,
+                {
+                    "next_event_id": status["next_event_id"],
+                    "events": [_plain_event(event) for event in status["events"]],
+                    "rule_stats": _plain(status["rule_stats"]),
+                    "interval_starts": status["interval_starts"],
+                },
+            )
+        )
+        path_new = self._snapshot_path.parent / (self._snapshot_path.name + ".new")
+        with path_new.open(mode="wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        path_new.rename(self._snapshot_path)
+        # The records of an older generation are ignored when loading, so a
+        # crash before the journal is removed does no harm.
+        self._journal_path.unlink(missing_ok=True)
+
+        self._generation = generation
+        self._snapshot_size = len(data)
+        self._journal_size = 0
+        self._saved = fingerprints
+        self._saved_meta = _meta(status)
+
+    def load(self) -> PackedEventStatus | None:
+        try:
+            data = self._snapshot_path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+        if not data.startswith(_MAGIC):
+            # Written by a version without the status journal
+            legacy = ast.literal_eval(data.decode("utf-8"))
+            self._saved = None
+            return PackedEventStatus(
+                next_event_id=legacy["next_event_id"],
+                events=legacy["events"],
+                rule_stats=legacy["rule_stats"],
+                interval_starts=legacy.get("interval_starts", {}),
+            )
+
+        generation, status = marshal.loads(data[len(_MAGIC) :])
+        events = {event["id"]: event for event in status["events"]}
+        self._journal_size = self._replay_journal(generation, status, events)
+        status["events"] = list(events.values())
+
+        self._generation = generation
+        self._snapshot_size = len(data)
+        self._saved = self._fingerprints(status["events"])
+        self._saved_meta = _meta(status)
+        return status
+
+    def _replay_journal(
+        self, generation: int, status: PackedEventStatus, events: dict[int, Event]
+    ) -> int:
+        """Apply the journal to the snapshot, return the size of the valid records
+
+        An incomplete record at the end is cut off, so the following saves
+        append to a readable journal again.
+        """
+        try:
+            journal = self._journal_path.read_bytes()
+        except FileNotFoundError:
+            return 0
+
+        offset = 0
+        while offset < len(journal):
+            try:
+                (length,) = _RECORD_HEADER.unpack_from(journal, offset)
+                start = offset + _RECORD_HEADER.size
+                if start + length > len(journal):
+                    raise ValueError("truncated record")
+                record = _JournalRecord(*marshal.loads(journal[start : start + length]))
+            except (struct.error, ValueError, EOFError, TypeError):
+                # Most likely the process died while appending the last record
+                self._logger.warning(
+                    "Ignoring incomplete record at offset %d of %s", offset, self._journal_path
+                )
+                os.truncate(self._journal_path, offset)
+                break
+            offset = start + length
+            if record.generation != generation:
+                continue
+            _apply_record(record, status, events)
+
+        return offset
+
+
+def _apply_record(
+    record: _JournalRecord, status: PackedEventStatus, events: dict[int, Event]
+) -> None:
+    for event in record.changed:
+        events[event["id"]] = event
+    for event_id in record.removed:
+        events.pop(event_id, None)
+    status["next_event_id"] = record.next_event_id
+    status["rule_stats"] = record.rule_stats
+    status["interval_starts"] = record.interval_starts
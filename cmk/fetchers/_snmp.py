@@ -19,6 +19,7 @@ from cmk.snmplib import (
     SNMPRawData,
     SNMPRawDataElem,
     SNMPRowInfo,
+    WalkCacheStats,
 )
 
 from cmk.checkengine.parser import SectionStore
@@ -40,6 +41,8 @@ class WalkCache(
 
     This cache is different from section stores in that is per-fetchoid,
     which means it deduplicates fetch operations across section definitions.
+    Columns within an already fetched subtree are served from that walk, see
+    `get_snmp_table()`.
 
     The fetched data is always saved to a file *if* the respective OID is marked as being cached
     by the plug-in using `OIDCached` (that is: if the save_to_cache attribute of the OID object
@@ -323,6 +326,7 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
             walk_cache.clear()
             walk_cache_msg = "SNMP walk cache cleared"
 
+        walk_cache_stats = WalkCacheStats()
         fetched_data: dict[SectionName, SNMPRawDataElem] = {}
         for section_name in self._sort_section_names(section_names):
             try:
@@ -339,10 +343,12 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
                         walk_cache=walk_cache,
                         backend=self._backend,
                         log=self._logger.debug,
+                        stats=walk_cache_stats,
                     )
                     for tree in self.plugin_store[section_name].trees
                 ]
 
+        self._logger.debug("SNMP walk cache: %s", walk_cache_stats)
         walk_cache.save()
 
         return fetched_data
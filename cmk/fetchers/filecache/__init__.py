@@ -4,11 +4,21 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 from ._agent import AgentFileCache
-from ._cache import FileCache, FileCacheMode, FileCacheOptions, MaxAge, NoCache
+from ._cache import (
+    decode_cache_file,
+    FileCache,
+    FileCacheCompression,
+    FileCacheMode,
+    FileCacheOptions,
+    MaxAge,
+    NoCache,
+)
 from ._snmp import SNMPFileCache
 
 __all__ = [
+    "decode_cache_file",
     "FileCache",
+    "FileCacheCompression",
     "FileCacheOptions",
     "FileCacheMode",
     "MaxAge",
@@ -48,8 +48,10 @@ from __future__ import annotations
 import abc
 import enum
 import logging
+import lzma
 import os
 import time
+import zlib
 from collections.abc import Sized
 from dataclasses import dataclass
 from pathlib import Path
@@ -63,7 +65,9 @@ from cmk.ccc.exceptions import MKFetcherError, MKGeneralException, MKTimeout
 from .._abstract import Mode
 
 __all__ = [
+    "decode_cache_file",
     "FileCache",
+    "FileCacheCompression",
     "FileCacheMode",
     "FileCacheOptions",
     "MaxAge",
@@ -102,6 +106,52 @@ class FileCacheMode(enum.IntFlag):
     READ_WRITE = READ | WRITE
 
 
+@enum.unique
+class FileCacheCompression(enum.Enum):
+    """Codec of the cache files
+
+    Compressed files start with a header naming the codec.  Reading detects
+    the header, so the cache files written with another setting stay usable.
+    """
+
+    NONE = "none"
+    ZLIB = "zlib"
+    LZMA = "lzma"
+
+    def encode(self, data: bytes) -> bytes:
+        match self:
+            case FileCacheCompression.NONE:
+                return data
+            case FileCacheCompression.ZLIB:
+                return _HEADER_ZLIB + zlib.compress(data, 1)
+            case FileCacheCompression.LZMA:
+                return _HEADER_LZMA + lzma.compress(data, preset=0)
+
+
+# Neither agent output nor the SNMP cache files start with a NUL byte.
+_HEADER_ZLIB: Final = b"\0CMKFC\x01"
+_HEADER_LZMA: Final = b"\0CMKFC\x02"
+_HEADER_SIZE: Final = len(_HEADER_ZLIB)
+
+
+def decode_cache_file(data: bytes) -> bytes:
+    """The content of a cache file, compressed or not
+
+    Raises ValueError for corrupt compressed data.
+    """
+    if not data.startswith(b"\0"):
+        return data
+    header = data[:_HEADER_SIZE]
+    try:
+        if header == _HEADER_ZLIB:
+            return zlib.decompress(data[_HEADER_SIZE:])
+        if header == _HEADER_LZMA:
+            return lzma.decompress(data[_HEADER_SIZE:])
+    except (zlib.error, lzma.LZMAError) as e:
+        raise ValueError(f"Corrupt cache file: {e}") from e
+    return data
+
+
 class FileCache(Generic[_TRawData], abc.ABC):
     def __init__(
         self,
@@ -111,6 +161,7 @@ class FileCache(Generic[_TRawData], abc.ABC):
         simulation: bool,
         use_only_cache: bool,
         file_cache_mode: FileCacheMode | int,
+        compression: FileCacheCompression = FileCacheCompression.NONE,
     ) -> None:
         super().__init__()
         self.path_template: Final = path_template
@@ -121,6 +172,7 @@ class FileCache(Generic[_TRawData], abc.ABC):
         self.simulation = simulation
         self.use_only_cache = use_only_cache
         self.file_cache_mode = FileCacheMode(file_cache_mode)
+        self.compression = compression
         self._logger: Final = logging.getLogger("cmk.helper")
 
     def __repr__(self) -> str:
@@ -133,6 +185,7 @@ class FileCache(Generic[_TRawData], abc.ABC):
                     f"simulation={self.simulation}",
                     f"use_only_cache={self.use_only_cache}",
                     f"file_cache_mode={self.file_cache_mode.value}",
+                    f"compression={self.compression.value}",
                 )
             )
             + ")"
@@ -148,6 +201,7 @@ class FileCache(Generic[_TRawData], abc.ABC):
                 self.simulation == other.simulation,
                 self.use_only_cache == other.use_only_cache,
                 self.file_cache_mode == other.file_cache_mode,
+                self.compression == other.compression,
             )
         )
 
@@ -230,6 +284,12 @@ class FileCache(Generic[_TRawData], abc.ABC):
             self._logger.debug("Not using cache (Empty)")
             return None
 
+        try:
+            cache_file = decode_cache_file(cache_file)
+        except ValueError as e:
+            self._logger.debug("Not using cache (%s)", e)
+            return None
+
         self._logger.log(VERBOSE, "Using data from cache file %s", path)
         return self._from_cache_file(cache_file)
 
@@ -247,7 +307,7 @@ class FileCache(Generic[_TRawData], abc.ABC):
 
         self._logger.debug("Write data to cache file %s", path)
         try:
-            _store.save_bytes_to_file(path, self._to_cache_file(raw_data))
+            _store.save_bytes_to_file(path, self.compression.encode(self._to_cache_file(raw_data)))
         except MKTimeout:
             raise
         except Exception as e:
@@ -291,6 +351,8 @@ class FileCacheOptions:
     use_only_cache: bool = False
     # Set by the --force option from inventory.
     keep_outdated: bool = False
+    # Codec of the written cache files, see "file_cache_compression".
+    compression: FileCacheCompression = FileCacheCompression.NONE
 
     def file_cache_mode(self) -> FileCacheMode:
         return FileCacheMode.DISABLED if self.disabled else FileCacheMode.READ_WRITE
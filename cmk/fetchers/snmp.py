@@ -18,7 +18,7 @@ from cmk.snmplib import (
     SNMPHostConfig,
 )
 
-from .snmp_backend import ClassicSNMPBackend, StoredWalkSNMPBackend
+from .snmp_backend import ClassicSNMPBackend, IndexedWalkSNMPBackend
 
 try:
     from .cee.snmp_backend import inline  # type: ignore[import,unused-ignore]
@@ -52,8 +52,12 @@ def make_backend(
         use_cache = get_force_stored_walks()
 
     if use_cache or snmp_config.snmp_backend is SNMPBackendEnum.STORED_WALK:
-        return StoredWalkSNMPBackend(
-            snmp_config, logger, path=stored_walk_path / snmp_config.hostname
+        return IndexedWalkSNMPBackend(
+            snmp_config,
+            logger,
+            path=stored_walk_path / snmp_config.hostname,
+            # Host names do not start with a dot
+            index_dir=stored_walk_path / ".index",
         )
 
     if inline and snmp_config.snmp_backend is SNMPBackendEnum.INLINE:
@@ -5,6 +5,7 @@
 """Home of our open source SNMP backends."""
 
 from .classic import ClassicSNMPBackend
+from .indexed_walk import IndexedWalkSNMPBackend
 from .stored_walk import StoredWalkSNMPBackend
 
-__all__ = ["ClassicSNMPBackend", "StoredWalkSNMPBackend"]
+__all__ = ["ClassicSNMPBackend", "IndexedWalkSNMPBackend", "StoredWalkSNMPBackend"]
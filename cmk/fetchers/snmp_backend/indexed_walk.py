@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Stored walks with an index of the OIDs
+
+The walk file is parsed once into an index of the entries sorted by OID, the
+lookups are binary searches on that index. The OIDs are encoded such that the
+byte strings sort like the OIDs do: every sub-identifier (32 bits at most) is
+stored as four big endian bytes. That way the entries below an OID are exactly
+the ones starting with the encoded OID.
+
+The index optionally goes to a file, which is memory mapped by the following
+backends of the same walk instead of parsing the walk file again. The values
+are read from the memory mapped walk file on demand.
+"""
+
+import bisect
+import logging
+import mmap
+import os
+import struct
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Final
+
+from cmk.utils.sectionname import SectionName
+
+from cmk.snmplib import OID, SNMPContext, SNMPHostConfig, SNMPRowInfo
+
+from cmk.ccc.exceptions import MKSNMPError
+
+from ._utils import strip_snmp_value
+from .stored_walk import StoredWalkSNMPBackend
+
+__all__ = ["IndexedWalkSNMPBackend", "WalkIndex"]
+
+_MAGIC: Final = b"CMKSWIX1"
+# Magic, size, mtime and inode of the walk file, number of entries
+_HEADER: Final = struct.Struct("=8sQQQQ")
+
+
+def _encode_oid(sub_ids: Sequence[int]) -> bytes:
+    """Raises struct.error for sub-identifiers out of range"""
+    return struct.pack(f">{len(sub_ids)}I", *sub_ids)
+
+
+def _encode_oid_text(oid: bytes) -> bytes:
+    """Raises ValueError or struct.error for invalid OIDs"""
+    sub_ids = oid.strip(b".").split(b".")
+    return struct.pack(f">{len(sub_ids)}I", *map(int, sub_ids))
+
+
+def _successor(prefix: bytes) -> bytes | None:
+    """The smallest byte string greater than all strings starting with prefix"""
+    stripped = prefix.rstrip(b"\xff")
+    if not stripped:
+        return None
+    return stripped[:-1] + bytes((stripped[-1] + 1,))
+
+
+class _Keys:
+    """The encoded OIDs of the index as a sequence, for the bisect module"""
+
+    def __init__(self, offsets: memoryview, blob: memoryview) -> None:
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> bytes:
+        return self._blob[self._offsets[index] : self._offsets[index + 1]].tobytes()
+
+
+class WalkIndex:
+    """Sorted index of the entries of a walk file
+
+    Layout: the header, the offsets of the encoded OIDs in the blob (one more
+    than entries), the start and length of each entry in the walk file and
+    the blob of the encoded OIDs, all in native byte order.
+    """
+
+    def __init__(self, data: bytes | mmap.mmap, walk: bytes | mmap.mmap) -> None:
+        """Raises ValueError if the data is no complete index"""
+        if len(data) < _HEADER.size:
+            raise ValueError("Truncated walk index")
+        magic, size, mtime, inode, count = _HEADER.unpack_from(data)
+        start = _HEADER.size
+        if magic != _MAGIC or len(data) < start + 8 * (count + 1) + 16 * count:
+            raise ValueError("Invalid walk index")
+
+        self.stat_key: Final = (size, mtime, inode)
+        self._data = data
+        self._walk = walk
+        view = memoryview(data)
+        key_offsets = view[start : (start := start + 8 * (count + 1))].cast("Q")
+        self._entries = view[start : (start := start + 16 * count)].cast("Q")
+        if key_offsets[-1] != len(data) - start:
+            raise ValueError("Truncated walk index")
+        self._keys = _Keys(key_offsets, view[start:])
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def _stat_key(walk_path: Path) -> tuple[int, int, int]:
+        stat = walk_path.stat()
+        return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+    @classmethod
+    def build(cls, walk: bytes | mmap.mmap, stat_key: tuple[int, int, int]) -> bytes:
+        """Create the index data of a walk
+
+        Text which does not start with an OID belongs to the value of the
+        preceding entry (newlines in the data).
+        """
+        starts = []
+        keys: list[bytes | None] = []
+        offset = 0
+        for line in walk[:].split(b"\n"):
+            if line.startswith(b"."):
+                starts.append(offset)
+                try:
+                    keys.append(_encode_oid_text(line.split(None, 1)[0]))
+                except (ValueError, struct.error):
+                    keys.append(None)  # Still ends the preceding entry
+            offset += len(line) + 1
+        ends = [*starts[1:], len(walk)]
+        # Equal keys keep the order of the walk
+        order = sorted((key, index) for index, key in enumerate(keys) if key is not None)
+
+        sorted_keys: list[bytes] = []
+        key_offsets = [0]
+        entries: list[int] = []
+        for key, index in order:
+            sorted_keys.append(key)
+            key_offsets.append(key_offsets[-1] + len(key))
+            entries += (starts[index], ends[index] - starts[index])
+
+        return b"".join(
+            (
+                _HEADER.pack(_MAGIC, *stat_key, len(sorted_keys)),
+                struct.pack(f"={len(key_offsets)}Q", *key_offsets),
+                struct.pack(f"={len(entries)}Q", *entries),
+                *sorted_keys,
+            )
+        )
+
+    @classmethod
+    def load(cls, walk_path: Path, index_path: Path | None, logger: logging.Logger) -> "WalkIndex":
+        """Open the index of the walk, create it if there is no valid one"""
+        stat_key = cls._stat_key(walk_path)
+        walk = _map(walk_path)
+
+        if index_path is not None:
+            try:
+                index = cls(_map(index_path), walk)
+            except (OSError, ValueError):
+                pass
+            else:
+                if index.stat_key == stat_key:
+                    return index
+
+        logger.debug(f"  Indexing {walk_path}")
+        data = cls.build(walk, stat_key)
+        if index_path is not None:
+            try:
+                index_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = index_path.with_name(f".{index_path.name}.new{os.getpid()}")
+                tmp_path.write_bytes(data)
+                tmp_path.rename(index_path)
+            except OSError as e:
+                logger.debug(f"  Cannot write {index_path}: {e}")
+        return cls(data, walk)
+
+    def walk(self, sub_ids: Sequence[int], *, dot_star: bool) -> SNMPRowInfo:
+        """The entries below the OID (including it, unless dot_star is set)"""
+        try:
+            key = _encode_oid(sub_ids)
+        except struct.error:
+            return []
+        begin = bisect.bisect_left(self._keys, key)
+        end = (
+            len(self._keys)
+            if (successor := _successor(key)) is None
+            else bisect.bisect_left(self._keys, successor, lo=begin)
+        )
+        if dot_star:
+            while begin < end and self._keys[begin] == key:
+                begin += 1
+            end = min(end, begin + 1)
+        return [self._row(index) for index in range(begin, end)]
+
+    def _row(self, index: int) -> tuple[OID, bytes]:
+        start, length = self._entries[2 * index], self._entries[2 * index + 1]
+        parts = self._walk[start : start + length].decode().split(None, 1)
+        return parts[0], strip_snmp_value(parts[1] if len(parts) > 1 else "")
+
+
+def _map(path: Path) -> bytes | mmap.mmap:
+    with path.open("rb") as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            return b""
+
+
+class IndexedWalkSNMPBackend(StoredWalkSNMPBackend):
+    """Stored walk backend parsing the walk file once
+
+    Pass `index_dir` to keep the index for the following backends of the
+    same walk.
+    """
+
+    def __init__(
+        self,
+        snmp_config: SNMPHostConfig,
+        logger: logging.Logger,
+        path: Path,
+        *,
+        index_dir: Path | None = None,
+    ) -> None:
+        super().__init__(snmp_config, logger, path)
+        self.index_path: Final = None if index_dir is None else index_dir / path.name
+        self._index: WalkIndex | None = None
+
+    def walk(
+        self,
+        /,
+        oid: OID,
+        *,
+        context: SNMPContext,
+        section_name: SectionName | None = None,
+        table_base_oid: OID | None = None,
+    ) -> SNMPRowInfo:
+        dot_star = oid.endswith(".*")
+        sub_ids = self._to_bin_string(oid[:-2] if dot_star else oid)
+
+        self._logger.debug(f"  Loading {oid}")
+        if self._index is None:
+            try:
+                self._index = WalkIndex.load(self.path, self.index_path, self._logger)
+            except OSError:
+                raise MKSNMPError(f"No snmpwalk file {self.path}")
+        return self._index.walk(sub_ids, dot_star=dot_star)
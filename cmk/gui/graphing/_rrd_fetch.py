@@ -8,17 +8,18 @@
 import collections
 import contextlib
 import time
-from collections.abc import Callable, Iterable, Iterator, Mapping
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
 from functools import lru_cache
 
 import livestatus
-from livestatus import livestatus_lql, SiteId
+from livestatus import livestatus_lql, lqencode, SiteId
 
 from cmk.utils.hostaddress import HostName
 from cmk.utils.metrics import MetricName
 from cmk.utils.servicename import ServiceName
 
 from cmk.gui import sites
+from cmk.gui.ctx_stack import g
 from cmk.gui.i18n import _
 from cmk.gui.time_series import TimeSeries, TimeSeriesValues
 from cmk.gui.type_defs import ColumnName
@@ -29,7 +30,7 @@ from cmk.ccc.version import parse_check_mk_version
 
 from ._graph_specification import GraphDataRange, GraphRecipe
 from ._loader import get_unit_info
-from ._timeseries import op_func_wrapper, time_series_operators
+from ._timeseries import time_series_math
 from ._type_defs import GraphConsoldiationFunction, RRDData, RRDDataKey
 from ._utils import (
     check_metrics,
@@ -43,40 +44,43 @@ def fetch_rrd_data_for_graph(
     graph_recipe: GraphRecipe,
     graph_data_range: GraphDataRange,
 ) -> RRDData:
-    unit_conversion = get_unit_info(graph_recipe.unit).get(
-        "conversion",
-        lambda v: v,
-    )
+    unit_conversion = get_unit_info(graph_recipe.unit).get("conversion")
     by_service = _group_needed_rrd_data_by_service(
         key
         for metric in graph_recipe.metrics
         for key in metric.operation.keys()
         if isinstance(key, RRDDataKey)
     )
+    point_range = _point_range(graph_data_range)
+    columns_by_service = {
+        service: {
+            metric: next(rrd_columns([metric], graph_recipe.consolidation_function, point_range))
+            for metric in metrics
+        }
+        for service, metrics in by_service.items()
+    }
+    fetched = _fetch_rrd_columns(
+        {service: list(columns.values()) for service, columns in columns_by_service.items()}
+    )
+
     rrd_data: dict[RRDDataKey, TimeSeries] = {}
-    for (site, host_name, service_description), metrics in by_service.items():
-        with contextlib.suppress(livestatus.MKLivestatusNotFoundError):
-            for (metric_name, consolidation_func_name, scale), data in _fetch_rrd_data(
-                site,
-                host_name,
-                service_description,
-                metrics,
-                graph_recipe.consolidation_function,
-                graph_data_range,
-            ):
-                rrd_data[
-                    RRDDataKey(
-                        site,
-                        host_name,
-                        service_description,
-                        metric_name,
-                        consolidation_func_name,
-                        scale,
-                    )
-                ] = TimeSeries(
-                    data,
-                    conversion=unit_conversion,
+    for (site, host_name, service_description), columns in columns_by_service.items():
+        for (metric_name, consolidation_func_name, scale), column in columns.items():
+            if (data := fetched.get((site, host_name, service_description, column))) is None:
+                continue
+            rrd_data[
+                RRDDataKey(
+                    site,
+                    host_name,
+                    service_description,
+                    metric_name,
+                    consolidation_func_name,
+                    scale,
                 )
+            ] = TimeSeries(
+                data,
+                conversion=unit_conversion,
+            )
     _align_and_resample_rrds(rrd_data, graph_recipe.consolidation_function)
     _chop_last_empty_step(graph_data_range, rrd_data)
 
@@ -105,13 +109,13 @@ def _align_and_resample_rrds(
         if start_time is None:
             start_time, end_time, step = time_series.twindow
         elif (start_time, end_time, step) != time_series.twindow:
-            time_series.values = (
-                time_series.downsample(
+            time_series.array = (
+                time_series.downsample_array(
                     (start_time, end_time, step),
                     key.consolidation_func_name or consolidation_func_name,
                 )
                 if step >= time_series.twindow[2]
-                else time_series.forward_fill_resample((start_time, end_time, step))
+                else time_series.forward_fill_resample_array((start_time, end_time, step))
             )
 
 
@@ -141,7 +145,7 @@ def _chop_last_empty_step(graph_data_range: GraphDataRange, rrd_data: RRDData) -
 
 def _chop_end_of_the_curve(rrd_data: RRDData, step: int) -> None:
     for data in rrd_data.values():
-        del data.values[-1]
+        data.array = data.array[:-1]
         data.end -= step
 
 
@@ -165,14 +169,10 @@ def _group_needed_rrd_data_by_service(
     return by_service
 
 
-def _fetch_rrd_data(
-    site: SiteId,
-    host_name: HostName,
-    service_description: ServiceName,
-    metrics: set[MetricProperties],
-    consolidation_func_name: GraphConsoldiationFunction | None,
-    graph_data_range: GraphDataRange,
-) -> list[tuple[MetricProperties, TimeSeriesValues]]:
+_ServiceKey = tuple[SiteId, HostName, ServiceName]
+
+
+def _point_range(graph_data_range: GraphDataRange) -> str:
     start_time, end_time = graph_data_range.time_range
 
     step = graph_data_range.step
@@ -180,12 +180,96 @@ def _fetch_rrd_data(
     if not isinstance(step, str):
         step = max(1, step)
 
-    point_range = ":".join(map(str, (start_time, end_time, step)))
-    lql_columns = list(rrd_columns(metrics, consolidation_func_name, point_range))
-    query = livestatus_lql([host_name], lql_columns, service_description)
+    return ":".join(map(str, (start_time, end_time, step)))
 
-    with sites.only_sites(site):
-        return list(zip(metrics, sites.live().query_row(query)))
+
+def _rrd_columns_cache() -> (
+    dict[tuple[SiteId, HostName, ServiceName, ColumnName], TimeSeriesValues]
+):
+    """The RRD columns fetched during the current request, e.g. for all graphs of a dashboard"""
+    if "rrd_columns_cache" not in g:
+        g.rrd_columns_cache = {}
+    return g.rrd_columns_cache
+
+
+def _fetch_rrd_columns(
+    needed: Mapping[_ServiceKey, Sequence[ColumnName]],
+) -> Mapping[tuple[SiteId, HostName, ServiceName, ColumnName], TimeSeriesValues]:
+    """Fetch the RRD columns of the services, each one only once per request
+
+    The services needing the same columns are fetched with one query over all of their sites,
+    services not found are missing in the result.
+    """
+    cache = _rrd_columns_cache()
+    batches: dict[tuple[bool, tuple[ColumnName, ...]], list[_ServiceKey]] = collections.defaultdict(
+        list
+    )
+    for service, columns in needed.items():
+        if missing := tuple(sorted({c for c in columns if (*service, c) not in cache})):
+            batches[(service[2] == "_HOST_", missing)].append(service)
+
+    for (_host_metrics, columns), services in batches.items():
+        for service, row in _query_rrd_columns(services, columns):
+            cache.update(((*service, column), data) for column, data in zip(columns, row))
+    return cache
+
+
+def _query_rrd_columns(
+    services: Sequence[_ServiceKey], columns: Sequence[ColumnName]
+) -> list[tuple[_ServiceKey, Sequence[TimeSeriesValues]]]:
+    """Query the columns of services which are either all hosts (_HOST_) or no hosts"""
+    if len(services) == 1:
+        site, host_name, service_description = services[0]
+        query = livestatus_lql([host_name], list(columns), service_description)
+        with contextlib.suppress(livestatus.MKLivestatusNotFoundError), sites.only_sites(site):
+            return [(services[0], sites.live().query_row(query))]
+        return []
+
+    host_metrics = services[0][2] == "_HOST_"
+    if host_metrics:
+        key_columns = ["host_name"]
+        filters = [
+            f"Filter: host_name = {lqencode(host_name)}\n"
+            for host_name in sorted({host_name for _site, host_name, _service in services})
+        ]
+    else:
+        key_columns = ["host_name", "service_description"]
+        filters = [
+            f"Filter: host_name = {lqencode(host_name)}\n"
+            f"Filter: service_description = {lqencode(service_description)}\n"
+            "And: 2\n"
+            for host_name, service_description in sorted(
+                {
+                    (host_name, service_description)
+                    for _site, host_name, service_description in services
+                }
+            )
+        ]
+    query = (
+        f"GET {'hosts' if host_metrics else 'services'}\n"
+        f"Columns: {' '.join([*key_columns, *columns])}\n"
+        f"{''.join(filters)}"
+        f"Or: {len(filters)}\n"
+    )
+
+    # The sites are queried in parallel, the hosts and services of other sites are dropped
+    with (
+        sites.only_sites(sorted({site for site, _host_name, _service in services})),
+        sites.prepend_site(),
+    ):
+        rows = sites.live().query(query)
+
+    wanted = set(services)
+    fetched: list[tuple[_ServiceKey, Sequence[TimeSeriesValues]]] = []
+    for site, host_name, *data in rows:
+        service = (
+            (site, host_name, ServiceName("_HOST_"))
+            if host_metrics
+            else (site, host_name, data.pop(0))
+        )
+        if service in wanted:
+            fetched.append((service, data))
+    return fetched
 
 
 def rrd_columns(
@@ -298,11 +382,11 @@ def translate_and_merge_rrd_columns(
     if not relevant_ts:
         return TimeSeries([0, 0, 0])
 
-    _op_title, op_func = time_series_operators()["MERGE"]
-    single_value_series = [op_func_wrapper(op_func, list(tsp)) for tsp in zip(*relevant_ts)]
+    single_value_series = time_series_math("MERGE", relevant_ts)
+    assert single_value_series is not None
 
     return TimeSeries(
-        single_value_series,
+        single_value_series.array,
         time_window=relevant_ts[0].twindow,
         conversion=_retrieve_unit_conversion_function(target_metric),
     )
@@ -5,12 +5,15 @@
 
 import functools
 import operator
-from collections.abc import Callable
+from collections.abc import Callable, Mapping
 from dataclasses import dataclass
 from typing import Literal, TypeVar
 
+import numpy as np
+import numpy.typing as npt
+
 from cmk.gui.i18n import _
-from cmk.gui.time_series import TimeSeries, TimeSeriesValues
+from cmk.gui.time_series import TimeSeries, TimeSeriesArray, TimeSeriesValues
 from cmk.gui.utils import escaping
 
 from cmk.ccc.exceptions import MKGeneralException
@@ -60,12 +63,11 @@ def time_series_math(
         # Silently return so to get an empty graph slot
         return None
 
-    _op_title, op_func = operators[operator_id]
-    twindow = operands_evaluated[0].twindow
-
-    return TimeSeries(
-        [op_func_wrapper(op_func, list(tsp)) for tsp in zip(*operands_evaluated)], twindow
-    )
+    # One row per operand, the longer operands are cut like zip() does
+    length = min(len(operand) for operand in operands_evaluated)
+    operands = np.vstack([operand.array[:length] for operand in operands_evaluated])
+    with np.errstate(all="ignore"):
+        return TimeSeries(_array_operators[operator_id](operands), operands_evaluated[0].twindow)
 
 
 _TOperatorReturn = TypeVar("_TOperatorReturn")
@@ -144,3 +146,61 @@ def time_series_operators() -> dict[
         "AVERAGE": (_("Average"), _time_series_operator_average),
         "MERGE": ("First non None", lambda x: next(iter(clean_time_series_point(x)))),
     }
+
+
+# The operators above applied to all points at once: the operands are the rows, NaN stands
+# for None and points without a result are NaN.
+_Operands = npt.NDArray[np.float64]
+
+
+def _array_operator_sum(operands: _Operands) -> TimeSeriesArray:
+    return np.where(np.isnan(operands).all(axis=0), np.nan, np.nansum(operands, axis=0))
+
+
+def _array_operator_product(operands: _Operands) -> TimeSeriesArray:
+    return np.prod(operands, axis=0)
+
+
+def _array_operator_difference(operands: _Operands) -> TimeSeriesArray:
+    return operands[0] - operands[1]
+
+
+def _array_operator_fraction(operands: _Operands) -> TimeSeriesArray:
+    return np.divide(
+        operands[0], operands[1], out=np.full(operands.shape[1], np.nan), where=operands[1] != 0
+    )
+
+
+def _array_operator_maximum(operands: _Operands) -> TimeSeriesArray:
+    return np.fmax.reduce(operands, axis=0)
+
+
+def _array_operator_minimum(operands: _Operands) -> TimeSeriesArray:
+    return np.fmin.reduce(operands, axis=0)
+
+
+def _array_operator_average(operands: _Operands) -> TimeSeriesArray:
+    counts = np.count_nonzero(~np.isnan(operands), axis=0)
+    return np.divide(
+        np.nansum(operands, axis=0),
+        counts,
+        out=np.full(operands.shape[1], np.nan),
+        where=counts > 0,
+    )
+
+
+def _array_operator_merge(operands: _Operands) -> TimeSeriesArray:
+    first_valid = np.argmax(~np.isnan(operands), axis=0)
+    return np.take_along_axis(operands, first_valid[np.newaxis], axis=0)[0]
+
+
+_array_operators: Mapping[Operators, Callable[[_Operands], TimeSeriesArray]] = {
+    "+": _array_operator_sum,
+    "*": _array_operator_product,
+    "-": _array_operator_difference,
+    "/": _array_operator_fraction,
+    "MAX": _array_operator_maximum,
+    "MIN": _array_operator_minimum,
+    "AVERAGE": _array_operator_average,
+    "MERGE": _array_operator_merge,
+}
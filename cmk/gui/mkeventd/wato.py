@@ -228,6 +228,7 @@ def register(
     config_var_registry.register(ConfigVariableEventConsoleHistoryLifetime)
     config_var_registry.register(ConfigVariableEventConsoleSocketQueueLength)
     config_var_registry.register(ConfigVariableEventConsoleEventSocketQueueLength)
+    config_var_registry.register(ConfigVariableEventConsoleMessageBatchSize)
     config_var_registry.register(ConfigVariableEventConsoleTranslateSNMPTraps)
     config_var_registry.register(ConfigVariableEventConsoleSNMPCredentials)
     config_var_registry.register(ConfigVariableEventConsoleDebugRules)
@@ -4567,6 +4568,33 @@ class ConfigVariableEventConsoleEventSocketQueueLength(ConfigVariable):
         )
 
 
+class ConfigVariableEventConsoleMessageBatchSize(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupEventConsoleGeneric
+
+    def domain(self) -> type[ABCConfigDomain]:
+        return ConfigDomainEventConsole
+
+    def ident(self) -> str:
+        return "message_batch_size"
+
+    def valuespec(self) -> ValueSpec:
+        return Integer(
+            title=_("Batch size for incoming messages"),
+            help=_(
+                "Under high load (e.g. syslog storms) the Event Console can read "
+                "many messages from the UDP syslog and SNMP trap sockets at once and "
+                "process them as a batch. Entries to the event history are then "
+                "written once per batch. This setting defines the maximum number of "
+                "messages read from a socket and processed in one batch. A value of "
+                "1 processes every message on its own."
+            ),
+            minvalue=1,
+            label="max.",
+            unit=_("messages"),
+        )
+
+
 class ConfigVariableEventConsoleTranslateSNMPTraps(ConfigVariable):
     def group(self) -> type[ConfigVariableGroup]:
         return ConfigVariableGroupEventConsoleSNMP
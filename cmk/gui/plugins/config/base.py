@@ -634,6 +634,8 @@ class CREConfig:
 
     # new in 2.1
     config_storage_format: Literal["standard", "raw", "pickle"] = "pickle"
+    # Keep the hosts of all folders in one indexed database (tmp/check_mk/wato)
+    wato_use_hosts_database: bool = False
 
     # Development tools
 
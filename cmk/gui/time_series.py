@@ -4,13 +4,17 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 from collections.abc import Callable, Iterator, Sequence
-from statistics import fmean
+
+import numpy as np
+import numpy.typing as npt
 
 Timestamp = int
 
 TimeWindow = tuple[Timestamp, Timestamp, int]
 TimeSeriesValue = float | None
 TimeSeriesValues = Sequence[TimeSeriesValue]
+# Missing values are NaN
+TimeSeriesArray = npt.NDArray[np.float64]
 
 
 def rrd_timestamps(time_window: TimeWindow) -> list[Timestamp]:
@@ -18,24 +22,50 @@ def rrd_timestamps(time_window: TimeWindow) -> list[Timestamp]:
     return [] if step == 0 else [t + step for t in range(start, end, step)]
 
 
+def _timestamps(time_window: TimeWindow) -> npt.NDArray[np.int64]:
+    """Like rrd_timestamps"""
+    start, end, step = time_window
+    if step == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.arange(start, end, step, dtype=np.int64) + step
+
+
+def to_array(values: TimeSeriesValues | TimeSeriesArray) -> TimeSeriesArray:
+    """Values as array, None becomes NaN"""
+    return np.array(values, dtype=np.float64)
+
+
+def to_values(array: TimeSeriesArray) -> list[TimeSeriesValue]:
+    """Array as values, NaN becomes None"""
+    values: list[TimeSeriesValue] = array.tolist()
+    for index in np.flatnonzero(np.isnan(array)).tolist():
+        values[index] = None
+    return values
+
+
+def _check_aggregation(aggr: str | None) -> str:
+    aggr = "max" if aggr is None else aggr.lower()
+    if aggr not in ("average", "max", "min"):
+        raise ValueError(f"Invalid Aggregation function {aggr}, only max, min, average allowed")
+    return aggr
+
+
 def aggregation_functions(series: TimeSeriesValues, aggr: str | None) -> TimeSeriesValue:
     """Aggregate data in series list according to aggr
 
     If series has None values they are dropped before aggregation"""
-    cleaned_series = [x for x in series if x is not None]
-    if not cleaned_series:
+    array = to_array(series)
+    cleaned_series = array[~np.isnan(array)]
+    if not cleaned_series.size:
         return None
 
-    aggr = "max" if aggr is None else aggr.lower()
-    match aggr:
+    match _check_aggregation(aggr):
         case "average":
-            return fmean(cleaned_series)
+            return float(cleaned_series.mean())
         case "max":
-            return max(cleaned_series)
-        case "min":
-            return min(cleaned_series)
+            return float(cleaned_series.max())
         case _:
-            raise ValueError(f"Invalid Aggregation function {aggr}, only max, min, average allowed")
+            return float(cleaned_series.min())
 
 
 class TimeSeries:
@@ -47,6 +77,9 @@ class TimeSeries:
     - The Series describes the interval [start; end[
     - Start has no associated value to it.
 
+    The values are kept in a float array with NaN for the missing values
+    (`array`), `values` is the list of them with None for the missing values.
+
     args:
         data : list
             Includes [start, end, step, *values]
@@ -59,22 +92,34 @@ class TimeSeries:
 
     def __init__(
         self,
-        data: TimeSeriesValues,
+        data: TimeSeriesValues | TimeSeriesArray,
         time_window: TimeWindow | None = None,
-        conversion: Callable[[float], float] = lambda v: v,
+        conversion: Callable[[float], float] | None = None,
     ) -> None:
         if time_window is None:
-            if not data or data[0] is None or data[1] is None or data[2] is None:
+            if len(data) < 3 or any(v is None or np.isnan(v) for v in data[:3]):
                 raise ValueError(data)
 
-            time_window = int(data[0]), int(data[1]), int(data[2])
+            time_window = int(data[0]), int(data[1]), int(data[2])  # type: ignore[arg-type]
             data = data[3:]
 
         assert time_window is not None
         self.start = int(time_window[0])
         self.end = int(time_window[1])
         self.step = int(time_window[2])
-        self.values = [v if v is None else conversion(v) for v in data]
+        self.array = to_array(data)
+        if conversion is not None:
+            valid = ~np.isnan(self.array)
+            self.array[valid] = [conversion(v) for v in self.array[valid].tolist()]
+
+    @property
+    def values(self) -> list[TimeSeriesValue]:
+        """A copy of the values, changes have to be assigned"""
+        return to_values(self.array)
+
+    @values.setter
+    def values(self, values: TimeSeriesValues | TimeSeriesArray) -> None:
+        self.array = to_array(values)
 
     @property
     def twindow(self) -> TimeWindow:
@@ -88,13 +133,15 @@ class TimeSeries:
         """
         if twindow == self.twindow:
             return self.values
+        return to_values(self.forward_fill_resample_array(twindow))
 
-        idx_max = len(self.values) - 1
+    def forward_fill_resample_array(self, twindow: TimeWindow) -> TimeSeriesArray:
+        """Like forward_fill_resample, but returns the array"""
+        if twindow == self.twindow:
+            return self.array
 
-        return [
-            self.values[max(0, min(int((t - self.start) / self.step), idx_max))]
-            for t in range(*twindow)
-        ]
+        indices = np.trunc((np.arange(*twindow) - self.start) / self.step).astype(np.int64)
+        return self.array[np.clip(indices, 0, len(self.array) - 1)]
 
     def downsample(self, twindow: TimeWindow, cf: str | None = "max") -> TimeSeriesValues:
         """Downsample time series by consolidation function
@@ -106,24 +153,38 @@ class TimeSeries:
         """
         if twindow == self.twindow:
             return self.values
+        return to_values(self.downsample_array(twindow, cf))
 
-        dwsa = []
-        co: list[TimeSeriesValue] = []
-        desired_times = rrd_timestamps(twindow)
-        i = 0
-        for t, val in self.time_data_pairs():
-            if t > desired_times[i]:
-                dwsa.append(aggregation_functions(co, cf))
-                co = []
-                i += 1
-            co.append(val)
-
-        diff_len = len(desired_times) - len(dwsa)
-        if diff_len > 0:
-            dwsa.append(aggregation_functions(co, cf))
-            dwsa += [None] * (diff_len - 1)
-
-        return dwsa
+    def downsample_array(self, twindow: TimeWindow, cf: str | None = "max") -> TimeSeriesArray:
+        """Like downsample, but returns the array"""
+        if twindow == self.twindow:
+            return self.array
+
+        cf = _check_aggregation(cf)
+        desired_times = _timestamps(twindow)
+        result = np.full(len(desired_times), np.nan)
+
+        times = _timestamps(self.twindow)[: len(self.array)]
+        values = self.array[: len(times)]
+        # Each value goes to the first desired time not before its own time, values after the
+        # last desired time are dropped
+        buckets = np.searchsorted(desired_times, times)
+        valid = ~np.isnan(values) & (buckets < len(desired_times))
+        buckets, values = buckets[valid], values[valid]
+        if not buckets.size:
+            return result
+
+        # The buckets are sorted, so the values of a bucket are consecutive
+        starts = np.flatnonzero(np.diff(buckets, prepend=-1))
+        match cf:
+            case "average":
+                consolidated = np.add.reduceat(values, starts) / np.diff(starts, append=len(values))
+            case "max":
+                consolidated = np.maximum.reduceat(values, starts)
+            case _:
+                consolidated = np.minimum.reduceat(values, starts)
+        result[buckets[starts]] = consolidated
+        return result
 
     def time_data_pairs(self) -> list[tuple[Timestamp, TimeSeriesValue]]:
         return list(zip(rrd_timestamps(self.twindow), self.values))
@@ -139,17 +200,20 @@ class TimeSeries:
             self.start == other.start
             and self.end == other.end
             and self.step == other.step
-            and self.values == other.values
+            and np.array_equal(self.array, other.array, equal_nan=True)
         )
 
     def __getitem__(self, i: int) -> TimeSeriesValue:
-        return self.values[i]
+        value = float(self.array[i])
+        return None if np.isnan(value) else value
 
     def __len__(self) -> int:
-        return len(self.values)
+        return len(self.array)
 
     def __iter__(self) -> Iterator[TimeSeriesValue]:
         yield from self.values
 
     def count(self, /, v: TimeSeriesValue) -> int:
-        return self.values.count(v)
+        if v is None:
+            return int(np.count_nonzero(np.isnan(self.array)))
+        return int(np.count_nonzero(self.array == v))
@@ -186,6 +186,7 @@ def register(
     config_variable_registry.register(ConfigVariableHideHelpInLists)
     config_variable_registry.register(ConfigVariableWATOUseGit)
     config_variable_registry.register(ConfigVariableWATOPrettyPrintConfig)
+    config_variable_registry.register(ConfigVariableWATOUseHostsDatabase)
     config_variable_registry.register(ConfigVariableWATOHideFoldersWithoutReadPermissions)
     config_variable_registry.register(ConfigVariableWATOIconCategories)
     config_variable_group_registry.register(ConfigVariableGroupUserManagement)
@@ -202,6 +203,8 @@ def register(
     config_variable_group_registry.register(ConfigVariableGroupCheckExecution)
     config_variable_registry.register(ConfigVariableUseNewDescriptionsFor)
     config_variable_registry.register(ConfigVariableTCPConnectTimeout)
+    config_variable_registry.register(ConfigVariableMaxConcurrentFetches)
+    config_variable_registry.register(ConfigVariableFileCacheCompression)
     config_variable_registry.register(ConfigVariableSimulationMode)
     config_variable_registry.register(ConfigVariableRestartLocking)
     config_variable_registry.register(ConfigVariableDelayPrecompile)
@@ -2397,6 +2400,29 @@ class ConfigVariableWATOPrettyPrintConfig(ConfigVariable):
         )
 
 
+class ConfigVariableWATOUseHostsDatabase(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupWATO
+
+    def domain(self) -> type[ABCConfigDomain]:
+        return ConfigDomainGUI
+
+    def ident(self) -> str:
+        return "wato_use_hosts_database"
+
+    def valuespec(self) -> ValueSpec:
+        return Checkbox(
+            title=_("Use a database for the hosts of all folders"),
+            label=_("keep the hosts of all folders in one database"),
+            help=_(
+                "When enabled, Setup keeps a copy of the hosts files of all folders in one "
+                "indexed database. This speeds up loading the hosts of big folder trees and "
+                "looking up single hosts. The hosts files stay the source of truth: Changes "
+                "made to them outside of Setup are detected and read again."
+            ),
+        )
+
+
 class ConfigVariableWATOHideFoldersWithoutReadPermissions(ConfigVariable):
     def group(self) -> type[ConfigVariableGroup]:
         return ConfigVariableGroupWATO
@@ -2996,6 +3022,58 @@ class ConfigVariableTCPConnectTimeout(ConfigVariable):
         )
 
 
+class ConfigVariableMaxConcurrentFetches(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupCheckExecution
+
+    def domain(self) -> type[ABCConfigDomain]:
+        return ConfigDomainCore
+
+    def ident(self) -> str:
+        return "max_concurrent_fetches"
+
+    def valuespec(self) -> ValueSpec:
+        return Integer(
+            title=_("Concurrent data source fetching"),
+            help=_(
+                "The maximum number of data sources of a host that are fetched at the same "
+                "time, e.g. the agent, the management board and special agents. With the "
+                "default of 1 the data sources are fetched one after another. Fetching them "
+                "concurrently makes the checking of a host only wait for its slowest data "
+                "source."
+            ),
+            minvalue=1,
+            maxvalue=32,
+        )
+
+
+class ConfigVariableFileCacheCompression(ConfigVariable):
+    def group(self) -> type[ConfigVariableGroup]:
+        return ConfigVariableGroupCheckExecution
+
+    def domain(self) -> type[ABCConfigDomain]:
+        return ConfigDomainCore
+
+    def ident(self) -> str:
+        return "file_cache_compression"
+
+    def valuespec(self) -> ValueSpec:
+        return DropdownChoice(
+            title=_("Compression of the data source cache files"),
+            help=_(
+                "The output of the agents and the SNMP data of the hosts are kept in cache "
+                "files. Compressing these files saves disk space and I/O at the cost of some "
+                "CPU time for writing and reading them. Cache files written with another "
+                "setting are still read."
+            ),
+            choices=[
+                ("none", _("No compression")),
+                ("zlib", _("zlib (fast)")),
+                ("lzma", _("lzma (smallest files)")),
+            ],
+        )
+
+
 class ConfigVariableSimulationMode(ConfigVariable):
     def group(self) -> type[ConfigVariableGroup]:
         return ConfigVariableGroupCheckExecution
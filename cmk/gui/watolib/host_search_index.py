@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Index of the effective host attributes for the host search
+
+Searching hosts needs the effective attributes of every host, which means
+loading every hosts file and computing the inheritance of every host.  The
+index keeps the effective values of the commonly searched attributes per
+folder.
+
+Each folder entry carries a key made of the stat keys of the files the values
+were computed from: the hosts file of the folder and the folder files of the
+folder and its parents.  A save of hosts or folders changes these files, so
+exactly the affected folders are indexed again on the next search.
+"""
+
+from __future__ import annotations
+
+import pickle
+from collections.abc import Container, Mapping
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.ccc import store
+
+__all__ = ["FolderKey", "HostSearchIndex", "INDEXED_ATTRIBUTES", "is_indexed", "stat_key"]
+
+# Besides the host name and the tag attributes (tag_*)
+INDEXED_ATTRIBUTES = frozenset({"alias", "ipaddress", "ipv6address", "labels", "site"})
+
+_VERSION = 1
+
+StatKey = tuple[int, int, int] | None
+FolderKey = tuple[StatKey, ...]
+
+
+def stat_key(path: Path | str) -> StatKey:
+    try:
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def is_indexed(attribute_name: str) -> bool:
+    return attribute_name in INDEXED_ATTRIBUTES or attribute_name.startswith("tag_")
+
+
+class _IndexedFolder(NamedTuple):
+    key: FolderKey
+    hosts: Mapping[HostName, Mapping[str, Any]]
+
+
+class HostSearchIndex:
+    def __init__(self, path: Path, global_key: FolderKey) -> None:
+        """The global key covers everything all folders depend on, e.g. the tag config"""
+        self.path = path
+        self._global_key = (_VERSION, global_key)
+        self._folders: dict[str, _IndexedFolder] | None = None
+        self._modified = False
+
+    def _load(self) -> dict[str, _IndexedFolder]:
+        if self._folders is None:
+            try:
+                global_key, folders = pickle.loads(self.path.read_bytes())
+            except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+                global_key, folders = None, {}
+            self._folders = folders if global_key == self._global_key else {}
+        return self._folders
+
+    def folder(
+        self, folder_path: str, key: FolderKey
+    ) -> Mapping[HostName, Mapping[str, Any]] | None:
+        """The indexed hosts of the folder, None if the folder is not indexed or outdated"""
+        if (entry := self._load().get(folder_path)) is None or entry.key != key:
+            return None
+        return entry.hosts
+
+    def update_folder(
+        self, folder_path: str, key: FolderKey, hosts: Mapping[HostName, Mapping[str, Any]]
+    ) -> None:
+        self._load()[folder_path] = _IndexedFolder(
+            key,
+            {
+                host_name: {name: value for name, value in attributes.items() if is_indexed(name)}
+                for host_name, attributes in hosts.items()
+            },
+        )
+        self._modified = True
+
+    def retain(self, folder_paths: Container[str]) -> None:
+        """Forget the folders which no longer exist"""
+        folders = self._load()
+        for folder_path in [p for p in folders if p not in folder_paths]:
+            del folders[folder_path]
+            self._modified = True
+
+    def save(self) -> None:
+        if not self._modified:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        store.save_bytes_to_file(self.path, pickle.dumps((self._global_key, self._load())))
+        self._modified = False
@@ -86,6 +86,8 @@ from cmk.gui.watolib.host_attributes import (
     HostContactGroupSpec,
     MetaData,
 )
+from cmk.gui.watolib.host_search_index import FolderKey, HostSearchIndex, is_indexed, stat_key
+from cmk.gui.watolib.hosts_database import FolderHosts, hosts_file_stat_key, HostsDatabase
 from cmk.gui.watolib.objref import ObjectRef, ObjectRefType
 from cmk.gui.watolib.predefined_conditions import PredefinedConditionStore
 from cmk.gui.watolib.search import (
@@ -98,6 +100,7 @@ from cmk.gui.watolib.sidebar_reload import need_sidebar_reload
 from cmk.gui.watolib.utils import (
     get_value_formatter,
     host_attribute_matches,
+    multisite_dir,
     rename_host_in_list,
     wato_root_dir,
 )
@@ -1045,6 +1048,27 @@ def folder_lookup_cache() -> FolderLookupCache:
     return g.folder_lookup_cache
 
 
+def host_search_index() -> HostSearchIndex:
+    if "host_search_index" not in g:
+        g.host_search_index = HostSearchIndex(
+            Path(cmk.utils.paths.tmp_dir, "wato", "host_search_index.pkl"),
+            # The default values of the tag groups go into the effective attributes
+            (stat_key(Path(multisite_dir(), "tags.mk")),),
+        )
+    return g.host_search_index
+
+
+def hosts_database() -> HostsDatabase | None:
+    """The consolidated hosts database, if enabled"""
+    if not active_config.wato_use_hosts_database:
+        return None
+    if "wato_hosts_database" not in g:
+        g.wato_hosts_database = HostsDatabase(
+            Path(cmk.utils.paths.tmp_dir, "wato", "hosts_database.sqlite")
+        )
+    return g.wato_hosts_database
+
+
 @request_memoize()
 def folder_from_request(var_folder: str | None = None, host_name: str | None = None) -> Folder:
     """
@@ -1290,14 +1314,37 @@ class Folder(FolderProtocol):
         return variables
 
     def _load_wato_hosts(self) -> WATOHosts | None:
+        database = hosts_database()
+        stat_key = None if database is None else hosts_file_stat_key(Path(self.hosts_file_path()))
+        if database is not None and stat_key is not None:
+            if (folder_hosts := database.load_folder(self.path(), stat_key)) is not None:
+                return WATOHosts(
+                    locked=folder_hosts.locked,
+                    host_attributes=folder_hosts.host_attributes,
+                    all_hosts=list(folder_hosts.all_hosts),
+                    clusters={k: list(v) for k, v in folder_hosts.clusters.items()},
+                )
+
         if (variables := self._load_hosts_file()) is None:
             return None
-        return WATOHosts(
+        wato_hosts = WATOHosts(
             locked=variables["_lock"],
             host_attributes=variables["host_attributes"],
             all_hosts=variables["all_hosts"],
             clusters=variables["clusters"],
         )
+        if database is not None and stat_key is not None:
+            database.save_folder(
+                self.path(),
+                stat_key,
+                FolderHosts(
+                    locked=wato_hosts["locked"],
+                    host_attributes=wato_hosts["host_attributes"],
+                    all_hosts=wato_hosts["all_hosts"],
+                    clusters=wato_hosts["clusters"],
+                ),
+            )
+        return wato_hosts
 
     def save_hosts(self) -> None:
         self.need_unlocked_hosts()
@@ -1322,6 +1369,8 @@ class Folder(FolderProtocol):
         if not self.has_hosts() and not exposed_folder_attributes_for_base:
             for storage in get_all_storage_readers():
                 storage.remove(Path(self.hosts_file_path_without_extension()))
+            if (database := hosts_database()) is not None:
+                database.remove_folder(self.path())
             return
 
         all_hosts: list[HostName] = []
@@ -1449,6 +1498,20 @@ class Folder(FolderProtocol):
                 get_value_formatter(),
             )
 
+        if (database := hosts_database()) is not None and (
+            stat_key := hosts_file_stat_key(Path(self.hosts_file_path()))
+        ) is not None:
+            database.save_folder(
+                self.path(),
+                stat_key,
+                FolderHosts(
+                    locked=False,
+                    host_attributes=cleaned_hosts,
+                    all_hosts=all_hosts,
+                    clusters=clusters,
+                ),
+            )
+
     def _folder_attributes_for_base_config(self) -> dict[str, FolderAttributesForBase]:
         # TODO:
         # At this time, this is the only attribute there is, at it only exists in the CEE.
@@ -2210,6 +2273,8 @@ class Folder(FolderProtocol):
         )
         del self._subfolders[name]
         shutil.rmtree(subfolder.filesystem_path())
+        if (database := hosts_database()) is not None:
+            database.remove_folder_tree(subfolder.path())
         folder_tree().invalidate_caches()
         need_sidebar_reload()
         folder_lookup_cache().delete()
@@ -2254,6 +2319,8 @@ class Folder(FolderProtocol):
         affected_sites = subfolder.all_site_ids()
         old_filesystem_path = subfolder.filesystem_path()
         shutil.move(old_filesystem_path, target_folder.filesystem_path())
+        if (database := hosts_database()) is not None:
+            database.remove_folder_tree(subfolder.path())
 
         folder_tree().invalidate_caches()
 
@@ -2971,37 +3038,66 @@ class SearchFolder(FolderProtocol):
         ]
 
     def _search_hosts_recursively(self, in_folder: Folder) -> dict[HostName, Host]:
-        hosts = self._search_hosts(in_folder)
+        index = host_search_index()
+        parent_key = tuple(
+            stat_key(folder.wato_info_path()) for folder in parent_folder_chain(in_folder)
+        )
+        hosts = self._search_hosts_indexed(in_folder, index, parent_key)
+        if in_folder.is_root():
+            index.retain(self.tree.all_folders())
+        index.save()
+        return hosts
+
+    def _search_hosts_indexed(
+        self, in_folder: Folder, index: HostSearchIndex, parent_key: FolderKey
+    ) -> dict[HostName, Host]:
+        folder_key = (*parent_key, stat_key(in_folder.wato_info_path()))
+        hosts = self._search_hosts(in_folder, index, folder_key)
         for subfolder in in_folder.subfolders():
-            hosts.update(self._search_hosts_recursively(subfolder))
+            hosts.update(self._search_hosts_indexed(subfolder, index, folder_key))
         return hosts
 
-    def _search_hosts(self, in_folder: Folder) -> dict[HostName, Host]:
+    def _search_hosts(
+        self, in_folder: Folder, index: HostSearchIndex, folder_key: FolderKey
+    ) -> dict[HostName, Host]:
         if not in_folder.permissions.may("read"):
             return {}
 
+        # The effective attributes depend on the hosts file and the folder files of the chain
+        key = (*folder_key, stat_key(in_folder.hosts_file_path()))
+        if (indexed_hosts := index.folder(in_folder.path(), key)) is None:
+            indexed_hosts = {
+                host_name: host.effective_attributes()
+                for host_name, host in in_folder.hosts().items()
+            }
+            index.update_folder(in_folder.path(), key, indexed_hosts)
+
+        criteria = [
+            (attr, self._criteria[attr.name()])
+            for attr in host_attribute_registry.attributes()
+            if attr.name() in self._criteria
+        ]
         found = {}
-        for host_name, host in in_folder.hosts().items():
+        for host_name, indexed in indexed_hosts.items():
             if self._criteria[".name"] and not host_attribute_matches(
                 self._criteria[".name"], host_name
             ):
                 continue
 
-            # Compute inheritance
-            effective = host.effective_attributes()
-
-            # Check attributes
-            dont_match = False
-            for attr in host_attribute_registry.attributes():
+            # Only the attributes missing in the index need the inheritance computed
+            effective: Mapping[str, Any] | None = None
+            for attr, crit in criteria:
                 attrname = attr.name()
-                if attrname in self._criteria and not attr.filter_matches(
-                    self._criteria[attrname], effective.get(attrname), host_name
-                ):
-                    dont_match = True
+                if is_indexed(attrname):
+                    value = indexed.get(attrname)
+                else:
+                    if effective is None:
+                        effective = in_folder.load_host(host_name).effective_attributes()
+                    value = effective.get(attrname)
+                if not attr.filter_matches(crit, value, host_name):
                     break
-
-            if not dont_match:
-                found[host_name] = host
+            else:
+                found[host_name] = in_folder.load_host(host_name)
 
         return found
 
@@ -3034,6 +3130,13 @@ class Host:
 
     @staticmethod
     def host(host_name: HostName) -> Host | None:
+        if (database := hosts_database()) is not None:
+            tree = folder_tree()
+            for folder_path in database.folders_of_host(host_name):
+                if tree.folder_exists(folder_path) and (
+                    host := tree.folder(folder_path).host(host_name)
+                ):
+                    return host
         return folder_lookup_cache().get(host_name)
 
     @staticmethod
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Consolidated copy of the hosts files of all Setup folders
+
+Loading the hosts of a big folder tree means reading thousands of hosts files.
+This database keeps their content in one SQLite file, indexed by folder and by
+host name.
+
+The hosts files stay the source of truth.  Every folder entry records the
+size, modification time and inode of the hosts file it was read from.  Entries
+of changed files (e.g. edited outside of the GUI) are not used, the file is
+read again and the entry replaced.
+"""
+
+from __future__ import annotations
+
+import pickle
+import sqlite3
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import NamedTuple
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.gui.watolib.host_attributes import HostAttributes
+
+__all__ = ["FolderHosts", "hosts_file_stat_key", "HostsDatabase", "StatKey"]
+
+StatKey = tuple[int, int, int]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    path TEXT PRIMARY KEY,
+    stat_key TEXT NOT NULL,
+    locked BLOB NOT NULL,
+    all_hosts BLOB NOT NULL,
+    clusters BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hosts (
+    folder TEXT NOT NULL REFERENCES folders(path) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    attributes BLOB NOT NULL,
+    PRIMARY KEY (folder, name)
+);
+CREATE INDEX IF NOT EXISTS hosts_by_name ON hosts(name);
+"""
+
+
+class FolderHosts(NamedTuple):
+    locked: bool
+    host_attributes: Mapping[HostName, HostAttributes]
+    all_hosts: Sequence[HostName]
+    clusters: Mapping[HostName, Sequence[HostName]]
+
+
+def hosts_file_stat_key(path: Path) -> StatKey | None:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+class HostsDatabase:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._connection: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def load_folder(self, folder_path: str, stat_key: StatKey) -> FolderHosts | None:
+        """The hosts of the folder, None if there is no entry for that hosts file"""
+        connection = self._connect()
+        row = connection.execute(
+            "SELECT stat_key, locked, all_hosts, clusters FROM folders WHERE path = ?",
+            (folder_path,),
+        ).fetchone()
+        if row is None or row[0] != _serialize_stat_key(stat_key):
+            return None
+        return FolderHosts(
+            locked=pickle.loads(row[1]),
+            host_attributes={
+                HostName(name): pickle.loads(attributes)
+                for name, attributes in connection.execute(
+                    "SELECT name, attributes FROM hosts WHERE folder = ?", (folder_path,)
+                )
+            },
+            all_hosts=pickle.loads(row[2]),
+            clusters=pickle.loads(row[3]),
+        )
+
+    def save_folder(self, folder_path: str, stat_key: StatKey, folder_hosts: FolderHosts) -> None:
+        with self._connect() as connection:
+            connection.execute("DELETE FROM folders WHERE path = ?", (folder_path,))
+            connection.execute(
+                "INSERT INTO folders VALUES (?, ?, ?, ?, ?)",
+                (
+                    folder_path,
+                    _serialize_stat_key(stat_key),
+                    pickle.dumps(folder_hosts.locked),
+                    pickle.dumps(list(folder_hosts.all_hosts)),
+                    pickle.dumps({k: list(v) for k, v in folder_hosts.clusters.items()}),
+                ),
+            )
+            connection.executemany(
+                "INSERT INTO hosts VALUES (?, ?, ?)",
+                (
+                    (folder_path, str(name), pickle.dumps(attributes))
+                    for name, attributes in folder_hosts.host_attributes.items()
+                ),
+            )
+
+    def remove_folder(self, folder_path: str) -> None:
+        with self._connect() as connection:
+            connection.execute("DELETE FROM folders WHERE path = ?", (folder_path,))
+
+    def remove_folder_tree(self, folder_path: str) -> None:
+        """Remove the folder and all of its subfolders"""
+        with self._connect() as connection:
+            connection.execute(
+                "DELETE FROM folders WHERE path = ? OR substr(path, 1, length(?) + 1) = ? || '/'",
+                (folder_path, folder_path, folder_path),
+            )
+
+    def folders_of_host(self, host_name: HostName) -> Sequence[str]:
+        """The folders having an entry of the host, usually only one
+
+        The entries may be outdated, the caller has to check the folders.
+        """
+        return [
+            folder
+            for (folder,) in self._connect().execute(
+                "SELECT folder FROM hosts WHERE name = ?", (str(host_name),)
+            )
+        ]
+
+
+def _serialize_stat_key(stat_key: StatKey) -> str:
+    return " ".join(map(str, stat_key))
@@ -5,22 +5,30 @@
 
 from ._storage import (
     cleanup_piggyback_files,
+    CleanupReport,
     get_piggyback_raw_data,
     get_piggybacked_host_with_sources,
+    get_storage_layout,
+    migrate_storage_layout,
     move_for_host_rename,
     PiggybackFileInfo,
     PiggybackRawDataInfo,
     remove_source_status_file,
+    StorageLayout,
     store_piggyback_raw_data,
 )
 
 __all__ = [
     "cleanup_piggyback_files",
+    "CleanupReport",
     "get_piggybacked_host_with_sources",
     "get_piggyback_raw_data",
+    "get_storage_layout",
+    "migrate_storage_layout",
     "PiggybackFileInfo",
     "PiggybackRawDataInfo",
     "remove_source_status_file",
+    "StorageLayout",
     "store_piggyback_raw_data",
     "move_for_host_rename",
 ]
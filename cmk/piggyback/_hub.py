@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Protocol and client of the piggyback hub
+
+The piggyback hub (see cmk.piggyback_hub) keeps the latest payload of every
+(source, piggybacked host) pair in memory. The files in tmp/check_mk remain
+the persistent storage: writers keep writing them and additionally push the
+payloads to the hub, without waiting for it. Once the hub has loaded the files,
+it knows the sources and timestamps of all payloads, so readers only read the
+files if the hub is not running or still loading.
+
+Every message is a frame of a 4 byte length followed by a command byte and
+the command specific body. All strings and byte strings are length prefixed.
+"""
+
+import enum
+import logging
+import math
+import socket
+import struct
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from typing import Final
+
+from cmk.utils.hostaddress import HostName
+from cmk.utils.paths import piggyback_hub_socket
+
+logger = logging.getLogger(__name__)
+
+_TIMEOUT: Final = 5.0
+_LENGTH: Final = struct.Struct("!I")
+_TIMESTAMP: Final = struct.Struct("!d")
+
+
+class Command(enum.Enum):
+    STORE = b"S"
+    GET = b"G"
+    REMOVE_SOURCE = b"R"
+    CLEANUP = b"C"
+    RELOAD = b"L"
+    OK = b"K"
+    LOADING = b"W"
+
+
+@dataclass(frozen=True)
+class HubPayload:
+    source: HostName
+    last_update: float
+    last_contact: float | None
+    payload: bytes
+
+
+class Encoder:
+    def __init__(self, command: Command) -> None:
+        self._chunks = [command.value]
+
+    def timestamp(self, value: float | None) -> "Encoder":
+        self._chunks.append(_TIMESTAMP.pack(math.nan if value is None else value))
+        return self
+
+    def count(self, value: int) -> "Encoder":
+        self._chunks.append(_LENGTH.pack(value))
+        return self
+
+    def blob(self, value: bytes) -> "Encoder":
+        self._chunks += [_LENGTH.pack(len(value)), value]
+        return self
+
+    def text(self, value: str) -> "Encoder":
+        return self.blob(value.encode("utf-8"))
+
+    def frame(self) -> bytes:
+        body = b"".join(self._chunks)
+        return _LENGTH.pack(len(body)) + body
+
+
+class Decoder:
+    def __init__(self, body: bytes) -> None:
+        self.command = Command(body[:1])
+        self._body = memoryview(body)
+        self._offset = 1
+
+    def timestamp(self) -> float | None:
+        (value,) = _TIMESTAMP.unpack_from(self._body, self._offset)
+        self._offset += _TIMESTAMP.size
+        return None if math.isnan(value) else value
+
+    def count(self) -> int:
+        (value,) = _LENGTH.unpack_from(self._body, self._offset)
+        self._offset += _LENGTH.size
+        return value
+
+    def blob(self) -> bytes:
+        length = self.count()
+        value = self._body[self._offset : self._offset + length].tobytes()
+        self._offset += length
+        return value
+
+    def text(self) -> str:
+        return self.blob().decode("utf-8")
+
+
+def encode_store(source: HostName, payloads: Mapping[HostName, bytes], timestamp: float) -> bytes:
+    encoder = Encoder(Command.STORE).text(source).timestamp(timestamp).count(len(payloads))
+    for piggybacked_hostname, payload in payloads.items():
+        encoder.text(piggybacked_hostname).blob(payload)
+    return encoder.frame()
+
+
+def encode_payloads(payloads: Iterable[HubPayload]) -> bytes:
+    payloads = list(payloads)
+    encoder = Encoder(Command.OK).count(len(payloads))
+    for p in payloads:
+        encoder.text(p.source).timestamp(p.last_update).timestamp(p.last_contact).blob(p.payload)
+    return encoder.frame()
+
+
+def decode_payloads(decoder: Decoder) -> Sequence[HubPayload]:
+    payloads = []
+    for _index in range(decoder.count()):
+        source = HostName(decoder.text())
+        last_update = decoder.timestamp()
+        last_contact = decoder.timestamp()
+        payloads.append(
+            HubPayload(
+                source=source,
+                last_update=0.0 if last_update is None else last_update,
+                last_contact=last_contact,
+                payload=decoder.blob(),
+            )
+        )
+    return payloads
+
+
+def receive_frame(sock: socket.socket) -> Decoder | None:
+    """Receive the next frame, None if the peer closed the connection"""
+    if not (header := _receive_exactly(sock, _LENGTH.size)):
+        return None
+    (length,) = _LENGTH.unpack(header)
+    if len(body := _receive_exactly(sock, length)) != length or not length:
+        raise ConnectionError("incomplete piggyback hub message")
+    return Decoder(body)
+
+
+def _receive_exactly(sock: socket.socket, length: int) -> bytes:
+    chunks = []
+    while length:
+        if not (chunk := sock.recv(min(length, 1024 * 1024))):
+            break
+        chunks.append(chunk)
+        length -= len(chunk)
+    return b"".join(chunks)
+
+
+def _request(frame: bytes) -> Decoder | None:
+    """Send a request to the hub and return the response
+
+    Returns None if the hub is not available. The hub is an optional cache, so
+    callers must fall back to the files in that case.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(_TIMEOUT)
+            sock.connect(str(piggyback_hub_socket))
+            sock.sendall(frame)
+            return receive_frame(sock)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return None  # hub is not running
+    except (OSError, ValueError, struct.error) as e:
+        logger.debug("Communication with the piggyback hub failed: %s", e)
+        return None
+
+
+def _send(frame: bytes) -> None:
+    """Send a message to the hub which is not answered"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(_TIMEOUT)
+            sock.connect(str(piggyback_hub_socket))
+            sock.sendall(frame)
+    except (FileNotFoundError, ConnectionRefusedError):
+        pass  # hub is not running, it loads the files when it starts
+    except OSError as e:
+        logger.debug("Communication with the piggyback hub failed: %s", e)
+
+
+def send_payloads(source: HostName, payloads: Mapping[HostName, bytes], timestamp: float) -> None:
+    _send(encode_store(source, payloads, timestamp))
+
+
+def get_payloads(piggybacked_hostname: HostName) -> Sequence[HubPayload] | None:
+    """Return the cached payloads, None if the hub can not answer or is still loading"""
+    if (response := _request(Encoder(Command.GET).text(piggybacked_hostname).frame())) is None:
+        return None
+    return decode_payloads(response) if response.command is Command.OK else None
+
+
+def remove_source(source: HostName) -> None:
+    _request(Encoder(Command.REMOVE_SOURCE).text(source).frame())
+
+
+def cleanup(cut_off_timestamp: float) -> None:
+    _request(Encoder(Command.CLEANUP).timestamp(cut_off_timestamp).frame())
+
+
+def reload() -> None:
+    _request(Encoder(Command.RELOAD).frame())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Single file per source storage of piggybacked payloads
+
+Instead of one file per (piggybacked host, source) pair, all payloads one source
+sent for its piggybacked hosts are stored in a single segment file:
+
+    tmp/check_mk/piggyback_segments/SOURCE
+
+The file starts with a small header, followed by a fixed size index record for
+each piggybacked host (sorted by host name), followed by the host names and
+the payloads. Readers mmap the file and bisect the index, so looking up the
+payload of one piggybacked host costs one open() regardless of the number of
+hosts the source sends data for.
+"""
+
+import bisect
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final, Self
+
+from cmk.utils.hostaddress import HostName
+
+_MAGIC: Final = b"CMKPBSG1"
+_HEADER: Final = struct.Struct("<8sI")
+# name offset, name length, payload offset, payload length, last update
+_RECORD: Final = struct.Struct("<QIQQd")
+_RECORD_NAME: Final = struct.Struct("<QI")
+
+
+@dataclass(frozen=True)
+class SegmentEntry:
+    last_update: float
+    payload: bytes
+
+
+class SegmentReader:
+    """Read only view on a segment file
+
+    An empty or truncated file (e.g. a lock file created for a source that has
+    never been stored) is treated as a segment without entries.
+    """
+
+    def __init__(self, data: mmap.mmap | bytes) -> None:
+        self._data = data
+        if len(data) < _HEADER.size:
+            self._count = 0
+            return
+        magic, count = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or len(data) < _HEADER.size + count * _RECORD.size:
+            raise ValueError("invalid piggyback segment")
+        self._count = count
+
+    @classmethod
+    def open(cls, path: Path) -> Self | None:
+        try:
+            with path.open("rb") as f:
+                try:
+                    return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                except ValueError:
+                    # mmap refuses empty files
+                    return cls(b"")
+        except FileNotFoundError:
+            return None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _record(self, index: int) -> tuple[int, int, int, int, float]:
+        return _RECORD.unpack_from(self._data, _HEADER.size + index * _RECORD.size)
+
+    def _name(self, index: int) -> bytes:
+        offset, length = _RECORD_NAME.unpack_from(self._data, _HEADER.size + index * _RECORD.size)
+        return self._data[offset : offset + length]
+
+    def _entry(self, index: int) -> SegmentEntry:
+        _name_offset, _name_length, offset, length, last_update = self._record(index)
+        return SegmentEntry(last_update=last_update, payload=self._data[offset : offset + length])
+
+    def lookup(self, piggybacked_hostname: HostName) -> SegmentEntry | None:
+        key = str(piggybacked_hostname).encode("utf-8")
+        index = bisect.bisect_left(range(self._count), key, key=self._name)
+        if index == self._count or self._name(index) != key:
+            return None
+        return self._entry(index)
+
+    def items(self) -> Iterator[tuple[HostName, SegmentEntry]]:
+        for index in range(self._count):
+            yield HostName(self._name(index).decode("utf-8")), self._entry(index)
+
+
+# Long running processes (like the keepalive helpers) look up many piggybacked
+# hosts. Keep the mapped segments as long as the files have not been replaced.
+_READER_CACHE: dict[Path, tuple[tuple[int, int, int], SegmentReader]] = {}
+
+
+def open_segment(path: Path) -> SegmentReader | None:
+    """Return a (possibly cached) reader of the current segment file"""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        _READER_CACHE.pop(path, None)
+        return None
+
+    version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    if (cached := _READER_CACHE.get(path)) is not None and cached[0] == version:
+        return cached[1]
+
+    if (reader := SegmentReader.open(path)) is not None:
+        _READER_CACHE[path] = (version, reader)
+    return reader
+
+
+def load_segment(path: Path) -> dict[HostName, SegmentEntry]:
+    """Return all entries of the segment, an empty dict if there is none"""
+    if (reader := SegmentReader.open(path)) is None:
+        return {}
+    return dict(reader.items())
+
+
+def serialize_segment(entries: Mapping[HostName, SegmentEntry]) -> bytes:
+    sorted_entries = sorted((str(h).encode("utf-8"), e) for h, e in entries.items())
+    names_offset = _HEADER.size + len(sorted_entries) * _RECORD.size
+    payloads_offset = names_offset + sum(len(n) for n, _e in sorted_entries)
+
+    header = [_HEADER.pack(_MAGIC, len(sorted_entries))]
+    names = []
+    payloads = []
+    for name, entry in sorted_entries:
+        header.append(
+            _RECORD.pack(
+                names_offset,
+                len(name),
+                payloads_offset,
+                len(entry.payload),
+                entry.last_update,
+            )
+        )
+        names.append(name)
+        payloads.append(entry.payload)
+        names_offset += len(name)
+        payloads_offset += len(entry.payload)
+
+    return b"".join((*header, *names, *payloads))
+
+
+def write_segment(path: Path, entries: Mapping[HostName, SegmentEntry]) -> None:
+    """Atomically replace the segment file, remove it if there are no entries"""
+    if not entries:
+        path.unlink(missing_ok=True)
+        return
+
+    path.parent.mkdir(mode=0o770, exist_ok=True, parents=True)
+    with tempfile.NamedTemporaryFile(
+        "wb", dir=str(path.parent), prefix=f".{path.name}.new", delete=False
+    ) as tmp:
+        tmp.write(serialize_segment(entries))
+    os.rename(tmp.name, str(path))
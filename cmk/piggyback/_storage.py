@@ -4,20 +4,28 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import datetime
+import enum
 import errno
 import json
 import logging
 import os
 import shutil
 import tempfile
-from collections.abc import Iterable, Mapping, Sequence
+import time
+from collections.abc import Iterable, Iterator, Mapping, Sequence
 from dataclasses import asdict, dataclass
+from multiprocessing.pool import ThreadPool
 from pathlib import Path
 from typing import NamedTuple, Self
 
+from cmk.ccc import store
+
 from cmk.utils.agentdatatype import AgentRawData
 from cmk.utils.hostaddress import HostAddress, HostName
-from cmk.utils.paths import piggyback_dir, piggyback_source_dir
+from cmk.utils.paths import piggyback_dir, piggyback_segments_dir, piggyback_source_dir
+
+from . import _hub
+from ._segments import load_segment, open_segment, SegmentEntry, SegmentReader, write_segment
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +56,20 @@ class PiggybackRawDataInfo(NamedTuple):
     raw_data: AgentRawData
 
 
+class StorageLayout(enum.StrEnum):
+    """How the piggybacked payloads are stored
+
+    DIRECTORY: one file per piggybacked host and source
+    SEGMENT: one indexed file per source, see `_segments.py`
+
+    Readers always consider both layouts, so switching the layout (and
+    migrating the data) can happen while the site is running.
+    """
+
+    DIRECTORY = "directory"
+    SEGMENT = "segment"
+
+
 # ***** Terminology *****
 # "piggybacked_host_folder":
 # - tmp/check_mk/piggyback/HOST
@@ -64,20 +86,67 @@ class PiggybackRawDataInfo(NamedTuple):
 # "source_hostname":
 # - Path(tmp/check_mk/piggyback/HOST/SOURCE).name
 # - Path(tmp/check_mk/piggyback_sources/SOURCE).name
+# - Path(tmp/check_mk/piggyback_segments/SOURCE).name
+#
+# "source_segment_file" (only in the segment layout):
+# - tmp/check_mk/piggyback_segments/SOURCE
 
 
-def get_piggyback_raw_data(piggybacked_hostname: HostAddress) -> Sequence[PiggybackRawDataInfo]:
+def get_piggyback_raw_data(
+    piggybacked_hostname: HostAddress, *, use_hub: bool = True
+) -> Sequence[PiggybackRawDataInfo]:
     """Returns the usable piggyback data for the given host
 
     A list of two element tuples where the first element is
     the source host name and the second element is the raw
     piggyback data (byte string)
+
+    If the piggyback hub is running and has loaded the files, it knows all
+    sources and their timestamps, so the data is taken from its in memory
+    cache. Otherwise it is read from disk.
     """
-    piggyback_file_infos = _get_payload_meta_data(piggybacked_hostname)
-    logger.debug("%s piggyback files for '%s'.", len(piggyback_file_infos), piggybacked_hostname)
+    if use_hub and (hub_payloads := _hub.get_payloads(piggybacked_hostname)) is not None:
+        piggyback_data = _get_piggyback_raw_data_from_hub(piggybacked_hostname, hub_payloads)
+        logger.debug(
+            "%s piggyback payloads for '%s' from hub.", len(piggyback_data), piggybacked_hostname
+        )
+        return piggyback_data
+
+    piggyback_data = _merge_layouts(
+        _get_piggyback_raw_data_from_files(piggybacked_hostname),
+        _get_piggyback_raw_data_from_segments(piggybacked_hostname),
+    )
+    logger.debug("%s piggyback payloads for '%s'.", len(piggyback_data), piggybacked_hostname)
+    return piggyback_data
 
+
+def _get_piggyback_raw_data_from_hub(
+    piggybacked_hostname: HostAddress, payloads: Sequence[_hub.HubPayload]
+) -> Sequence[PiggybackRawDataInfo]:
+    segment_layout = get_storage_layout() is StorageLayout.SEGMENT
+    return [
+        PiggybackRawDataInfo(
+            info=PiggybackFileInfo(
+                source=p.source,
+                file_path=(
+                    _get_source_segment_file_path(p.source)
+                    if segment_layout
+                    else _get_piggybacked_file_path(p.source, piggybacked_hostname)
+                ),
+                last_update=int(p.last_update),
+                last_contact=None if p.last_contact is None else int(p.last_contact),
+            ),
+            raw_data=AgentRawData(p.payload),
+        )
+        for p in payloads
+    ]
+
+
+def _get_piggyback_raw_data_from_files(
+    piggybacked_hostname: HostAddress,
+) -> Sequence[PiggybackRawDataInfo]:
     piggyback_data = []
-    for file_info in piggyback_file_infos:
+    for file_info in _get_payload_meta_data(piggybacked_hostname):
         try:
             # Raw data is always stored as bytes. Later the content is
             # converted to unicode in abstact.py:_parse_info which respects
@@ -93,12 +162,77 @@ def get_piggyback_raw_data(piggybacked_hostname: HostAddress) -> Sequence[Piggyb
     return piggyback_data
 
 
+def _get_piggyback_raw_data_from_segments(
+    piggybacked_hostname: HostAddress,
+) -> Sequence[PiggybackRawDataInfo]:
+    piggyback_data = []
+    for segment_file in _get_source_segment_files():
+        if (reader := _open_segment(segment_file)) is None:
+            continue
+        if (entry := reader.lookup(piggybacked_hostname)) is None:
+            continue
+
+        logger.debug("Read piggyback segment '%s'", segment_file)
+        source = HostAddress(segment_file.name)
+        piggyback_data.append(
+            PiggybackRawDataInfo(
+                info=PiggybackFileInfo(
+                    source=source,
+                    file_path=segment_file,
+                    last_update=int(entry.last_update),
+                    last_contact=_get_mtime(_get_source_status_file_path(source)),
+                ),
+                raw_data=AgentRawData(entry.payload),
+            )
+        )
+    return piggyback_data
+
+
+def _merge_layouts(
+    *layouts: Sequence[PiggybackRawDataInfo],
+) -> Sequence[PiggybackRawDataInfo]:
+    """Combine the data of both storage layouts
+
+    Usually only one of them holds data for a source. During a migration both
+    may, in which case the more recent payload wins.
+    """
+    merged: dict[HostName, PiggybackRawDataInfo] = {}
+    for raw_data_info in (rdi for layout in layouts for rdi in layout):
+        known = merged.get(raw_data_info.info.source)
+        if known is None or known.info.last_update < raw_data_info.info.last_update:
+            merged[raw_data_info.info.source] = raw_data_info
+    return [merged[source] for source in sorted(merged)]
+
+
 def get_piggybacked_host_with_sources() -> Mapping[HostAddress, Sequence[PiggybackFileInfo]]:
     """Generates all piggyback pig/piggybacked host pairs"""
+    meta_data: dict[HostAddress, dict[HostName, PiggybackFileInfo]] = {}
+    for piggybacked_host_folder in _get_piggybacked_host_folders():
+        if not (piggybacked_host := HostAddress(piggybacked_host_folder.name)):
+            continue
+        meta_data[piggybacked_host] = {
+            file_info.source: file_info for file_info in _get_payload_meta_data(piggybacked_host)
+        }
+
+    for segment_file in _get_source_segment_files():
+        if (reader := _open_segment(segment_file)) is None:
+            continue
+        source = HostAddress(segment_file.name)
+        last_contact = _get_mtime(_get_source_status_file_path(source))
+        for piggybacked_host, entry in reader.items():
+            known = (by_source := meta_data.setdefault(piggybacked_host, {})).get(source)
+            if known is not None and known.last_update >= int(entry.last_update):
+                continue
+            by_source[source] = PiggybackFileInfo(
+                source=source,
+                file_path=segment_file,
+                last_update=int(entry.last_update),
+                last_contact=last_contact,
+            )
+
     return {
-        piggybacked_host: _get_payload_meta_data(piggybacked_host)
-        for piggybacked_host_folder in _get_piggybacked_host_folders()
-        if (piggybacked_host := HostAddress(piggybacked_host_folder.name))
+        piggybacked_host: [by_source[source] for source in sorted(by_source)]
+        for piggybacked_host, by_source in meta_data.items()
     }
 
 
@@ -113,6 +247,7 @@ def _remove_piggyback_file(piggyback_file_path: Path) -> bool:
 def remove_source_status_file(source_hostname: HostName) -> bool:
     """Remove the source_status_file of this piggyback host which will
     mark the piggyback data from this source as outdated."""
+    _hub.remove_source(source_hostname)
     source_status_path = _get_source_status_file_path(source_hostname)
     return _remove_piggyback_file(source_status_path)
 
@@ -128,17 +263,17 @@ def store_piggyback_raw_data(
         remove_source_status_file(source_hostname)
         return
 
-    piggyback_file_paths = []
-    for piggybacked_hostname, lines in piggybacked_raw_data.items():
-        piggyback_file_path = _get_piggybacked_file_path(source_hostname, piggybacked_hostname)
-        logger.debug("Storing piggyback data for: %r", piggybacked_hostname)
-        # Raw data is always stored as bytes. Later the content is
-        # converted to unicode in abstact.py:_parse_info which respects
-        # 'encoding' in section options.
-        _write_file_with_mtime(
-            file_path=piggyback_file_path, content=b"%s\n" % b"\n".join(lines), mtime=timestamp
-        )
-        piggyback_file_paths.append(piggyback_file_path)
+    # Raw data is always stored as bytes. Later the content is
+    # converted to unicode in abstact.py:_parse_info which respects
+    # 'encoding' in section options.
+    payloads = {
+        piggybacked_hostname: b"%s\n" % b"\n".join(lines)
+        for piggybacked_hostname, lines in piggybacked_raw_data.items()
+    }
+    if get_storage_layout() is StorageLayout.SEGMENT:
+        _store_payloads_in_segment(source_hostname, payloads, timestamp)
+    else:
+        _store_payloads_in_files(source_hostname, payloads, timestamp)
 
     # Store the last contact with this piggyback source to be able to filter outdated data later
     # We use the mtime of this file later for comparison.
@@ -147,6 +282,37 @@ def store_piggyback_raw_data(
     status_file_path = _get_source_status_file_path(source_hostname)
     _write_file_with_mtime(file_path=status_file_path, content=b"", mtime=timestamp)
 
+    _hub.send_payloads(source_hostname, payloads, timestamp)
+
+
+def _store_payloads_in_files(
+    source_hostname: HostName,
+    payloads: Mapping[HostName, bytes],
+    timestamp: float,
+) -> None:
+    for piggybacked_hostname, payload in payloads.items():
+        piggyback_file_path = _get_piggybacked_file_path(source_hostname, piggybacked_hostname)
+        logger.debug("Storing piggyback data for: %r", piggybacked_hostname)
+        _write_file_with_mtime(file_path=piggyback_file_path, content=payload, mtime=timestamp)
+
+
+def _store_payloads_in_segment(
+    source_hostname: HostName,
+    payloads: Mapping[HostName, bytes],
+    timestamp: float,
+) -> None:
+    segment_file_path = _get_source_segment_file_path(source_hostname)
+    with store.locked(segment_file_path):
+        # Payloads of piggybacked hosts not sent this turn are kept with their
+        # old timestamp, just like the files of the directory layout.
+        entries = load_segment(segment_file_path)
+        logger.debug("Storing piggyback data for: %r", list(payloads))
+        entries.update(
+            (piggybacked_hostname, SegmentEntry(timestamp, payload))
+            for piggybacked_hostname, payload in payloads.items()
+        )
+        write_segment(segment_file_path, entries)
+
 
 def _write_file_with_mtime(
     file_path: Path,
@@ -208,8 +374,16 @@ def _get_piggybacked_host_folders() -> Sequence[Path]:
     return _files_in(piggyback_dir)
 
 
-def _get_source_state_files() -> Sequence[Path]:
-    return _files_in(piggyback_source_dir)
+def _get_source_segment_files() -> Sequence[Path]:
+    return _files_in(piggyback_segments_dir)
+
+
+def _open_segment(segment_file: Path) -> SegmentReader | None:
+    try:
+        return open_segment(segment_file)
+    except ValueError:
+        logger.warning("Ignoring invalid piggyback segment file '%s'", segment_file)
+        return None
 
 
 def _files_in(path: Path) -> Sequence[Path]:
@@ -228,6 +402,14 @@ def _get_source_status_file_path(source_hostname: HostName) -> Path:
     return piggyback_source_dir / str(source_hostname)
 
 
+def _get_source_segment_file_path(source_hostname: HostName) -> Path:
+    return piggyback_segments_dir / str(source_hostname)
+
+
+def _get_segment_layout_marker_path() -> Path:
+    return piggyback_segments_dir / ".active"
+
+
 def _get_piggybacked_file_path(
     source_hostname: HostName,
     piggybacked_hostname: HostName | HostAddress,
@@ -235,6 +417,96 @@ def _get_piggybacked_file_path(
     return piggyback_dir / piggybacked_hostname / source_hostname
 
 
+# .
+#   .--layout--------------------------------------------------------------.
+#   |                    _                         _                       |
+#   |                   | | __ _ _   _  ___  _   _| |_                     |
+#   |                   | |/ _` | | | |/ _ \| | | | __|                    |
+#   |                   | | (_| | |_| | (_) | |_| | |_                     |
+#   |                   |_|\__,_|\__, |\___/ \__,_|\__|                    |
+#   |                            |___/                                     |
+#   '----------------------------------------------------------------------'
+
+
+def get_storage_layout() -> StorageLayout:
+    """The layout new piggyback data is stored in"""
+    return (
+        StorageLayout.SEGMENT
+        if _get_segment_layout_marker_path().exists()
+        else StorageLayout.DIRECTORY
+    )
+
+
+def migrate_storage_layout(target: StorageLayout) -> int:
+    """Switch to the given storage layout and move all existing payloads there
+
+    The layout is switched first, so that concurrently stored data already ends
+    up in the target layout. Payloads are only moved if the target layout does
+    not hold more recent data for the same source and piggybacked host.
+
+    Returns the number of migrated payloads.
+    """
+    logger.debug("Migrating piggyback data to the %s layout", target)
+    if target is StorageLayout.SEGMENT:
+        _get_segment_layout_marker_path().parent.mkdir(mode=0o770, exist_ok=True, parents=True)
+        _get_segment_layout_marker_path().touch()
+        return _migrate_files_to_segments()
+
+    _get_segment_layout_marker_path().unlink(missing_ok=True)
+    return _migrate_segments_to_files()
+
+
+def _migrate_files_to_segments() -> int:
+    payload_files_by_source: dict[HostName, dict[HostName, Path]] = {}
+    for piggybacked_host_folder in _get_piggybacked_host_folders():
+        for payload_file in _files_in(piggybacked_host_folder):
+            payload_files_by_source.setdefault(HostAddress(payload_file.name), {})[
+                HostAddress(piggybacked_host_folder.name)
+            ] = payload_file
+
+    migrated = 0
+    for source_hostname, payload_files in payload_files_by_source.items():
+        segment_file_path = _get_source_segment_file_path(source_hostname)
+        with store.locked(segment_file_path):
+            entries = load_segment(segment_file_path)
+            for piggybacked_hostname, payload_file in payload_files.items():
+                try:
+                    last_update = payload_file.stat().st_mtime
+                    payload = payload_file.read_bytes()
+                except FileNotFoundError:
+                    continue
+                if (known := entries.get(piggybacked_hostname)) is None or (
+                    known.last_update < last_update
+                ):
+                    entries[piggybacked_hostname] = SegmentEntry(last_update, payload)
+                    migrated += 1
+            write_segment(segment_file_path, entries)
+
+        for payload_file in payload_files.values():
+            _remove_piggyback_file(payload_file)
+
+    for folder in _get_piggybacked_host_folders():
+        _cleanup_old_piggybacked_files(folder, cut_off_timestamp=0)
+    return migrated
+
+
+def _migrate_segments_to_files() -> int:
+    migrated = 0
+    for segment_file in _get_source_segment_files():
+        source_hostname = HostAddress(segment_file.name)
+        with store.locked(segment_file):
+            for piggybacked_hostname, entry in load_segment(segment_file).items():
+                file_path = _get_piggybacked_file_path(source_hostname, piggybacked_hostname)
+                if (mtime := _get_mtime(file_path)) is not None and mtime >= entry.last_update:
+                    continue
+                _write_file_with_mtime(
+                    file_path=file_path, content=entry.payload, mtime=entry.last_update
+                )
+                migrated += 1
+            _remove_piggyback_file(segment_file)
+    return migrated
+
+
 # .
 #   .--clean up------------------------------------------------------------.
 #   |                     _                                                |
@@ -246,75 +518,192 @@ def _get_piggybacked_file_path(
 #   '----------------------------------------------------------------------'
 
 
-def cleanup_piggyback_files(cut_off_timestamp: float) -> None:
+@dataclass(frozen=True, kw_only=True)
+class CleanupReport:
+    """Statistics of a piggyback cleanup run"""
+
+    scanned_source_status_files: int = 0
+    removed_source_status_files: int = 0
+    scanned_piggybacked_files: int = 0
+    removed_piggybacked_files: int = 0
+    removed_piggybacked_folders: int = 0
+    removed_segment_payloads: int = 0
+    duration: float = 0.0
+
+
+@dataclass(frozen=True)
+class _FolderCleanupResult:
+    scanned: int = 0
+    removed: int = 0
+    folder_removed: bool = False
+
+
+def cleanup_piggyback_files(cut_off_timestamp: float, *, max_workers: int = 1) -> CleanupReport:
     """This is a housekeeping job to clean up different old files from the
     piggyback directories.
 
     # Source status files and/or piggybacked data files are cleaned up/deleted
     # if and only if they have exceeded the maximum cache age configured in the
-    # global settings or in the rule 'Piggybacked Host Files'."""
+    # global settings or in the rule 'Piggybacked Host Files'.
+
+    Every directory is read only once using os.scandir, which provides the file
+    type without an additional stat call. With max_workers > 1 the piggybacked
+    host folders are processed by a pool of threads, which mostly helps on slow
+    (e.g. network) file systems."""
     logger.debug(
         "Cleanup piggyback data from before %s (%s).",
         _render_datetime(cut_off_timestamp),
         cut_off_timestamp,
     )
+    start = time.monotonic()
+
+    last_contacts = _get_source_last_contacts()
+    removed_source_status_files = _cleanup_old_source_status_files(last_contacts, cut_off_timestamp)
+    folder_results = _cleanup_old_piggybacked_folders(
+        _scan_directories(piggyback_dir), cut_off_timestamp, max_workers
+    )
+    removed_segment_payloads = _cleanup_old_segment_entries(
+        _get_source_segment_files(), cut_off_timestamp
+    )
+    _hub.cleanup(cut_off_timestamp)
+
+    report = CleanupReport(
+        scanned_source_status_files=len(last_contacts),
+        removed_source_status_files=removed_source_status_files,
+        scanned_piggybacked_files=sum(r.scanned for r in folder_results),
+        removed_piggybacked_files=sum(r.removed for r in folder_results),
+        removed_piggybacked_folders=sum(r.folder_removed for r in folder_results),
+        removed_segment_payloads=removed_segment_payloads,
+        duration=time.monotonic() - start,
+    )
+    logger.debug("Piggyback cleanup finished: %s", report)
+    return report
 
-    piggybacked_hosts_settings = [
-        (piggybacked_host_folder, _files_in(piggybacked_host_folder))
-        for piggybacked_host_folder in _get_piggybacked_host_folders()
-    ]
 
-    _cleanup_old_source_status_files(_get_source_state_files(), cut_off_timestamp)
-    _cleanup_old_piggybacked_files(piggybacked_hosts_settings, cut_off_timestamp)
+def _scan_files(path: Path) -> Iterator[os.DirEntry[str]]:
+    """Yield the non hidden entries of `path`, nothing if it does not exist"""
+    try:
+        with os.scandir(path) as entries:
+            yield from (e for e in entries if not e.name.startswith("."))
+    except FileNotFoundError:
+        return
+
+
+def _scan_directories(path: Path) -> Sequence[Path]:
+    return sorted(Path(e.path) for e in _scan_files(path) if e.is_dir(follow_symlinks=False))
+
+
+def _get_source_last_contacts() -> Mapping[Path, int]:
+    """Map the source status files to their mtime (the last contact of the source)"""
+    last_contacts = {}
+    for entry in _scan_files(piggyback_source_dir):
+        try:
+            last_contacts[Path(entry.path)] = int(entry.stat(follow_symlinks=False).st_mtime)
+        except FileNotFoundError:
+            continue  # File has been removed, that's OK.
+    return last_contacts
 
 
 def _cleanup_old_source_status_files(
-    source_state_files: Sequence[Path],
+    last_contacts: Mapping[Path, int],
     cut_off_timestamp: float,
-) -> None:
+) -> int:
     """Remove source status files which exceed provided maximum age."""
-    for source_state_file in source_state_files:
-        if (mtime := _get_mtime(source_state_file)) is None:
-            continue  # File has been removed, that's OK.
-
+    removed = 0
+    for source_state_file, mtime in last_contacts.items():
         if mtime < cut_off_timestamp:
             logger.debug(
                 "Piggyback source status file '%s' too old (%s). Remove it.",
                 source_state_file,
                 _render_datetime(mtime),
             )
-            _remove_piggyback_file(source_state_file)
+            removed += _remove_piggyback_file(source_state_file)
+    return removed
+
+
+def _cleanup_old_piggybacked_folders(
+    piggybacked_host_folders: Sequence[Path], cut_off_timestamp: float, max_workers: int
+) -> Sequence[_FolderCleanupResult]:
+    if max_workers <= 1 or len(piggybacked_host_folders) <= 1:
+        return [
+            _cleanup_old_piggybacked_files(folder, cut_off_timestamp)
+            for folder in piggybacked_host_folders
+        ]
+
+    # The folders are independent of each other and the work is dominated by
+    # waiting for the file system, so threads are sufficient here.
+    with ThreadPool(min(max_workers, len(piggybacked_host_folders))) as pool:
+        return pool.map(
+            lambda folder: _cleanup_old_piggybacked_files(folder, cut_off_timestamp),
+            piggybacked_host_folders,
+        )
 
 
 def _cleanup_old_piggybacked_files(
-    piggybacked_hosts_settings: Iterable[tuple[Path, Iterable[Path]]], cut_off_timestamp: float
-) -> None:
+    piggybacked_host_folder: Path, cut_off_timestamp: float
+) -> _FolderCleanupResult:
     """Remove piggybacked data files which exceed provided maximum age."""
+    scanned = removed = 0
+    for entry in _scan_files(piggybacked_host_folder):
+        scanned += 1
+        try:
+            # Beware: see _get_mtime
+            mtime = int(entry.stat(follow_symlinks=False).st_mtime)
+        except FileNotFoundError:
+            continue
 
-    for piggybacked_host_folder, source_hosts in piggybacked_hosts_settings:
-        for piggybacked_host_source in source_hosts:
-            if (mtime := _get_mtime(piggybacked_host_source)) is None:
-                continue
+        if mtime < cut_off_timestamp:
+            logger.debug(
+                "Piggyback file '%s' too old (%s). Remove it.",
+                entry.path,
+                _render_datetime(mtime),
+            )
+            removed += _remove_piggyback_file(Path(entry.path))
 
-            if mtime < cut_off_timestamp:
-                logger.debug(
-                    "Piggyback file '%s' too old (%s). Remove it.",
-                    piggybacked_host_source,
-                    _render_datetime(mtime),
-                )
-                _remove_piggyback_file(piggybacked_host_source)
+    # Remove empty backed host directory
+    try:
+        piggybacked_host_folder.rmdir()
+    except FileNotFoundError:
+        return _FolderCleanupResult(scanned, removed)
+    except OSError as e:
+        if e.errno == errno.ENOTEMPTY:
+            return _FolderCleanupResult(scanned, removed)
+        raise
+    logger.debug(
+        "Piggyback folder '%s' was empty. Removed it.",
+        piggybacked_host_folder,
+    )
+    return _FolderCleanupResult(scanned, removed, folder_removed=True)
+
+
+def _cleanup_old_segment_entries(
+    source_segment_files: Iterable[Path], cut_off_timestamp: float
+) -> int:
+    """Remove piggybacked payloads from the segments which exceed provided maximum age."""
+    removed = 0
+    for source_segment_file in source_segment_files:
+        with store.locked(source_segment_file):
+            try:
+                entries = load_segment(source_segment_file)
+            except ValueError:
+                logger.debug("Piggyback segment '%s' is invalid. Remove it.", source_segment_file)
+                _remove_piggyback_file(source_segment_file)
+                continue
 
-        # Remove empty backed host directory
-        try:
-            piggybacked_host_folder.rmdir()
-        except OSError as e:
-            if e.errno == errno.ENOTEMPTY:
+            outdated = {h for h, e in entries.items() if e.last_update < cut_off_timestamp}
+            if not outdated and entries:
                 continue
-            raise
-        logger.debug(
-            "Piggyback folder '%s' was empty. Removed it.",
-            piggybacked_host_folder,
-        )
+
+            logger.debug(
+                "Piggyback segment '%s': %d payloads too old. Remove them.",
+                source_segment_file,
+                len(outdated),
+            )
+            write_segment(
+                source_segment_file, {h: e for h, e in entries.items() if h not in outdated}
+            )
+            removed += len(outdated)
+    return removed
 
 
 def _get_mtime(path: Path) -> int | None:
@@ -358,7 +747,34 @@ def move_for_host_rename(old_host: str, new_host: str) -> tuple[str, ...]:
         old_path.rename(new_path)
         yield "piggyback-pig"
 
-    return tuple(
+    def _rename_in_segments(old_name: str, new_name: str) -> Iterable[str]:
+        renamed = False
+        for segment_file in _get_source_segment_files():
+            with store.locked(segment_file):
+                entries = load_segment(segment_file)
+                if (entry := entries.pop(HostName(old_name), None)) is None:
+                    continue
+                entries[HostName(new_name)] = entry
+                write_segment(segment_file, entries)
+                renamed = True
+        if renamed:
+            yield "piggyback-load"
+
+    def _rename_segment_file(old_name: str, new_name: str) -> Iterable[str]:
+        if not (old_path := _get_source_segment_file_path(HostName(old_name))).exists():
+            return
+
+        with store.locked(old_path):
+            (new_path := _get_source_segment_file_path(HostName(new_name))).unlink(missing_ok=True)
+            old_path.rename(new_path)
+        yield "piggyback-pig"
+
+    actions = (
         *_rename_piggybacked_dir(old_host, new_host),
         *_rename_payload_file(piggyback_dir, old_host, new_host),
+        *_rename_in_segments(old_host, new_host),
+        *_rename_segment_file(old_host, new_host),
     )
+    if actions:
+        _hub.reload()
+    return actions
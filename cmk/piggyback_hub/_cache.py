@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import threading
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.piggyback import PiggybackRawDataInfo
+from cmk.piggyback._hub import HubPayload
+
+
+@dataclass(frozen=True)
+class _Entry:
+    last_update: float
+    payload: bytes
+
+
+class PayloadCache:
+    """The latest payload per (source, piggybacked host) pair
+
+    The cache is accessed by the threads serving the clients, so all methods
+    are synchronized.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._payloads: dict[HostName, dict[HostName, _Entry]] = {}
+        self._last_contact: dict[HostName, float] = {}
+        # The changes to apply after the running reload, see reload()
+        self._reload_lock = threading.Lock()
+        self._replay: list[Callable[[PayloadCache], None]] | None = None
+        self._loaded = False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(by_source) for by_source in self._payloads.values())
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the content was loaded once, only then all payloads are known"""
+        with self._lock:
+            return self._loaded
+
+    @property
+    def num_piggybacked_hosts(self) -> int:
+        with self._lock:
+            return len(self._payloads)
+
+    def store(self, source: HostName, payloads: Mapping[HostName, bytes], timestamp: float) -> None:
+        with self._lock:
+            for piggybacked_hostname, payload in payloads.items():
+                self._payloads.setdefault(piggybacked_hostname, {})[source] = _Entry(
+                    timestamp, payload
+                )
+            self._last_contact[source] = timestamp
+            if self._replay is not None:
+                self._replay.append(lambda cache: cache.store(source, payloads, timestamp))
+
+    def load(
+        self, piggybacked_hostname: HostName, raw_data: Iterable[PiggybackRawDataInfo]
+    ) -> None:
+        """Add the payloads read from disk unless more recent ones are known"""
+        with self._lock:
+            by_source = self._payloads.setdefault(piggybacked_hostname, {})
+            for rd in raw_data:
+                known = by_source.get(rd.info.source)
+                # The timestamps of the files are whole seconds, they win on ties
+                if known is None or int(known.last_update) <= rd.info.last_update:
+                    by_source[rd.info.source] = _Entry(rd.info.last_update, rd.raw_data)
+                if rd.info.last_contact is not None:
+                    self._last_contact.setdefault(rd.info.source, rd.info.last_contact)
+            if not by_source:
+                del self._payloads[piggybacked_hostname]
+
+    def remove_source(self, source: HostName) -> None:
+        """Mark all payloads of this source as outdated (see remove_source_status_file)"""
+        with self._lock:
+            self._last_contact.pop(source, None)
+            if self._replay is not None:
+                self._replay.append(lambda cache: cache.remove_source(source))
+
+    def reload(self, load: Callable[["PayloadCache"], None]) -> None:
+        """Replace the content by what `load` puts into an empty cache
+
+        The cache stays usable while loading. The changes made meanwhile are
+        applied to the loaded content, so they are not lost.
+        """
+        with self._reload_lock:
+            with self._lock:
+                self._replay = []
+            loaded = PayloadCache()
+            try:
+                load(loaded)
+            except BaseException:
+                with self._lock:
+                    self._replay = None
+                raise
+
+            with self._lock:
+                replay, self._replay = self._replay, None
+                for change in replay or ():
+                    change(loaded)
+                self._payloads = loaded._payloads
+                self._last_contact = loaded._last_contact
+                self._loaded = True
+
+    def get(self, piggybacked_hostname: HostName) -> Sequence[HubPayload]:
+        with self._lock:
+            return [
+                HubPayload(
+                    source=source,
+                    last_update=entry.last_update,
+                    last_contact=self._last_contact.get(source),
+                    payload=entry.payload,
+                )
+                for source, entry in sorted(self._payloads.get(piggybacked_hostname, {}).items())
+            ]
+
+    def evict(self, cut_off_timestamp: float) -> int:
+        """Drop everything older than the cut off, return the number of dropped payloads"""
+        evicted = 0
+        with self._lock:
+            for piggybacked_hostname, by_source in list(self._payloads.items()):
+                for source, entry in list(by_source.items()):
+                    if entry.last_update < cut_off_timestamp:
+                        del by_source[source]
+                        evicted += 1
+                if not by_source:
+                    del self._payloads[piggybacked_hostname]
+
+            for source, last_contact in list(self._last_contact.items()):
+                if last_contact < cut_off_timestamp:
+                    del self._last_contact[source]
+
+        return evicted
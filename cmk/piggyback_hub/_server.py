@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import logging
+import os
+import socketserver
+import time
+from pathlib import Path
+
+from cmk.utils.hostaddress import HostName
+
+from cmk import piggyback
+from cmk.piggyback._hub import Command, Decoder, encode_payloads, Encoder, receive_frame
+
+from ._cache import PayloadCache
+
+_EVICTION_INTERVAL = 60.0
+
+
+def load_from_disk(cache: PayloadCache, logger: logging.Logger) -> None:
+    start = time.monotonic()
+    for piggybacked_hostname in piggyback.get_piggybacked_host_with_sources():
+        cache.load(
+            piggybacked_hostname,
+            piggyback.get_piggyback_raw_data(piggybacked_hostname, use_hub=False),
+        )
+    logger.info(
+        "Loaded %d payloads for %d piggybacked hosts from disk in %.2fs.",
+        len(cache),
+        cache.num_piggybacked_hosts,
+        time.monotonic() - start,
+    )
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    server: "PiggybackHubServer"
+
+    def handle(self) -> None:
+        while (request := receive_frame(self.request)) is not None:
+            if (response := self.server.process(request)) is not None:
+                self.request.sendall(response)
+
+
+class PiggybackHubServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: Path,
+        cache: PayloadCache,
+        logger: logging.Logger,
+        max_age: float | None,
+    ) -> None:
+        self.cache = cache
+        self._logger = logger
+        # Unless given, the maximum age is taken from the regular piggyback cleanup,
+        # which knows about the configured expiry ages.
+        self._max_age = max_age
+        self._max_age_from_cleanup = max_age is None
+        self._last_eviction = time.time()
+        self.stats = {command: 0 for command in Command}
+
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        socket_path.unlink(missing_ok=True)
+        super().__init__(str(socket_path), _RequestHandler)
+        os.chmod(socket_path, 0o660)
+
+    def process(self, request: Decoder) -> bytes | None:
+        """Process the request and return the response, None for the unanswered stores"""
+        self.stats[request.command] += 1
+        match request.command:
+            case Command.GET:
+                if not self.cache.loaded:
+                    # The payloads not loaded yet are unknown, the client reads the files
+                    return Encoder(Command.LOADING).frame()
+                return encode_payloads(self.cache.get(HostName(request.text())))
+            case Command.STORE:
+                source = HostName(request.text())
+                if (timestamp := request.timestamp()) is None:
+                    timestamp = time.time()
+                self.cache.store(
+                    source,
+                    {HostName(request.text()): request.blob() for _i in range(request.count())},
+                    timestamp,
+                )
+                return None
+            case Command.REMOVE_SOURCE:
+                self.cache.remove_source(HostName(request.text()))
+            case Command.CLEANUP:
+                if (cut_off_timestamp := request.timestamp()) is not None:
+                    if self._max_age_from_cleanup:
+                        self._max_age = time.time() - cut_off_timestamp
+                    self._evict(cut_off_timestamp)
+            case Command.RELOAD:
+                self._reload()
+            case _:
+                self._logger.warning("Ignoring unknown command %r", request.command)
+
+        return Encoder(Command.OK).frame()
+
+    def service_actions(self) -> None:
+        if self._max_age is None or time.time() - self._last_eviction < _EVICTION_INTERVAL:
+            return
+        self._evict(time.time() - self._max_age)
+
+    def _evict(self, cut_off_timestamp: float) -> None:
+        self._last_eviction = time.time()
+        evicted = self.cache.evict(cut_off_timestamp)
+        self._logger.log(
+            15,
+            "Evicted %d payloads, %d payloads cached. Requests: %s",
+            evicted,
+            len(self.cache),
+            ", ".join(f"{c.name.lower()}: {n}" for c, n in self.stats.items() if n),
+        )
+
+    def _reload(self) -> None:
+        self.cache.reload(lambda cache: load_from_disk(cache, self._logger))
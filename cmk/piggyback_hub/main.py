@@ -8,7 +8,7 @@ import logging
 import os
 import signal
 import sys
-import time
+import threading
 from dataclasses import dataclass
 from logging import getLogger
 from logging.handlers import WatchedFileHandler
@@ -16,6 +16,10 @@ from pathlib import Path
 from types import FrameType
 
 from cmk.utils.daemon import daemonize, pid_file_lock
+from cmk.utils.paths import piggyback_hub_socket
+
+from ._cache import PayloadCache
+from ._server import load_from_disk, PiggybackHubServer
 
 VERBOSITY_MAP = {
     0: logging.INFO,
@@ -35,6 +39,7 @@ class Arguments:
     verbosity: int
     pid_file: str
     log_file: str
+    max_age: float | None
 
 
 def _parse_arguments(argv: list[str]) -> Arguments:
@@ -53,6 +58,15 @@ def _parse_arguments(argv: list[str]) -> Arguments:
         help="Run in the foreground instead of daemonizing",
     )
     parser.add_argument("--debug", action="store_true", help="Let Python exceptions come through")
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=None,
+        help=(
+            "Evict cached payloads older than this many seconds. Without this option"
+            " the maximum age is taken from the regular piggyback cleanup."
+        ),
+    )
     parser.add_argument("pid_file", help="Path to the PID file")
     parser.add_argument("log_file", help="Path to the log file")
 
@@ -63,6 +77,7 @@ def _parse_arguments(argv: list[str]) -> Arguments:
         debug=args.debug,
         pid_file=args.pid_file,
         log_file=args.log_file,
+        max_age=args.max_age,
     )
 
 
@@ -89,10 +104,23 @@ def _register_signal_handler() -> None:
     signal.signal(signal.SIGTERM, signal_handler)
 
 
-# a dummy daemon for now
-def run_piggyback_hub():
-    while True:
-        time.sleep(5)
+def run_piggyback_hub(logger: logging.Logger, max_age: float | None) -> None:
+    cache = PayloadCache()
+    server = PiggybackHubServer(piggyback_hub_socket, cache, logger, max_age)
+    logger.info("Listening on %s.", piggyback_hub_socket)
+    # Load in the background: the clients read the files until the hub has loaded them, and the
+    # payloads stored while loading are kept.
+    threading.Thread(
+        target=cache.reload,
+        args=(lambda loaded: load_from_disk(loaded, logger),),
+        name="load-from-disk",
+        daemon=True,
+    ).start()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        piggyback_hub_socket.unlink(missing_ok=True)
 
 
 def main(argv: list[str] | None = None) -> int:
@@ -118,7 +146,7 @@ def main(argv: list[str] | None = None) -> int:
 
     try:
         with pid_file_lock(Path(args.pid_file)):
-            run_piggyback_hub()
+            run_piggyback_hub(logger, args.max_age)
     except SignalException:
         logger.info("Stopping Piggyback Hub daemon.")
     except Exception as e:
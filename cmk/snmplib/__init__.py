@@ -13,6 +13,7 @@ from ._table import SNMPDecodedString as SNMPDecodedString
 from ._table import SNMPRawData as SNMPRawData
 from ._table import SNMPRawDataElem as SNMPRawDataElem
 from ._table import SNMPTable as SNMPTable
+from ._table import WalkCacheStats as WalkCacheStats
 from ._typedefs import BackendOIDSpec as BackendOIDSpec
 from ._typedefs import BackendSNMPTree as BackendSNMPTree
 from ._typedefs import ensure_str as ensure_str
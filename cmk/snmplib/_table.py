@@ -7,7 +7,8 @@
 
 import contextlib
 import hashlib
-from collections.abc import Callable, MutableMapping, Sequence
+from collections.abc import Callable, Iterable, MutableMapping, Sequence
+from dataclasses import dataclass
 from functools import partial
 from typing import assert_never
 
@@ -44,6 +45,26 @@ _ResultColumnsUnsanitized = list[tuple[OID, SNMPRowInfo, SNMPValueEncoding]]
 _ResultColumnsSanitized = list[tuple[list[SNMPRawValue], SNMPValueEncoding]]
 
 
+@dataclass
+class WalkCacheStats:
+    """How many of the requested walks the walk cache saved"""
+
+    requested: int = 0
+    walks: int = 0
+    exact_hits: int = 0
+    subtree_hits: int = 0
+
+    @property
+    def avoided(self) -> int:
+        return self.requested - self.walks
+
+    def __str__(self) -> str:
+        return (
+            f"{self.walks} of {self.requested} walks performed, {self.avoided} avoided"
+            f" ({self.exact_hits} cached, {self.subtree_hits} from enclosing walks)"
+        )
+
+
 def get_snmp_table(
     *,
     section_name: SectionName | None,
@@ -51,7 +72,10 @@ def get_snmp_table(
     walk_cache: MutableMapping[tuple[str, str, bool], SNMPRowInfo],
     backend: SNMPBackend,
     log: Callable[[str], None],
+    stats: WalkCacheStats | None = None,
 ) -> Sequence[SNMPTable]:
+    stats = WalkCacheStats() if stats is None else stats
+
     index_column = -1
     index_format: SpecialColumn | None = None
     columns: _ResultColumnsUnsanitized = []
@@ -87,6 +111,7 @@ def get_snmp_table(
                 save_walk_cache=oid.save_to_cache,
                 backend=backend,
                 log=log,
+                stats=stats,
             )
             if len(rowinfo) > max_len:
                 max_len_col = len(columns)
@@ -177,6 +202,40 @@ def _key_oid_pairs(pair1: tuple[OID, SNMPRawValue]) -> list[int]:
     return _oid_to_intlist(pair1[0].lstrip("."))
 
 
+def _context_hash(backend: SNMPBackend, section_name: SectionName | None) -> str:
+    contexts = backend.config.snmpv3_contexts_of(section_name).contexts
+    context_string = "-".join(["no_context" if not c else c for c in contexts])
+
+    # contexts are hashed in order not to exceed max pathname length
+    return hashlib.shake_256(context_string.encode("utf-8")).hexdigest(15)
+
+
+def _from_enclosing_walk(
+    fetchoid: OID,
+    context_hash: str,
+    walk_cache: MutableMapping[tuple[str, str, bool], SNMPRowInfo],
+    save_walk_cache: bool,
+) -> SNMPRowInfo | None:
+    """The rows below fetchoid if a walk of an enclosing subtree is cached
+
+    Only walks with the same save flag are used, so a walk is never served from
+    a persisted cache entry which the caller did not ask for."""
+    if fetchoid.endswith(".*"):
+        return None
+    enclosing = fetchoid
+    while "." in enclosing.lstrip("."):
+        enclosing = enclosing.rsplit(".", 1)[0]
+        with contextlib.suppress(KeyError):
+            rows = walk_cache[(enclosing, context_hash, save_walk_cache)]
+            return _rows_below(fetchoid, rows)
+    return None
+
+
+def _rows_below(fetchoid: OID, rows: Iterable[tuple[OID, SNMPRawValue]]) -> SNMPRowInfo:
+    prefix = fetchoid.lstrip(".") + "."
+    return [(o, v) for o, v in rows if o.lstrip(".").startswith(prefix)]
+
+
 def get_snmpwalk(
     section_name: SectionName | None,
     base_oid: str,
@@ -186,18 +245,27 @@ def get_snmpwalk(
     save_walk_cache: bool,
     backend: SNMPBackend,
     log: Callable[[str], None],
+    stats: WalkCacheStats | None = None,
 ) -> SNMPRowInfo:
-    contexts = backend.config.snmpv3_contexts_of(section_name).contexts
-    context_string = "-".join(["no_context" if not c else c for c in contexts])
-
-    # contexts are hashed in order not to exceed max pathname length
-    context_hash = hashlib.shake_256(context_string.encode("utf-8")).hexdigest(15)
+    stats = WalkCacheStats() if stats is None else stats
+    stats.requested += 1
+    context_hash = _context_hash(backend, section_name)
 
     with contextlib.suppress(KeyError):
         cache_info = walk_cache[(fetchoid, context_hash, save_walk_cache)]
         log(f"Already fetched OID: {fetchoid}")
+        stats.exact_hits += 1
         return cache_info
 
+    if (
+        enclosed_info := _from_enclosing_walk(fetchoid, context_hash, walk_cache, save_walk_cache)
+    ) is not None:
+        log(f"Already fetched OID: {fetchoid} (in an enclosing walk)")
+        stats.subtree_hits += 1
+        walk_cache[(fetchoid, context_hash, save_walk_cache)] = enclosed_info
+        return enclosed_info
+
+    stats.walks += 1
     added_oids: set[OID] = set()
     rowinfo: SNMPRowInfo = []
 
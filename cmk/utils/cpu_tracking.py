@@ -7,6 +7,7 @@ from __future__ import annotations
 
 import os
 import posix
+import resource
 from collections.abc import Callable
 from dataclasses import dataclass
 
@@ -27,6 +28,18 @@ class Snapshot:
     def take(cls) -> Snapshot:
         return cls(os.times())
 
+    @classmethod
+    def take_thread(cls) -> Snapshot:
+        """Like take(), but with the CPU times of the calling thread only
+
+        The times of the child processes are only known for the whole process,
+        they are left out.
+        """
+        usage = resource.getrusage(resource.RUSAGE_THREAD)
+        return cls(
+            posix.times_result((usage.ru_utime, usage.ru_stime, 0.0, 0.0, os.times().elapsed))
+        )
+
     @classmethod
     def deserialize(cls, serialized: object) -> Snapshot:
         try:
@@ -53,9 +66,10 @@ class Snapshot:
 
 
 class CPUTracker:
-    def __init__(self, log: Callable[[str], None]) -> None:
+    def __init__(self, log: Callable[[str], None], *, per_thread: bool = False) -> None:
         super().__init__()
         self._log = log
+        self._take = Snapshot.take_thread if per_thread else Snapshot.take
         self._start: Snapshot = Snapshot.null()
         self._end: Snapshot = Snapshot.null()
 
@@ -63,12 +77,12 @@ class CPUTracker:
         return "%s()" % type(self).__name__
 
     def __enter__(self) -> CPUTracker:
-        self._start = Snapshot.take()
+        self._start = self._take()
         self._log(f"[cpu_tracking] Start [{id(self):x}]")
         return self
 
     def __exit__(self, *exc_info: object) -> None:
-        self._end = Snapshot.take()
+        self._end = self._take()
         self._log(f"[cpu_tracking] Stop [{id(self):x} - {self.duration}]")
 
     @property
@@ -291,9 +291,11 @@ def get_standard_hosts_storage() -> ABCHostsStorage[str]:
 
 
 @lru_cache
-def get_host_storage_loaders(storage_format_option: str) -> list[ABCHostsStorageLoader]:
+def get_host_storage_loaders(
+    storage_format_option: str, code_cache: store.CodeCache | None = None
+) -> list[ABCHostsStorageLoader]:
     host_storage_loaders: list[ABCHostsStorageLoader] = [
-        StandardStorageLoader(get_standard_hosts_storage())
+        StandardStorageLoader(get_standard_hosts_storage(), code_cache)
     ]
     if storage := _make_experimental_base_hosts_storage_loader(
         get_storage_format(storage_format_option)
@@ -345,6 +347,20 @@ class ABCHostsStorageLoader(abc.ABC, Generic[THostsReadData]):
 
 
 class StandardStorageLoader(ABCHostsStorageLoader[str]):
+    __slots__ = ["_code_cache"]
+
+    def __init__(self, storage: ABCHostsStorage, code_cache: store.CodeCache | None = None) -> None:
+        super().__init__(storage)
+        self._code_cache = code_cache
+
+    def read_and_apply(self, file_path: Path, global_dict: dict[str, Any]) -> bool:
+        data = self._storage.read(file_path)
+        if self._code_cache is None:
+            return self.apply(data, global_dict)
+        code = self._code_cache.compile(data, str(self._storage.add_file_extension(file_path)))
+        exec(code, global_dict, global_dict)  # nosec B102 # BNS:aee528
+        return True
+
     def apply(self, data: str, global_dict: dict[str, Any]) -> bool:
         exec(data, global_dict, global_dict)  # nosec B102 # BNS:aee528
         return True
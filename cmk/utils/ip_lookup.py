@@ -6,8 +6,12 @@
 from __future__ import annotations
 
 import enum
+import functools
 import socket
-from collections.abc import Iterable, Iterator, Mapping, MutableMapping, Sequence
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping, MutableMapping, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Any, assert_never, Literal, NamedTuple
@@ -254,8 +258,17 @@ class IPLookupCache:
     def __init__(self, cache: MutableMapping[IPLookupCacheId, HostAddress]) -> None:
         self._cache = cache
         self._persist_on_update = True
+        self._batch_size = 1
+        # The updates not persisted yet
+        self._pending: dict[IPLookupCacheId, HostAddress] = {}
+        self._lock = threading.RLock()
+        # Set for the lookups which ran into a timeout, their results are dropped
+        self._cancelled = threading.local()
         self._store = store.ObjectStore(self.PATH, serializer=IPLookupCacheSerializer())
 
+    def is_backed_by(self, cache: MutableMapping[IPLookupCacheId, HostAddress]) -> bool:
+        return self._cache is cache
+
     @contextmanager
     def persisting_disabled(self) -> Iterator[None]:
         old_persist_flag = self._persist_on_update
@@ -265,6 +278,31 @@ class IPLookupCache:
         finally:
             self._persist_on_update = old_persist_flag
 
+    @contextmanager
+    def persisting_batched(self, batch_size: int = 1000) -> Iterator[None]:
+        """Persist the updates in batches (write-behind)
+
+        Every persisting update re-reads and rewrites the whole file, which
+        does not scale when many addresses are looked up in a row. The
+        pending updates are persisted at the end at the latest.
+        """
+        old_batch_size = self._batch_size
+        self._batch_size = batch_size
+        try:
+            yield
+        finally:
+            self._batch_size = old_batch_size
+            self.persist_pending()
+
+    @contextmanager
+    def dropping_updates_when(self, cancelled: threading.Event) -> Iterator[None]:
+        """Drop the updates of this thread once `cancelled` is set"""
+        self._cancelled.event = cancelled
+        try:
+            yield
+        finally:
+            del self._cancelled.event
+
     def __repr__(self) -> str:
         return f"{type(self).__name__}({self._cache!r})"
 
@@ -309,36 +347,72 @@ class IPLookupCache:
 
         This could really be solved in a better way, but may be sufficient for the moment.
 
+        Within persisting_batched() the entries are collected and written this way
+        once the batch is full.
+
         The cache can only be cleaned up with the "Update DNS cache" option in WATO
         or the "cmk --update-dns-cache" call that both call update_dns_cache().
         """
-        if not self._persist_on_update:
+        with self._lock:
+            if (cancelled := getattr(self._cancelled, "event", None)) and cancelled.is_set():
+                return
             self._cache[cache_id] = ipa
-            return
-
-        with self._store.locked():
-            self._cache.update(self._store.read_obj(default={}))
-            self._cache[cache_id] = ipa
-            self.save_persisted()
+            if not self._persist_on_update:
+                return
+
+            self._pending[cache_id] = ipa
+            if len(self._pending) >= self._batch_size:
+                self.persist_pending()
+
+    def persist_pending(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            with self._store.locked():
+                self._cache.update(self._store.read_obj(default={}))
+                self._cache.update(self._pending)
+                self.save_persisted()
+            self._pending.clear()
 
     def save_persisted(self) -> None:
-        self._store.write_obj(self._cache)
+        with self._lock:
+            self._store.write_obj(self._cache)
 
     def clear(self) -> None:
         """Clear the persisted AND in memory cache"""
-        self._cache.clear()
-        self.save_persisted()
+        with self._lock:
+            self._pending.clear()
+            self._cache.clear()
+            self.save_persisted()
+
+
+_ip_lookup_cache: IPLookupCache | None = None
 
 
 def _get_ip_lookup_cache() -> IPLookupCache:
-    """A file based fall-back DNS cache in case resolution fails"""
-    if "ip_lookup" in cache_manager:
+    """A file based fall-back DNS cache in case resolution fails
+
+    All lookups share the instance, so they see the same persistence mode.
+    """
+    global _ip_lookup_cache
+    if (
+        "ip_lookup" in cache_manager
+        and _ip_lookup_cache is not None
+        and _ip_lookup_cache.is_backed_by(cache_manager.obtain_cache("ip_lookup"))
+    ):
         # Return already created and initialized cache
-        return IPLookupCache(cache_manager.obtain_cache("ip_lookup"))
+        return _ip_lookup_cache
 
-    cache = IPLookupCache(cache_manager.obtain_cache("ip_lookup"))
-    cache.load_persisted()
-    return cache
+    _ip_lookup_cache = IPLookupCache(cache_manager.obtain_cache("ip_lookup"))
+    _ip_lookup_cache.load_persisted()
+    return _ip_lookup_cache
+
+
+@contextmanager
+def persisting_batched() -> Iterator[None]:
+    """Persist the updates of the IP lookup cache in batches, see IPLookupCache"""
+    with _get_ip_lookup_cache().persisting_batched():
+        yield
 
 
 def update_dns_cache(
@@ -350,36 +424,58 @@ def update_dns_cache(
     # will just clear the cache.
     simulation_mode: bool,
     override_dns: HostAddress | None,
+    max_workers: int = 32,
+    timeout: float = 30.0,
 ) -> tuple[int, Sequence[HostName]]:
+    """Look up the addresses of all hosts again
+
+    The lookups run concurrently, a lookup taking longer than `timeout`
+    seconds counts as failed.
+    """
     failed = []
 
     ip_lookup_cache = _get_ip_lookup_cache()
 
+    def lookup(
+        host_name: HostName,
+        host_config: IPLookupConfig,
+        family: Literal[socket.AddressFamily.AF_INET, socket.AddressFamily.AF_INET6],
+        cancelled: threading.Event,
+    ) -> HostAddress:
+        with ip_lookup_cache.dropping_updates_when(cancelled):
+            return lookup_ip_address(
+                host_name=host_name,
+                family=family,
+                configured_ip_address=(
+                    configured_ipv4_addresses
+                    if family is socket.AF_INET
+                    else configured_ipv6_addresses
+                ).get(host_name),
+                simulation_mode=simulation_mode,
+                is_snmp_usewalk_host=(host_config.is_use_walk_host and host_config.is_snmp_host),
+                override_dns=override_dns,
+                is_dyndns_host=host_config.is_dyndns_host,
+                force_file_cache_renewal=True,  # it's cleared anyway
+            )
+
     with ip_lookup_cache.persisting_disabled():
         console.verbose("Cleaning up existing DNS cache...")
         ip_lookup_cache.clear()
 
         console.verbose("Updating DNS cache...")
         # `_annotate_family()` handles DUAL_STACK and NO_IP
-        for host_name, host_config, family in _annotate_family(ip_lookup_configs):
+        lookups = list(_annotate_family(ip_lookup_configs))
+        for (host_name, _host_config, family), result in zip(
+            lookups,
+            _run_concurrently(
+                [functools.partial(lookup, *args) for args in lookups],
+                max_workers=max_workers,
+                timeout=timeout,
+            ),
+        ):
             console.verbose_no_lf(f"{host_name} ({family})...")
             try:
-                ip = lookup_ip_address(
-                    host_name=host_name,
-                    family=family,
-                    configured_ip_address=(
-                        configured_ipv4_addresses
-                        if family is socket.AF_INET
-                        else configured_ipv6_addresses
-                    ).get(host_name),
-                    simulation_mode=simulation_mode,
-                    is_snmp_usewalk_host=(
-                        host_config.is_use_walk_host and host_config.is_snmp_host
-                    ),
-                    override_dns=override_dns,
-                    is_dyndns_host=host_config.is_dyndns_host,
-                    force_file_cache_renewal=True,  # it's cleared anyway
-                )
+                ip = result.result()
                 console.verbose(f"{ip}")
 
             except (MKTerminate, MKTimeout):
@@ -402,6 +498,41 @@ def update_dns_cache(
     return len(ip_lookup_cache), failed
 
 
+def _run_concurrently(
+    lookups: Sequence[Callable[[threading.Event], HostAddress]], *, max_workers: int, timeout: float
+) -> Iterator[Future[HostAddress]]:
+    """Run the lookups in a thread pool and yield their results in order
+
+    The resolver can not be interrupted: a lookup running into the timeout
+    keeps its worker busy until the resolver gives up. The event passed to
+    such a lookup is set, so it can drop its result.
+    """
+    started: dict[int, float] = {}
+    cancelled = [threading.Event() for _lookup in lookups]
+
+    def run(index: int, lookup: Callable[[threading.Event], HostAddress]) -> HostAddress:
+        started[index] = time.monotonic()
+        return lookup(cancelled[index])
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ip_lookup")
+    try:
+        futures = [executor.submit(run, index, lookup) for index, lookup in enumerate(lookups)]
+        for index, future in enumerate(futures):
+            while not future.done():
+                remaining = started.get(index, time.monotonic()) + timeout - time.monotonic()
+                if remaining <= 0:
+                    cancelled[index].set()
+                    future = Future()
+                    future.set_exception(
+                        MKIPAddressLookupError(f"DNS lookup timed out after {timeout} seconds")
+                    )
+                    break
+                wait([future], timeout=remaining)
+            yield future
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
 def _annotate_family(
     ip_lookup_configs: Iterable[IPLookupConfig],
 ) -> Iterable[
@@ -146,9 +146,9 @@ def _make_livestatus_response(response: Response, output_format: str) -> str:
     if output_format == "json":
         # NOTE:
         #   need to ensure bytes are also strings, because json.dumps will throw an ValueError
-        #   otherwise. I assume they are encoded as utf-8.
+        #   otherwise. Like the core does it, they are encoded as latin-1.
         response = [
-            [x.decode("utf-8") if isinstance(x, bytes) else x for x in row] for row in response
+            [x.decode("latin-1") if isinstance(x, bytes) else x for x in row] for row in response
         ]
         data = json.dumps(response)
     elif output_format == "python":
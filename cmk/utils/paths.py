@@ -79,6 +79,8 @@ discovered_host_labels_dir = base_discovered_host_labels_dir
 autodiscovery_dir = _omd_path_str("var/check_mk/autodiscovery")
 piggyback_dir = Path(tmp_dir, "piggyback")
 piggyback_source_dir = Path(tmp_dir, "piggyback_sources")
+piggyback_segments_dir = Path(tmp_dir, "piggyback_segments")
+piggyback_hub_socket = _omd_path("tmp/run/piggyback-hub")
 profile_dir = Path(var_dir, "web")
 crash_dir = Path(var_dir, "crashes")
 diagnostics_dir = Path(var_dir, "diagnostics")
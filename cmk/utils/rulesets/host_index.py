@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Compact sets of hosts for the ruleset matching
+
+Every configured host gets an integer ID, a set of hosts is an integer with the
+bit of each contained host set (a bitmap). Compared to a set of host names this
+needs about one bit instead of a hundred bytes per host, and intersecting or
+joining host sets is a single bitwise operation.
+
+Python integers are not made for testing single bits, so the sets are
+additionally turned into bytes for the membership tests.
+"""
+
+from collections.abc import Iterable, Iterator, Sequence, Set
+
+from cmk.utils.hostaddress import HostAddress, HostName
+
+__all__ = ["HostIndex", "HostSet"]
+
+
+class HostIndex:
+    """Assigns the IDs to the hosts"""
+
+    def __init__(self, hosts: Iterable[HostName]) -> None:
+        self.hosts: Sequence[HostName] = list(dict.fromkeys(hosts))
+        self.ids: dict[HostName | HostAddress, int] = {
+            host: host_id for host_id, host in enumerate(self.hosts)
+        }
+        self.all = self.mask_of_ids(range(len(self.hosts)))
+
+    def __len__(self) -> int:
+        return len(self.hosts)
+
+    def mask_of_ids(self, host_ids: Iterable[int]) -> int:
+        bitmap = bytearray((len(self.hosts) + 7) // 8)
+        for host_id in host_ids:
+            bitmap[host_id >> 3] |= 1 << (host_id & 7)
+        return int.from_bytes(bitmap, "little")
+
+    def mask(self, hosts: Iterable[HostName | HostAddress]) -> int:
+        """Hosts which are not in the index are left out"""
+        ids = self.ids
+        return self.mask_of_ids(ids[host] for host in hosts if host in ids)
+
+    def ids_of(self, mask: int) -> Iterator[int]:
+        # Searching the binary representation is a lot faster than shifting
+        # the (possibly huge) integer for every bit.
+        bits = bin(mask)[:1:-1]
+        position = bits.find("1")
+        while position != -1:
+            yield position
+            position = bits.find("1", position + 1)
+
+    def hosts_of(self, mask: int) -> Iterator[HostName]:
+        hosts = self.hosts
+        return (hosts[host_id] for host_id in self.ids_of(mask))
+
+    def host_set(self, mask: int) -> "HostSet":
+        return HostSet(self, mask)
+
+
+class HostSet(Set[HostName]):
+    """An immutable set of the hosts of a HostIndex"""
+
+    __slots__ = ("_index", "mask", "_bitmap")
+
+    def __init__(self, index: HostIndex, mask: int) -> None:
+        self._index = index
+        self.mask = mask
+        self._bitmap: bytes | None = None
+
+    def __repr__(self) -> str:
+        return f"HostSet({sorted(self)!r})"
+
+    @classmethod
+    def _from_iterable(cls, it: Iterable[HostName]) -> frozenset[HostName]:
+        # The results of the set operations of the Set ABC (&, |, -, ^)
+        return frozenset(it)
+
+    def __len__(self) -> int:
+        return self.mask.bit_count()
+
+    def __iter__(self) -> Iterator[HostName]:
+        return self._index.hosts_of(self.mask)
+
+    def __contains__(self, host: object) -> bool:
+        if (host_id := self._index.ids.get(host)) is None:  # type: ignore[call-overload]
+            return False
+        return self.contains_id(host_id)
+
+    def contains_id(self, host_id: int) -> bool:
+        if (bitmap := self._bitmap) is None:
+            bitmap = self._bitmap = self.mask.to_bytes((len(self._index) + 7) // 8, "little")
+        return bool(bitmap[host_id >> 3] >> (host_id & 7) & 1)
@@ -6,6 +6,7 @@
 
 import contextlib
 import dataclasses
+import functools
 from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
 from re import Pattern
 from typing import (
@@ -42,6 +43,7 @@ from cmk.utils.servicename import Item, ServiceName
 from cmk.utils.tags import TagConfig, TagGroupID, TagID
 
 from .conditions import HostOrServiceConditions, HostOrServiceConditionsSimple
+from .host_index import HostIndex, HostSet
 
 RulesetName = str  # Could move to a less cluttered module as it is often used on its own.
 TRuleValue = TypeVar("TRuleValue")
@@ -99,7 +101,7 @@ PreprocessedServiceRuleset: TypeAlias = list[
     tuple[
         RuleID,
         TRuleValue,
-        set[HostName],
+        HostSet,
         LabelGroups,
         LabelGroupsCacheId,
         PreprocessedPattern,
@@ -263,7 +265,7 @@ class RulesetMatcher:
 
         # When the requested host is part of the local sites configuration,
         # then use only the sites hosts for processing the rules
-        with_foreign_hosts = hostname not in self.ruleset_optimizer.all_processed_hosts()
+        with_foreign_hosts = not self.ruleset_optimizer.is_processed_host(hostname)
 
         optimized_ruleset: Mapping[HostName | HostAddress, Sequence[TRuleValue]] = (
             self.ruleset_optimizer.get_host_ruleset(ruleset, with_foreign_hosts)
@@ -383,9 +385,7 @@ class RulesetMatcher:
         ruleset: Sequence[RuleSpec[TRuleValue]],
     ) -> Iterator[TRuleValue]:
         """Returns a generator of the values of the matched rules"""
-        with_foreign_hosts = (
-            match_object.host_name not in self.ruleset_optimizer.all_processed_hosts()
-        )
+        with_foreign_hosts = not self.ruleset_optimizer.is_processed_host(match_object.host_name)
         optimized_ruleset = self.ruleset_optimizer.get_service_ruleset(ruleset, with_foreign_hosts)
 
         ruleset_id = id(ruleset)
@@ -395,6 +395,15 @@ class RulesetMatcher:
             )
 
         never_matched = True
+        # The same for all rules, so hash the labels only once
+        service_key = (
+            match_object.service_description,
+            hash(
+                None
+                if match_object.service_labels is None
+                else frozenset(match_object.service_labels.items())
+            ),
+        )
         for (
             _rule_id,
             value,
@@ -410,14 +419,7 @@ class RulesetMatcher:
                 continue
 
             service_cache_id = (
-                (
-                    match_object.service_description,
-                    hash(
-                        None
-                        if match_object.service_labels is None
-                        else frozenset(match_object.service_labels.items())
-                    ),
-                ),
+                service_key,
                 service_description_condition,
                 service_label_groups_cache_id,
             )
@@ -491,6 +493,19 @@ ConditionCacheID: TypeAlias = tuple[
 ]
 
 
+class RulesetMatchCache(TypedDict):
+    """The host matching results of a RulesetOptimizer
+
+    The host sets are stored as the bitmaps of the host index, so they are only
+    valid together with the list of hosts.
+    """
+
+    hosts: Sequence[str]
+    processed_hosts: int
+    matching_hosts: Mapping[tuple[ConditionCacheID, bool], int]
+    labels_of_host: Mapping[str, Labels]
+
+
 class RulesetOptimizer:
     """Performs some precalculations on the configured rulesets to improve the
     processing performance"""
@@ -517,31 +532,31 @@ class RulesetOptimizer:
 
         self._all_configured_hosts = all_configured_hosts
 
+        # The host sets computed here are bitmaps of the hosts in this index
+        self._host_index = HostIndex(all_configured_hosts)
+
         # Contains all hostnames which are currently relevant for this cache.
         # Every active host or a subset of the active hosts when multiprocessing
         # is enabled.
         self._all_processed_hosts = self._all_configured_hosts
-
-        # A factor which indicates how much hosts share the same host tag configuration (excluding folders).
-        # len(all_processed_hosts) / len(different tag combinations)
-        # It is used to determine the best rule evualation method
-        self._all_processed_hosts_similarity = 1.0
+        self._processed_hosts = self._host_index.host_set(self._host_index.all)
 
         self.__service_ruleset_cache: dict[tuple[int, bool], PreprocessedServiceRuleset] = {}
         self.__host_ruleset_cache: dict[tuple[int, bool], Mapping[HostAddress, Sequence[Any]]] = {}
-        self._all_matching_hosts_match_cache: dict[tuple[ConditionCacheID, bool], set[HostName]] = (
-            {}
-        )
+        self._all_matching_hosts_match_cache: dict[tuple[ConditionCacheID, bool], HostSet] = {}
 
         # Reference dirname -> hosts in this dir including subfolders
-        self._folder_host_lookup: dict[tuple[bool, str], set[HostName]] = {}
+        self._folder_host_lookup: dict[tuple[bool, str], int] = {}
 
-        # Provides a list of hosts with the same hosttags, excluding the folder
-        self._hosts_grouped_by_tags: dict[tuple[tuple[TagGroupID, TagID], ...], set[HostName]] = {}
-        # Reference hostname -> tag group reference
-        self._host_grouped_ref: dict[HostName, tuple[tuple[TagGroupID, TagID], ...]] = {}
+        # Folder of the host -> hosts in exactly this folder
+        self._hosts_by_path: dict[str, int] = {}
+        # Tag -> hosts having the tag
+        self._hosts_by_tag: dict[tuple[TagGroupID, TagID], int] = {}
+        # Label -> hosts having the label. Computing the labels is expensive, so
+        # they are only added for the hosts which are checked for labels.
+        self._hosts_by_label: dict[tuple[str, str], int] = {}
+        self._label_indexed_hosts = 0
 
-        # TODO: Clean this one up?
         self._initialize_host_lookup()
 
         self._debug_matching_stats = debug_matching_stats
@@ -555,10 +570,64 @@ class RulesetOptimizer:
         self.__host_ruleset_cache.clear()
         self._all_matching_hosts_match_cache.clear()
 
+    def dump_match_cache(self) -> RulesetMatchCache:
+        """Returns the host matches computed so far, see load_match_cache()"""
+        return RulesetMatchCache(
+            hosts=[str(hostname) for hostname in self._host_index.hosts],
+            processed_hosts=self._processed_hosts.mask,
+            matching_hosts={
+                cache_id: hosts.mask
+                for cache_id, hosts in self._all_matching_hosts_match_cache.items()
+            },
+            labels_of_host={
+                str(hostname): labels for hostname, labels in self.__labels_of_host.items()
+            },
+        )
+
+    def load_match_cache(self, cache: RulesetMatchCache) -> bool:
+        """Take over the host matches dumped by an optimizer of the same configuration
+
+        The conditions are matched host by host, so the results can be used as long
+        as all hosts known here are contained in the cache. The matches restricted to
+        the processed hosts are only taken over if these are the same.
+        Returns whether the cache could be used.
+        """
+        index = self._host_index
+        if list(index.hosts) == cache["hosts"]:
+
+            def translate(mask: int) -> int:
+                return mask
+
+        else:
+            cached_index = HostIndex(cast(Sequence[HostName], cache["hosts"]))
+            if any(hostname not in cached_index.ids for hostname in index.hosts):
+                return False
+            id_map = [index.ids.get(hostname, -1) for hostname in cached_index.hosts]
+
+            def translate(mask: int) -> int:
+                host_ids = (id_map[cached_id] for cached_id in cached_index.ids_of(mask))
+                return index.mask_of_ids(host_id for host_id in host_ids if host_id != -1)
+
+        same_processed_hosts = translate(cache["processed_hosts"]) == self._processed_hosts.mask
+        for cache_id, mask in cache["matching_hosts"].items():
+            _condition_id, with_foreign_hosts = cache_id
+            if with_foreign_hosts or same_processed_hosts:
+                self._all_matching_hosts_match_cache.setdefault(
+                    cache_id, index.host_set(translate(mask))
+                )
+
+        for hostname, labels in cache["labels_of_host"].items():
+            if (host_id := index.ids.get(HostName(hostname))) is not None:
+                self.__labels_of_host.setdefault(index.hosts[host_id], labels)
+        return True
+
     def all_processed_hosts(self) -> Sequence[HostName]:
         """Returns a set of all processed hosts"""
         return self._all_processed_hosts
 
+    def is_processed_host(self, hostname: HostName | HostAddress) -> bool:
+        return hostname in self._processed_hosts
+
     def set_all_processed_hosts(self, all_processed_hosts: Iterable[HostName]) -> None:
         involved_clusters: set[HostName] = set()
         involved_nodes: set[HostName] = set()
@@ -573,27 +642,15 @@ class RulesetOptimizer:
         nodes_and_clusters = involved_clusters | involved_nodes | set(all_processed_hosts)
 
         # Only add references to configured hosts
-        nodes_and_clusters.intersection_update(self._all_configured_hosts)
-        self._all_processed_hosts = list(nodes_and_clusters)
+        processed_hosts = self._host_index.mask(nodes_and_clusters)
+        self._all_processed_hosts = list(self._host_index.hosts_of(processed_hosts))
+        self._processed_hosts = self._host_index.host_set(processed_hosts)
 
-        # The folder host lookup includes a list of all -processed- hosts within a given
+        # The folder host lookup includes all -processed- hosts within a given
         # folder. Any update with set_all_processed hosts invalidates this cache, because
-        # the scope of relevant hosts has changed. This is -good-, since the values in this
-        # lookup are iterated one by one later on in all_matching_hosts
+        # the scope of relevant hosts has changed.
         self._folder_host_lookup = {}
 
-        used_groups = {
-            self._host_grouped_ref.get(hostname, ()) for hostname in self._all_processed_hosts
-        }
-
-        if not used_groups:
-            self._all_processed_hosts_similarity = 1.0
-            return
-
-        self._all_processed_hosts_similarity = (
-            1.0 * len(self._all_processed_hosts) / len(used_groups)
-        )
-
     def _compute_all_matching_hosts_stats(
         self, ruleset_id: int, condition_id: tuple[ConditionCacheID, bool]
     ) -> None:
@@ -610,7 +667,7 @@ class RulesetOptimizer:
         self,
         ruleset_id: int,
         rule: RuleSpec[TRuleValue],
-        all_matching_hosts: set[HostName],
+        all_matching_hosts: HostSet,
     ) -> None:
         rule_id = rule.get("id", "MISSING_RULE_ID")
         for hostname in all_matching_hosts:
@@ -624,9 +681,9 @@ class RulesetOptimizer:
 
     def _get_matching_hosts(
         self, ruleset_id: int, rule: RuleSpec[TRuleValue], with_foreign_hosts: bool
-    ) -> set[HostName]:
+    ) -> HostSet:
         if is_disabled(rule):
-            return set()
+            return self._host_index.host_set(0)
 
         all_matching_hosts = self._all_matching_hosts(rule["condition"], with_foreign_hosts)
         if self._debug_matching_stats:
@@ -745,9 +802,9 @@ class RulesetOptimizer:
             with_foreign_hosts,
         )
 
-    def _all_matching_hosts(  # pylint: disable=too-many-branches
+    def _all_matching_hosts(
         self, condition: RuleConditionsSpec, with_foreign_hosts: bool
-    ) -> set[HostName]:
+    ) -> HostSet:
         """Returns a set containing the names of hosts that match the given
         tags and hostlist conditions."""
         hostlist = condition.get("host_name")
@@ -761,17 +818,10 @@ class RulesetOptimizer:
         except KeyError:
             pass
 
-        # Thin out the valid hosts further. If the rule is located in a folder
-        # we only need the intersection of the folders hosts and the previously determined valid_hosts
-        valid_hosts = self._get_hosts_within_folder(rule_path, with_foreign_hosts)
+        # Thin out the valid hosts step by step, the cheap bitmap operations first.
+        # If the rule is located in a folder we only need the hosts of the folder.
+        matching = self._get_hosts_within_folder(rule_path, with_foreign_hosts)
 
-        if tag_conditions and hostlist is None and not label_groups:
-            # TODO: Labels could also be optimized like the tags
-            matched_by_tags = self._match_hosts_by_tags(cache_id, valid_hosts, tag_conditions)
-            if matched_by_tags is not None:
-                return matched_by_tags
-
-        matching: set[HostName] = set()
         only_specific_hosts = (
             hostlist is not None
             and not isinstance(hostlist, dict)
@@ -779,46 +829,29 @@ class RulesetOptimizer:
         )
 
         if hostlist == []:
-            pass  # Empty host list -> Nothing matches
-
-        elif not tag_conditions and not label_groups and not hostlist:
-            # If no tags are specified and the hostlist only include @all (all hosts)
-            matching = valid_hosts
+            matching = 0  # Empty host list -> Nothing matches
 
-        elif (
-            not tag_conditions and not label_groups and only_specific_hosts and hostlist is not None
-        ):
-            # If no tags are specified and there are only specific hosts we already have the matches
-            matching = valid_hosts.intersection(hostlist)
-
-        else:
-            # If the rule has only exact host restrictions, we can thin out the list of hosts to check
-            if only_specific_hosts and hostlist is not None:
-                hosts_to_check = valid_hosts.intersection(hostlist)
-            else:
-                hosts_to_check = valid_hosts
-
-            for hostname in hosts_to_check:
-                # When no tag matching is requested, do not filter by tags. Accept all hosts
-                # and filter only by hostlist
-                if tag_conditions and not matches_host_tags(
-                    self._host_tags[hostname],
-                    tag_conditions,
-                ):
-                    continue
+        elif only_specific_hosts and hostlist is not None:
+            # Without regex conditions, the host list only contains host names
+            matching &= self._host_index.mask(cast(Sequence[HostName], hostlist))
 
-                if label_groups:
-                    host_labels = self.labels_of_host(hostname)
-                    if not matches_labels(host_labels, label_groups):
-                        continue
+        if matching and tag_conditions:
+            matching &= self._match_hosts_by_tags(tag_conditions)
 
-                if not matches_host_name(hostlist, hostname):
-                    continue
+        if matching and label_groups:
+            matching = self._match_hosts_by_labels(matching, label_groups)
 
-                matching.add(hostname)
+        if matching and hostlist and not only_specific_hosts:
+            # Regular expressions and negated host lists are matched host by host
+            matching = self._host_index.mask(
+                hostname
+                for hostname in self._host_index.hosts_of(matching)
+                if matches_host_name(hostlist, hostname)
+            )
 
-        self._all_matching_hosts_match_cache[cache_id] = matching
-        return matching
+        return self._all_matching_hosts_match_cache.setdefault(
+            cache_id, self._host_index.host_set(matching)
+        )
 
     @staticmethod
     def _condition_cache_id(
@@ -854,98 +887,107 @@ class RulesetOptimizer:
             rule_path,
         )
 
-    # TODO: Generalize this optimization: Build some kind of key out of the tag conditions
-    # (positive, negative, ...). Make it work with the new tag group based "$or" handling.
-    def _match_hosts_by_tags(
-        self,
-        cache_id: tuple[ConditionCacheID, bool],
-        valid_hosts: set[HostName],
-        tag_conditions: Mapping[TagGroupID, TagCondition],
-    ) -> set[HostName] | None:
-        matching = set()
-        negative_match_tags = set()
-        positive_match_tags = set()
+    def _match_hosts_by_tags(self, tag_conditions: Mapping[TagGroupID, TagCondition]) -> int:
+        """Returns the bitmap of the hosts matching the tag conditions"""
+        matching = self._host_index.all
         for taggroup_id, tag_condition in tag_conditions.items():
             if isinstance(tag_condition, dict):
                 if "$ne" in tag_condition:
-                    negative_match_tags.add(
-                        (
-                            taggroup_id,
-                            cast(TagConditionNE, tag_condition)["$ne"],
-                        )
+                    matching &= ~self._hosts_with_tag(
+                        taggroup_id, cast(TagConditionNE, tag_condition)["$ne"]
                     )
                     continue
 
                 if "$or" in tag_condition:
-                    return None  # Can not be optimized, makes _all_matching_hosts proceed
+                    matching &= self._hosts_with_any_tag(
+                        taggroup_id, cast(TagConditionOR, tag_condition)["$or"]
+                    )
+                    continue
 
                 if "$nor" in tag_condition:
-                    return None  # Can not be optimized, makes _all_matching_hosts proceed
+                    matching &= ~self._hosts_with_any_tag(
+                        taggroup_id, cast(TagConditionNOR, tag_condition)["$nor"]
+                    )
+                    continue
 
                 raise NotImplementedError()
 
-            positive_match_tags.add((taggroup_id, tag_condition))
-
-        # TODO:
-        # if has_specific_folder_tag or self._all_processed_hosts_similarity < 3.0:
-        if self._all_processed_hosts_similarity < 3.0:
-            # Without shared folders
-            for hostname in valid_hosts:
-                if positive_match_tags <= self._host_tags[
-                    hostname
-                ] and not negative_match_tags.intersection(self._host_tags[hostname]):
-                    matching.add(hostname)
-
-            self._all_matching_hosts_match_cache[cache_id] = matching
-            return matching
-
-        # With shared folders
-        checked_hosts: set[str] = set()
-        for hostname in valid_hosts:
-            if hostname in checked_hosts:
-                continue
+            matching &= self._hosts_with_tag(taggroup_id, tag_condition)
+        return matching
 
-            hosts_with_same_tag = self._filter_hosts_with_same_tags_as_host(hostname, valid_hosts)
-            checked_hosts.update(hosts_with_same_tag)
+    def _hosts_with_tag(self, taggroup_id: TagGroupID, tag_id: TagID | None) -> int:
+        return self._hosts_by_tag.get((taggroup_id, tag_id), 0)  # type: ignore[arg-type]
 
-            if positive_match_tags <= self._host_tags[
-                hostname
-            ] and not negative_match_tags.intersection(self._host_tags[hostname]):
-                matching.update(hosts_with_same_tag)
+    def _hosts_with_any_tag(self, taggroup_id: TagGroupID, tag_ids: Iterable[TagID | None]) -> int:
+        hosts = 0
+        for tag_id in tag_ids:
+            hosts |= self._hosts_with_tag(taggroup_id, tag_id)
+        return hosts
 
-        self._all_matching_hosts_match_cache[cache_id] = matching
-        return matching
+    def _match_hosts_by_labels(self, candidates: int, label_groups: LabelGroups) -> int:
+        """Returns the bitmap of the candidates matching the label groups
 
-    def _filter_hosts_with_same_tags_as_host(
-        self,
-        hostname: HostName,
-        hosts: set[HostName],
-    ) -> set[HostName]:
-        return self._hosts_grouped_by_tags[self._host_grouped_ref[hostname]].intersection(hosts)
+        Does the same as matches_labels(), but for all candidates at once.
+        """
+        self._index_labels(candidates)
+        matching = candidates
+        for group_operator, label_group in label_groups:
+            group_matching = candidates
+            for label_operator, label in label_group:
+                if not label:
+                    continue
+                group_matching = _and_or_not_mask(
+                    group_matching,
+                    self._hosts_by_label.get(_parse_label(label), 0),
+                    label_operator,
+                )
+            matching = _and_or_not_mask(matching, group_matching, group_operator)
+        return matching & candidates
 
-    def _get_hosts_within_folder(self, folder_path: str, with_foreign_hosts: bool) -> set[HostName]:
-        cache_id = with_foreign_hosts, folder_path
-        if cache_id not in self._folder_host_lookup:
-            hosts_in_folder = set()
-            relevant_hosts = (
-                self._all_configured_hosts if with_foreign_hosts else self._all_processed_hosts
-            )
+    def _index_labels(self, hosts: int) -> None:
+        if not (missing := hosts & ~self._label_indexed_hosts):
+            return
 
-            for hostname in relevant_hosts:
-                host_path = self._host_paths.get(hostname, "/")
-                if host_path.startswith(folder_path):
-                    hosts_in_folder.add(hostname)
+        host_ids_by_label: dict[tuple[str, str], list[int]] = {}
+        for host_id in self._host_index.ids_of(missing):
+            for label in self.labels_of_host(self._host_index.hosts[host_id]).items():
+                host_ids_by_label.setdefault(label, []).append(host_id)
 
-            self._folder_host_lookup[cache_id] = hosts_in_folder
-            return hosts_in_folder
+        for label, host_ids in host_ids_by_label.items():
+            self._hosts_by_label[label] = self._hosts_by_label.get(
+                label, 0
+            ) | self._host_index.mask_of_ids(host_ids)
+        self._label_indexed_hosts |= missing
 
-        return self._folder_host_lookup[cache_id]
+    def _get_hosts_within_folder(self, folder_path: str, with_foreign_hosts: bool) -> int:
+        cache_id = with_foreign_hosts, folder_path
+        with contextlib.suppress(KeyError):
+            return self._folder_host_lookup[cache_id]
+
+        hosts_in_folder = 0
+        for host_path, hosts in self._hosts_by_path.items():
+            if host_path.startswith(folder_path):
+                hosts_in_folder |= hosts
+        if not with_foreign_hosts:
+            hosts_in_folder &= self._processed_hosts.mask
+
+        return self._folder_host_lookup.setdefault(cache_id, hosts_in_folder)
 
     def _initialize_host_lookup(self) -> None:
-        for hostname in self._all_configured_hosts:
-            group_ref = tuple(sorted(self._host_tags[hostname]))
-            self._hosts_grouped_by_tags.setdefault(group_ref, set()).add(hostname)
-            self._host_grouped_ref[hostname] = group_ref
+        host_ids_by_path: dict[str, list[int]] = {}
+        host_ids_by_tag: dict[tuple[TagGroupID, TagID], list[int]] = {}
+        for hostname, host_id in self._host_index.ids.items():
+            host_ids_by_path.setdefault(self._host_paths.get(hostname, "/"), []).append(host_id)
+            for tag in self._host_tags.get(hostname, ()):
+                host_ids_by_tag.setdefault(tag, []).append(host_id)
+
+        self._hosts_by_path = {
+            path: self._host_index.mask_of_ids(host_ids)
+            for path, host_ids in host_ids_by_path.items()
+        }
+        self._hosts_by_tag = {
+            tag: self._host_index.mask_of_ids(host_ids) for tag, host_ids in host_ids_by_tag.items()
+        }
 
     def labels_of_host(self, hostname: HostName) -> Labels:
         """Returns the effective set of host labels from all available sources
@@ -1148,10 +1190,7 @@ def matches_labels(object_labels: Labels | None, required_label_groups: LabelGro
                     break
                 continue
 
-            try:
-                key, value = label.split(":")
-            except Exception:
-                raise NotImplementedError(f"HALLO DORT: wird hier zu wenig entpackt?  --  {label}")
+            key, value = _parse_label(label)
             label_match: bool = value == object_labels.get(key)
             group_match = _and_or_not_group_match(group_match, label_match, label_operator)
 
@@ -1160,6 +1199,26 @@ def matches_labels(object_labels: Labels | None, required_label_groups: LabelGro
     return overall_match
 
 
+@functools.cache
+def _parse_label(label: str) -> tuple[str, str]:
+    try:
+        key, value = label.split(":")
+    except Exception:
+        raise NotImplementedError(f"HALLO DORT: wird hier zu wenig entpackt?  --  {label}")
+    return key, value
+
+
+def _and_or_not_mask(given_hosts: int, new_hosts: int, operator: AndOrNotLiteral) -> int:
+    """Like _and_or_not_group_match(), but for the host bitmaps"""
+    match operator:
+        case "and":
+            return given_hosts & new_hosts
+        case "or":
+            return given_hosts | new_hosts
+        case "not":
+            return given_hosts & ~new_hosts
+
+
 def _and_or_not_group_match(
     given_group_match: bool, new_single_match: bool, operator: AndOrNotLiteral
 ) -> bool:
@@ -17,6 +17,7 @@ import json
 import os
 import re
 import select
+import selectors
 import socket
 import ssl
 import threading
@@ -127,6 +128,8 @@ LivestatusResponse = NewType("LivestatusResponse", list[LivestatusRow])
 #         The cmc encodes this column with latin-1 and sends it as string
 #         After json.loads it needs to be encoded with latin-1 (again) to convert it to a
 #         bytes like object
+#       Queries with a known column layout are sent with the JSON format and have their
+#       blob columns converted this way (see Query.blob_column_positions).
 class LivestatusOutputFormat(Enum):
     PYTHON = "python3"
     JSON = "json"
@@ -391,6 +394,60 @@ def get_livestatus_blob_columns() -> set[LivestatusColumn]:
     }
 
 
+def _blob_column_positions(query: str) -> list[int] | None:
+    """Return the positions of the blob columns in the rows of the query
+
+    None is returned in case the layout of the rows is unknown, e.g. when all
+    columns of a table are requested.
+
+    >>> _blob_column_positions("GET hosts\\nColumns: name mk_inventory_gz\\nFilter: name = h")
+    [1]
+    >>> _blob_column_positions("GET services\\nColumns: prediction_file:file:cpu.info")
+    [0]
+    >>> _blob_column_positions("GET services\\nStats: state = 0")
+    []
+    >>> _blob_column_positions("GET hosts") is None
+    True
+    """
+    columns: list[str] = []
+    has_stats = show_column_headers = False
+    for line in query.splitlines():
+        header, _sep, value = line.partition(":")
+        match header:
+            case "Columns":
+                columns.extend(value.split())
+            case "Stats":
+                has_stats = True
+            case "ColumnHeaders":
+                show_column_headers = value.strip() == "on"
+            case "OutputFormat":
+                return None  # The query asks for a specific format on its own
+    if not columns and not has_stats:
+        return None
+
+    blob_columns = get_livestatus_blob_columns()
+    positions = [
+        position
+        for position, column in enumerate(columns)
+        # Dynamic columns (e.g. "prediction_file:file:...") are blobs, except for
+        # the RRD columns which are lists and are left alone by _decode_blobs().
+        if column in blob_columns or ":" in column
+    ]
+    if positions and show_column_headers:
+        return None  # The header row must not be treated like the data rows
+    return positions
+
+
+def _decode_blobs(rows: LivestatusResponse, positions: Sequence[int]) -> LivestatusResponse:
+    """Turn the blobs of JSON responses into bytes, like they are in the python3 format"""
+    if positions:
+        for row in rows:
+            for position in positions:
+                if isinstance(value := row[position], str):
+                    row[position] = value.encode("latin-1")
+    return rows
+
+
 @dataclass
 class QuerySpecification:
     table: str
@@ -405,7 +462,7 @@ class QuerySpecification:
         return query
 
     def supports_json_format(self) -> bool:
-        return not set(self.columns).intersection(get_livestatus_blob_columns())
+        return _blob_column_positions(str(self)) is not None
 
 
 # TODO: Add more functionality to the Query class:
@@ -440,9 +497,17 @@ class Query:
         return self._query
 
     def supports_json_format(self) -> bool:
-        if not isinstance(self._query, QuerySpecification):
-            return False
-        return self._query.supports_json_format()
+        return self.blob_column_positions() is not None
+
+    def blob_column_positions(self) -> list[int] | None:
+        """Positions of the blob columns, None if the response can only be read as python3
+
+        JSON is a lot faster to decode than the python3 format, but it does not
+        know bytes: blobs are rendered as latin-1 strings. The response can
+        only be decoded from JSON if the positions of the blob columns are
+        known, so they can be turned into bytes again.
+        """
+        return _blob_column_positions(str(self))
 
 
 QueryTypes = str | Query
@@ -505,6 +570,96 @@ Must begin with 'tcp:', 'tcp6:' or 'unix:'
     )
 
 
+_RESPONSE_HEADER_SIZE = 16
+_RESPONSE_BODY_TIMEOUT = 30.0
+
+
+def _parse_response_header(header: bytes) -> tuple[str, int]:
+    """Return the status code and the length of a "fixed16" response header"""
+    try:
+        # Headers are always ASCII encoded
+        return header[0:3].decode("ascii"), int(header[4:15].lstrip())
+    except Exception:
+        raise MKLivestatusSocketError(
+            f"Malformed response header {header!r}. Livestatus TCP socket might be "
+            "unreachable or wrong encryption settings are used."
+        )
+
+
+def _check_response(code: str, data: bytes) -> bytes:
+    """Return the data of a successful response, raise the matching exception otherwise"""
+    if code == "200":
+        return data
+
+    error_info = data.decode("utf-8")
+    if code == "404":
+        raise MKLivestatusTableNotFoundError(f"Not Found ({code}): {error_info!r}")
+
+    if code == "413":
+        raise MKLivestatusPayloadTooLargeError(error_info)
+
+    if code == "502":
+        raise MKLivestatusBadGatewayError(error_info)
+
+    raise MKLivestatusQueryError(f"{code}: {error_info}")
+
+
+def _decode_response(data: str, blob_positions: Sequence[int] | None) -> LivestatusResponse:
+    """Decode a JSON response, or a python3 one if the blob positions are unknown"""
+    try:
+        if blob_positions is None:
+            return LivestatusResponse(ast.literal_eval(data))
+        return _decode_blobs(LivestatusResponse(json.loads(data)), blob_positions)
+    except (ValueError, SyntaxError):
+        raise MKLivestatusQueryError("Malformed raw response output")
+
+
+# Bytes of the response body to receive before decoding the rows in it
+_STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+class _RowDecoder:
+    """Decodes the rows of a response body while it is being received
+
+    Livestatus renders one row per line (line breaks in values are always
+    escaped), so each piece of complete lines can be decoded on its own. This
+    avoids holding the whole body as bytes, as str and as rows at the same time.
+    """
+
+    def __init__(self, blob_positions: Sequence[int] | None) -> None:
+        self._blob_positions = blob_positions
+        self._pending = b""
+        self._first = True
+
+    def feed(self, data: bytes) -> LivestatusResponse:
+        """Decode the rows which have been completely received"""
+        data = self._pending + data
+        # The last line may contain the closing bracket of the body, so it is
+        # only decoded once there is more data or the body is complete.
+        end = data.rfind(b"\n", 0, len(data) - 1) + 1
+        self._pending = data[end:]
+        return self._decode(data[:end], last=False)
+
+    def close(self) -> LivestatusResponse:
+        """Decode the remaining rows after the body has been received completely"""
+        data, self._pending = self._pending, b""
+        return self._decode(data, last=True)
+
+    def _decode(self, data: bytes, last: bool) -> LivestatusResponse:
+        text = data.decode("utf-8").strip()
+        if not text and not last:
+            return LivestatusResponse([])
+
+        if self._first:
+            text = text.removeprefix("[")
+            self._first = False
+        text = text.removesuffix("]") if last else text.removesuffix(",")
+        if not text.strip():
+            return LivestatusResponse([])
+
+        return _decode_response(f"[{text}]", self._blob_positions)
+
+
 class SingleSiteConnection(Helpers):
     # So we only collect in a specific thread, and not in all of them. We also use
     # a class-variable for this case, so we activate this across all sites at once.
@@ -693,6 +848,62 @@ class SingleSiteConnection(Helpers):
                 self.disconnect()
                 raise
 
+    def query_rows(self, query: QueryTypes, add_headers: str = "") -> Iterator[LivestatusRow]:
+        """Like query(), but yield the rows while the response is being received
+
+        The response is never held in memory as a whole, which matters for
+        large responses, e.g. of the log and statehist tables. The connection
+        can not be used for other queries until all rows have been consumed, it
+        is disconnected in case the iteration is stopped early.
+        """
+        normalized_query = Query(query) if not isinstance(query, Query) else query
+        if self.limit is not None:
+            normalized_query = Query(
+                "%sLimit: %d\n" % (normalized_query, self.limit),
+                normalized_query.suppress_exceptions,
+            )
+
+        with _livestatus_output_format_switcher(normalized_query, self):
+            str_query = self.build_query(normalized_query, add_headers)
+        self.send_query(str_query)
+        for row in self.receive_rows(str_query, normalized_query):
+            if self.prepend_site:
+                row.insert(0, b"")
+            yield row
+
+    def receive_rows(self, query: str, query_obj: Query) -> Iterator[LivestatusRow]:
+        """Receive the response to the query which has been sent and yield its rows"""
+        try:
+            header = self.receive_data(_RESPONSE_HEADER_SIZE)
+        except (MKLivestatusSocketClosed, OSError):
+            # Let receive_raw_response() deal with reconnecting, nothing has been read yet
+            yield from self.parse_raw_response(
+                self.receive_raw_response(query, query_obj.suppress_exceptions), query_obj
+            )
+            return
+
+        try:
+            code, length = _parse_response_header(header)
+        except MKLivestatusSocketError:
+            self.disconnect()
+            raise
+        if code != "200":
+            _check_response(code, self.receive_data(length, _RESPONSE_BODY_TIMEOUT))
+
+        complete = False
+        try:
+            decoder = _RowDecoder(query_obj.blob_column_positions())
+            while length > 0:
+                chunk = self.receive_data(min(length, _STREAM_CHUNK_SIZE), _RESPONSE_BODY_TIMEOUT)
+                length -= len(chunk)
+                yield from decoder.feed(chunk)
+            yield from decoder.close()
+            complete = True
+        finally:
+            if not complete:
+                # The rest of the response is still waiting in the socket
+                self.disconnect()
+
     def build_query(self, query_obj: Query, add_headers: str) -> str:
         # Prevent injection of further livestatus commands inside AuthUser header.
         if "\n" in self.auth_header[:-1]:
@@ -745,38 +956,18 @@ class SingleSiteConnection(Helpers):
         timeout_at: float | None = None,
     ) -> bytes:
         try:
-            # Headers are always ASCII encoded
-            resp = self.receive_data(16)
-            code = resp[0:3].decode("ascii")
+            header = self.receive_data(_RESPONSE_HEADER_SIZE)
             try:
-                length = int(resp[4:15].lstrip())
-            except Exception:
+                code, length = _parse_response_header(header)
+            except MKLivestatusSocketError:
                 self.disconnect()
-                raise MKLivestatusSocketError(
-                    f"Malformed response header {resp!r}. Livestatus TCP socket might be "
-                    "unreachable or wrong encryption settings are used."
-                )
+                raise
 
             # Apply a lower timeout for the content because the data is already available
             # in the socket. The liveproxyd (same system) has the complete data available
             # while the data from a standard connection can still take some time.
             # 30 seconds should be more than enough for the maximum telegram size of 100MB
-            data = self.receive_data(length, 30)
-
-            if code == "200":
-                return data
-
-            error_info = data.decode("utf-8")
-            if code == "404":
-                raise MKLivestatusTableNotFoundError(f"Not Found ({code}): {error_info!r}")
-
-            if code == "413":
-                raise MKLivestatusPayloadTooLargeError(error_info)
-
-            if code == "502":
-                raise MKLivestatusBadGatewayError(error_info)
-
-            raise MKLivestatusQueryError(f"{code}: {error_info}")
+            return _check_response(code, self.receive_data(length, _RESPONSE_BODY_TIMEOUT))
 
         except (MKLivestatusSocketClosed, OSError) as e:
             # In case of an IO error or the other side having
@@ -817,14 +1008,7 @@ class SingleSiteConnection(Helpers):
             raise MKLivestatusSocketError("Unhandled exception: %s" % e)
 
     def parse_raw_response(self, raw_response: bytes, query: Query) -> LivestatusResponse:
-        data = raw_response.decode("utf-8")
-        try:
-            response: LivestatusResponse = (
-                json.loads(data) if query.supports_json_format() else ast.literal_eval(data)
-            )
-            return response
-        except (ValueError, SyntaxError):
-            raise MKLivestatusQueryError("Malformed raw response output")
+        return _decode_response(raw_response.decode("utf-8"), query.blob_column_positions())
 
     def set_prepend_site(self, p: bool) -> None:
         self.prepend_site = p
@@ -929,6 +1113,87 @@ class ConnectedSite(NamedTuple):
 ConnectedSites = list[ConnectedSite]
 
 
+class _PendingResponse:
+    """Receives and decodes the response of one site piece by piece, whenever data arrives"""
+
+    def __init__(self, connected_site: ConnectedSite, query: Query, str_query: str) -> None:
+        self.connected_site = connected_site
+        self.query = query
+        self.str_query = str_query
+        self.sent_at = time.monotonic()
+        self.body_deadline: float | None = None
+        # The connection broke while receiving, so the response has to be
+        # received the blocking way, which reconnects and sends the query again.
+        self.retry = False
+        self.error: Exception | None = None
+        self._code: str | None = None
+        self._length = _RESPONSE_HEADER_SIZE  # first the header, then the body
+        self._received = 0
+        self._buffer = bytearray()
+        self._decoder: _RowDecoder | None = None
+        self._rows: list[LivestatusRow] = []
+
+    @property
+    def socket(self) -> socket.socket:
+        if (sock := self.connected_site.connection.socket) is None:
+            raise MKLivestatusSocketClosed(
+                "Socket to '%s' is not connected" % self.connected_site.connection.socketurl
+            )
+        return sock
+
+    def receive(self) -> bool:
+        """Read the available data, return whether the response is complete"""
+        packet = self.socket.recv(min(self._length - self._received, _STREAM_CHUNK_SIZE))
+        if not packet:
+            raise MKLivestatusSocketClosed(
+                "Read zero data from socket, remote peer closed connection."
+            )
+        self._received += len(packet)
+        if self._decoder is not None:
+            self._rows.extend(self._decoder.feed(packet))
+        else:
+            self._buffer += packet
+        if self._received < self._length:
+            return False
+
+        if self._code is not None:
+            if self._decoder is not None:
+                self._rows.extend(self._decoder.close())
+            return True
+
+        self._code, self._length = _parse_response_header(bytes(self._buffer))
+        self._received = 0
+        self._buffer = bytearray()
+        if self._code == "200":
+            # Successful responses are decoded right away, error messages are kept
+            self._decoder = _RowDecoder(self.query.blob_column_positions())
+        self.body_deadline = time.monotonic() + _RESPONSE_BODY_TIMEOUT
+        if self._length == 0 and self._decoder is not None:
+            self._rows.extend(self._decoder.close())
+        return self._length == 0
+
+    def rows(self) -> LivestatusResponse:
+        connection = self.connected_site.connection
+        if self.retry:
+            return connection.parse_raw_response(
+                connection.receive_raw_response(self.str_query, self.query.suppress_exceptions),
+                self.query,
+            )
+        if isinstance(self.error, MKLivestatusQueryError):
+            raise self.error  # malformed rows, like from parse_raw_response()
+        try:
+            if self.error is not None:
+                raise self.error
+            assert self._code is not None
+            _check_response(self._code, bytes(self._buffer))
+        except self.query.suppress_exceptions:
+            raise
+        except Exception as e:
+            # Same as SingleSiteConnection.receive_raw_response()
+            raise MKLivestatusSocketError("Unhandled exception: %s" % e)
+        return LivestatusResponse(self._rows)
+
+
 class MultiSiteConnection(Helpers):
     def __init__(  # pylint: disable=too-many-branches
         self, sites: SiteConfigurations, disabled_sites: SiteConfigurations | None = None
@@ -943,6 +1208,9 @@ class MultiSiteConnection(Helpers):
         self.only_sites: OnlySites = None
         self.limit: int | None = None
         self.parallelize = True
+        # Seconds until the complete response of each site of the last parallel query
+        # was received and parsed
+        self.response_times: dict[SiteId, float] = {}
 
         # Status host: A status host helps to prevent trying to connect
         # to a remote site which is unreachable. This is done by looking
@@ -1197,11 +1465,95 @@ class MultiSiteConnection(Helpers):
         query: Query,
         add_headers: str = "",
     ) -> LivestatusResponse:
-        stillalive = []
+        pending, stillalive = self._send_queries(query, add_headers)
+
+        # Receive the responses from all sites at once and parse each of them as soon
+        # as it is complete, so only the waiting is as slow as the slowest site.
+        self.response_times = {}
+        site_rows: dict[SiteId, list[LivestatusRow]] = {}
+        for response in self._receive_responses(pending):
+            connected_site = response.connected_site
+            try:
+                rows = response.rows()
+            except query.suppress_exceptions:
+                # Mostly handles exception types MKLivestatusTableNotFoundError
+                stillalive.append(connected_site)
+                continue
+            except LivestatusTestingError:
+                raise
+            except Exception as e:
+                connected_site.connection.disconnect()
+                self.deadsites[connected_site.id] = {
+                    "exception": e,
+                    "site": connected_site.config,
+                }
+                continue
+
+            self.response_times[connected_site.id] = time.monotonic() - response.sent_at
+            stillalive.append(connected_site)
+            if self.prepend_site:
+                for row in rows:
+                    row.insert(0, connected_site.id)
+            site_rows[connected_site.id] = rows
+
+        # Keep the order of the sites independent of their response times
+        result: list[LivestatusRow] = []
+        for response in pending:
+            result.extend(site_rows.get(response.connected_site.id, []))
+
+        self.connections = stillalive
+        return LivestatusResponse(result)
+
+    def query_rows(self, query: QueryTypes, add_headers: str = "") -> Iterator[LivestatusRow]:
+        """Like query(), but yield the rows while the responses are being received
+
+        All sites are queried at once, their rows are yielded site by site. As
+        with query_parallel(), the Limit: is applied to each site. A site which
+        fails in the middle of its response is marked as dead, the rows already
+        yielded are not taken back.
+        """
+        normalized_query = Query(query) if not isinstance(query, Query) else query
+        with _livestatus_output_format_switcher(normalized_query, self):
+            pending, stillalive = self._send_queries(normalized_query, add_headers)
+
+        try:
+            while pending:
+                connected_site = pending[0].connected_site
+                try:
+                    for row in connected_site.connection.receive_rows(
+                        pending[0].str_query, normalized_query
+                    ):
+                        if self.prepend_site:
+                            row.insert(0, connected_site.id)
+                        yield row
+                    stillalive.append(connected_site)
+                except normalized_query.suppress_exceptions:
+                    stillalive.append(connected_site)
+                except LivestatusTestingError:
+                    raise
+                except Exception as e:
+                    connected_site.connection.disconnect()
+                    self.deadsites[connected_site.id] = {
+                        "exception": e,
+                        "site": connected_site.config,
+                    }
+                del pending[0]
+        finally:
+            # Stopped early: the unread responses would confuse the next queries
+            for response in pending:
+                response.connected_site.connection.disconnect()
+                stillalive.append(response.connected_site)
+            self.connections = stillalive
+
+    def _send_queries(
+        self, query: Query, add_headers: str
+    ) -> tuple[list[_PendingResponse], ConnectedSites]:
+        """Send the query to all sites, return the pending responses and the unused sites"""
+        unused = []
         if self.only_sites is not None:
             connect_to_sites = [c for c in self.connections if c[0] in self.only_sites]
             # Unused sites are assumed to be alive
-            stillalive.extend([c for c in self.connections if c[0] not in self.only_sites])
+            unused.extend([c for c in self.connections if c[0] not in self.only_sites])
         else:
             connect_to_sites = self.connections
 
@@ -1211,13 +1563,12 @@ class MultiSiteConnection(Helpers):
         else:
             limit_header = ""
 
-        # First send all queries
-        retrieve_responses: list[tuple[str, ConnectedSite]] = []
+        pending: list[_PendingResponse] = []
         for connected_site in connect_to_sites:
             try:
                 str_query = connected_site.connection.build_query(query, add_headers + limit_header)
                 connected_site.connection.send_query(str_query)
-                retrieve_responses.append((str_query, connected_site))
+                pending.append(_PendingResponse(connected_site, query, str_query))
             except LivestatusTestingError:
                 raise
             except Exception as e:
@@ -1225,56 +1576,56 @@ class MultiSiteConnection(Helpers):
                     "exception": e,
                     "site": connected_site.config,
                 }
+        return pending, unused
+
+    @staticmethod
+    def _receive_responses(pending: Sequence[_PendingResponse]) -> Iterator[_PendingResponse]:
+        """Receive from all sites at once, yield the responses as soon as they are complete"""
+        failed: list[_PendingResponse] = []
+        with selectors.DefaultSelector() as selector:
+            for response in pending:
+                try:
+                    selector.register(response.socket, selectors.EVENT_READ, response)
+                except (KeyError, ValueError, OSError, MKLivestatusSocketClosed):
+                    response.retry = True
+                    failed.append(response)
+
+            while receiving := [key.data for key in selector.get_map().values()]:
+                # Decrypted data of TLS connections may already be buffered, which
+                # select() does not know about.
+                readable = [
+                    r
+                    for r in receiving
+                    if isinstance(r.socket, ssl.SSLSocket) and r.socket.pending()
+                ] or [key.data for key, _mask in selector.select(timeout=0.1)]
+
+                now = time.monotonic()
+                for response in receiving:
+                    if response in readable:
+                        try:
+                            if not response.receive():
+                                continue
+                        except LivestatusTestingError:
+                            raise
+                        except (MKLivestatusSocketClosed, OSError):
+                            response.retry = True
+                        except Exception as e:
+                            response.error = e
+                    elif response.body_deadline is None or response.body_deadline > now:
+                        continue
+                    else:
+                        response.error = MKLivestatusSocketError(
+                            f"{_RESPONSE_BODY_TIMEOUT}s while reading data from socket"
+                        )
 
-        # Then retrieve all raw responses. We will be as slow as the slowest of all connections.
-        site_responses: list[tuple[ConnectedSite, bytes]] = []
-        for str_query, connected_site in retrieve_responses:
-            try:
-                site_responses.append(
-                    (
-                        connected_site,
-                        connected_site.connection.receive_raw_response(
-                            str_query, query.suppress_exceptions
-                        ),
-                    )
-                )
-            except query.suppress_exceptions:
-                # Mostly handles exception types MKLivestatusTableNotFoundError
-                stillalive.append(connected_site)
-                continue
-            except LivestatusTestingError:
-                raise
-            except Exception as e:
-                connected_site.connection.disconnect()
-                self.deadsites[connected_site.id] = {
-                    "exception": e,
-                    "site": connected_site.config,
-                }
-
-        # Convert responses to python format
-        result: list[LivestatusRow] = []
-        for connected_site, raw_response in site_responses:
-            try:
-                rows = connected_site.connection.parse_raw_response(raw_response, query)
-                stillalive.append(connected_site)
-                if self.prepend_site:
-                    for row in rows:
-                        row.insert(0, connected_site.id)
-                result.extend(rows)
-            except query.suppress_exceptions:
-                stillalive.append(connected_site)
-                continue
-            except LivestatusTestingError:
-                raise
-            except Exception as e:
-                connected_site.connection.disconnect()
-                self.deadsites[connected_site.id] = {
-                    "exception": e,
-                    "site": connected_site.config,
-                }
+                    selector.unregister(response.socket)
+                    if response.retry:
+                        failed.append(response)
+                    else:
+                        yield response
 
-        self.connections = stillalive
-        return LivestatusResponse(result)
+        # Retry these at last, they would otherwise block receiving from the other sites
+        yield from failed
 
     def command(self, command: str, sitename: SiteId | None = SiteId("local")) -> None:
         if sitename in self.deadsites:
@@ -102,6 +102,7 @@ test_types = [
     "plugins_integration",
     "extension_compatibility",
     "testlib",
+    "performance",
 ]
 
 
@@ -300,7 +301,8 @@ def _patch_cmk_utils() -> bool:
     detecting whether the test run is an `xdist` based run (parallel unit-test runs).
     """
     try:
-        is_unit_test = sys.argv[sys.argv.index("-T") + 1] == "unit"
+        # performance tests benchmark the same code as the unit tests in the same environment
+        is_unit_test = sys.argv[sys.argv.index("-T") + 1] in ("unit", "performance")
     except ValueError as _:
         # default pytest '-T' value is 'unit'
         is_unit_test = True
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmarks of performance critical code paths
+
+The benchmarks report their timings in the terminal summary. Set the
+environment variable BENCHMARK_RESULTS to a file name to additionally append
+the results as JSON lines to that file, which allows tracking them over time.
+"""
+
+import json
+import os
+import statistics
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass, field
+
+import pytest
+
+_RESULTS: list["BenchmarkResult"] = []
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    benchmark: str
+    case: str
+    rounds: int
+    best: float
+    mean: float
+    extra: dict[str, float] = field(default_factory=dict)
+    # Throughput of the best round, if the number of processed items is known
+    items_per_second: float | None = None
+
+
+class Benchmark:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __call__(
+        self,
+        case: str,
+        function: Callable[[], object],
+        *,
+        rounds: int = 5,
+        items: int | None = None,
+        **extra: float,
+    ) -> BenchmarkResult:
+        """Call `function` `rounds` times and record the wall clock times
+
+        Pass the number of items (rows, events, ...) processed by each call as
+        `items` to have the throughput reported as well.
+        """
+        timings = []
+        for _round in range(rounds):
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+
+        result = BenchmarkResult(
+            benchmark=self.name,
+            case=case,
+            rounds=rounds,
+            best=min(timings),
+            mean=statistics.mean(timings),
+            extra=extra,
+            items_per_second=None if items is None else items / max(min(timings), 1e-9),
+        )
+        _RESULTS.append(result)
+        return result
+
+
+@pytest.fixture(name="benchmark")
+def fixture_benchmark(request: pytest.FixtureRequest) -> Iterator[Benchmark]:
+    yield Benchmark(request.node.name)
+
+
+def pytest_terminal_summary(terminalreporter: pytest.TerminalReporter) -> None:
+    if not _RESULTS:
+        return
+
+    terminalreporter.section("benchmark results")
+    for result in _RESULTS:
+        terminalreporter.write_line(
+            f"{result.benchmark:<50} {result.case:<40} "
+            f"best {result.best * 1000:10.3f} ms  mean {result.mean * 1000:10.3f} ms"
+            + "".join(f"  {k} {v:g}" for k, v in result.extra.items())
+            + (
+                ""
+                if result.items_per_second is None
+                else f"  {result.items_per_second:.0f} items/s"
+            )
+        )
+
+    if not (results_file := os.environ.get("BENCHMARK_RESULTS")):
+        return
+
+    timestamp = time.time()
+    with open(results_file, "a") as f:
+        for result in _RESULTS:
+            f.write(json.dumps({"timestamp": timestamp, **asdict(result)}) + "\n")
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmarks of compiling the configuration files
+
+The synthetic rules.mk resembles the one of a folder with many rules: a few
+dozen rulesets with some rules each, written the way the setup writes them.
+"""
+
+from pathlib import Path
+
+from tests.performance.conftest import Benchmark
+
+from cmk.ccc import store
+
+
+def _rules_mk(num_rulesets: int, rules_per_ruleset: int) -> str:
+    lines = []
+    for r in range(num_rulesets):
+        lines.append(f"globals().setdefault('ruleset{r}', [])\n")
+        lines.append(f"ruleset{r} = [")
+        lines += (
+            f"{{'id': '{r:08x}-{n:04x}', 'value': {{'levels': ({n}.0, {n * 2}.0),"
+            f" 'name': 'rule {n}'}}, 'condition': {{'host_folder': '/%s/' % FOLDER_PATH,"
+            f" 'host_tags': {{'criticality': 'prod', 'networking': {{'$ne': 'wan'}}}},"
+            f" 'host_name': ['host{n}', 'host{n + 1}']}}, 'options': {{'disabled': False}}}},"
+            for n in range(rules_per_ruleset)
+        )
+        lines.append(f"] + ruleset{r}\n")
+    return "\n".join(lines)
+
+
+def test_compile_config_file(benchmark: Benchmark, tmp_path: Path) -> None:
+    source = _rules_mk(50, 20)
+    filename = str(tmp_path / "rules.mk")
+    code_cache = store.CodeCache(tmp_path / "cache")
+    kib = len(source) // 1024
+
+    benchmark("compile", lambda: compile(source, filename, "exec"), rounds=5, items=1, kib=kib)
+    code_cache.compile(source, filename)
+    benchmark(
+        "CodeCache.compile (hit)",
+        lambda: code_cache.compile(source, filename),
+        rounds=20,
+        items=1,
+        kib=kib,
+    )
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import random
+
+import pytest
+
+from tests.performance.conftest import Benchmark
+
+from livestatus import SiteId
+
+from cmk.utils.hostaddress import HostName
+
+import cmk.ec.export as ec
+from cmk.ec.rule_index import RuleIndex
+from cmk.ec.rule_matcher import compile_rule, RuleMatcher
+
+_WORDS = [f"word{i}" for i in range(500)]
+
+
+def _rules(num_rules: int) -> list[ec.Rule]:
+    rng = random.Random(42)
+    rules = []
+    for n in range(num_rules):
+        rule = ec.Rule(id=f"rule{n}", pack="pack")
+        match n % 4:
+            case 0:
+                rule["match"] = f"{rng.choice(_WORDS)} {rng.choice(_WORDS)} failed"
+            case 1:
+                rule["match"] = rf"^{rng.choice(_WORDS)}: (.*) on device (\d+)$"
+            case 2:
+                rule["match_host"] = f"host{rng.randrange(1000)}"
+                rule["match"] = rng.choice(_WORDS)
+            case _:
+                rule["match_application"] = rng.choice(_WORDS)
+                rule["match"] = rf"(\w+) {rng.choice(_WORDS)}"
+        compile_rule(rule)
+        rules.append(rule)
+    return rules
+
+
+def _events(num_events: int) -> list[ec.Event]:
+    rng = random.Random(23)
+    return [
+        ec.Event(
+            facility=1,
+            priority=2,
+            host=HostName(f"host{rng.randrange(1000)}"),
+            ipaddress="127.0.0.1",
+            application=rng.choice(_WORDS),
+            text=" ".join(rng.choice(_WORDS) for _ in range(12)),
+        )
+        for _ in range(num_events)
+    ]
+
+
+@pytest.mark.parametrize("num_rules", [300, 3000])
+def test_ec_rule_dispatch(benchmark: Benchmark, num_rules: int) -> None:
+    rules = _rules(num_rules)
+    events = _events(200)
+    matcher = RuleMatcher(logger=None, omd_site_id=SiteId("site"), is_active_time_period=bool)
+    index = RuleIndex(rules)
+    all_rules = index.mask(rules)
+
+    def match_all() -> None:
+        for event in events:
+            for rule in rules:
+                matcher.event_rule_matches(rule, event)
+
+    def match_indexed() -> None:
+        for event in events:
+            for rule in index.select(event, all_rules):
+                matcher.event_rule_matches(rule, event)
+
+    benchmark("match all rules", match_all, rounds=1, rules=num_rules, events=len(events))
+    benchmark("match indexed rules", match_indexed, rounds=3, rules=num_rules, events=len(events))
+    benchmark("build index", lambda: RuleIndex(rules), rounds=3, rules=num_rules)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import ast
+import logging
+from pathlib import Path
+
+import pytest
+
+from tests.performance.conftest import Benchmark
+
+from cmk.utils.hostaddress import HostName
+
+import cmk.ec.export as ec
+from cmk.ec.status_store import PackedEventStatus, StatusStore
+
+
+def _status(num_events: int) -> PackedEventStatus:
+    return PackedEventStatus(
+        next_event_id=num_events + 1,
+        events=[
+            ec.Event(
+                id=n,
+                facility=1,
+                priority=2,
+                text=f"Something went wrong on device {n}",
+                host=HostName(f"host{n % 1000}"),
+                core_host=HostName(f"host{n % 1000}"),
+                ipaddress="127.0.0.1",
+                application="app",
+                pid=0,
+                time=1.7e9 + n,
+                first=1.7e9 + n,
+                last=1.7e9 + n,
+                count=1,
+                phase="open",
+                rule_id=f"rule{n % 100}",
+                match_groups=("device", str(n)),
+                state=2,
+                sl=0,
+                comment="",
+                contact="",
+                owner="",
+                host_in_downtime=False,
+            )
+            for n in range(1, num_events + 1)
+        ],
+        rule_stats={f"rule{n}": n for n in range(100)},
+        interval_starts={},
+    )
+
+
+@pytest.mark.parametrize("num_events", [20000])
+def test_ec_status_save_load(benchmark: Benchmark, tmp_path: Path, num_events: int) -> None:
+    status = _status(num_events)
+    legacy_path = tmp_path / "legacy"
+    store = StatusStore(
+        tmp_path / "status", tmp_path / "status.journal", logging.getLogger("cmk.mkeventd")
+    )
+    store.save(status)
+
+    def change_some_events() -> None:
+        for event in status["events"][::100]:
+            event["count"] += 1
+        store.save(status)
+
+    benchmark(
+        "legacy save",
+        lambda: legacy_path.write_text(repr(status) + "\n", encoding="utf-8"),
+        rounds=3,
+        events=num_events,
+    )
+    benchmark("save 1% changed", change_some_events, rounds=3, events=num_events)
+    benchmark("save snapshot", lambda: store.save(status, compact=True), rounds=3)
+    benchmark(
+        "legacy load",
+        lambda: ast.literal_eval(legacy_path.read_text(encoding="utf-8")),
+        rounds=1,
+        events=num_events,
+    )
+    store.save(status)
+    benchmark("load", lambda: store.load(), rounds=3, events=num_events)
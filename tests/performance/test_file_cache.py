@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmarks of the file caches with the different codecs
+
+The synthetic agent output resembles a Linux server with a few hundred
+processes and some dozen interfaces and file systems.  The size of the cache
+file is reported as `kib`.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from tests.performance.conftest import Benchmark
+
+from cmk.utils.agentdatatype import AgentRawData
+
+from cmk.fetchers import Mode
+from cmk.fetchers.filecache import AgentFileCache, FileCacheCompression, FileCacheMode, MaxAge
+
+
+def _agent_output() -> AgentRawData:
+    lines = [b"<<<check_mk>>>", b"Version: 2.4.0", b"AgentOS: linux", b"<<<ps_lnx>>>"]
+    lines += (
+        b"(root,%d,%d,00:00:%02d/01:02:%02d,%d) /usr/sbin/daemon%d --config /etc/daemon%d.conf"
+        % (n * 1000, n * 100, n % 60, n % 60, n, n % 40, n % 40)
+        for n in range(600)
+    )
+    lines.append(b"<<<lnx_if>>>")
+    lines += (
+        b"eth%d: %d %d 0 0 0 0 0 0 %d %d 0 0 0 0 0 0" % (n, n * 12345, n * 67, n * 54321, n * 89)
+        for n in range(40)
+    )
+    lines.append(b"<<<df>>>")
+    lines += (
+        b"/dev/sda%d ext4 102687672 %d %d 42%% /srv/data%d" % (n, n * 98765, n * 4321, n)
+        for n in range(40)
+    )
+    return AgentRawData(b"\n".join(lines) + b"\n")
+
+
+@pytest.mark.parametrize("compression", list(FileCacheCompression))
+def test_agent_file_cache(
+    benchmark: Benchmark, tmp_path: Path, compression: FileCacheCompression
+) -> None:
+    raw_data = _agent_output()
+    path = tmp_path / "host"
+    file_cache = AgentFileCache(
+        path_template=str(path),
+        max_age=MaxAge.unlimited(),
+        simulation=False,
+        use_only_cache=False,
+        file_cache_mode=FileCacheMode.READ_WRITE,
+        compression=compression,
+    )
+
+    def write() -> None:
+        file_cache.write(raw_data, Mode.CHECKING)
+
+    def read() -> None:
+        assert file_cache.read(Mode.CHECKING) == raw_data
+
+    write()
+    kib = path.stat().st_size // 1024
+    benchmark(f"write ({compression.value})", write, rounds=20, items=1, kib=kib)
+    benchmark(f"read ({compression.value})", read, rounds=20, items=1, kib=kib)
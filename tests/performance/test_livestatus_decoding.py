@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import json
+from collections.abc import Sequence
+
+import pytest
+
+from tests.performance.conftest import Benchmark
+
+import livestatus
+
+_SERVICE_COLUMNS = [
+    "host_name",
+    "description",
+    "state",
+    "plugin_output",
+    "perf_data",
+    "last_check",
+    "labels",
+    "host_mk_inventory_gz",
+]
+_LOG_COLUMNS = ["time", "type", "host_name", "service_description", "state", "plugin_output"]
+
+
+def _service_rows(num_rows: int) -> list[list[object]]:
+    return [
+        [
+            f"host{n // 50}",
+            f"Interface {n % 50}",
+            n % 4,
+            f"OK - In: {n * 17 % 1000} MB/s, Out: {n * 31 % 1000} MB/s",
+            f"in={n * 17 % 1000};800;900;0;1000 out={n * 31 % 1000};800;900;0;1000",
+            1.7e9 + n,
+            {"cmk/os_family": "linux", "cmk/site": "heute"},
+            bytes(range(n % 7, 256, 7)),
+        ]
+        for n in range(num_rows)
+    ]
+
+
+def _log_rows(num_rows: int) -> list[list[object]]:
+    return [
+        [
+            1700000000 + n,
+            "SERVICE ALERT",
+            f"host{n % 1000}",
+            f"Filesystem /var/{n % 20}",
+            n % 3,
+            f"WARN - {n % 100}% used (123.45 of 200 GB), trend: +{n % 9}.12 GB / 24 hours",
+        ]
+        for n in range(num_rows)
+    ]
+
+
+def _render_python3(rows: Sequence[Sequence[object]]) -> bytes:
+    return ("[" + ",\n".join(repr(list(row)) for row in rows) + "]\n").encode("utf-8")
+
+
+def _render_json(rows: Sequence[Sequence[object]]) -> bytes:
+    # Blobs are sent as latin-1 encoded strings, like the Livestatus JSON renderer does it
+    return (
+        "["
+        + ",\n".join(
+            json.dumps([v.decode("latin-1") if isinstance(v, bytes) else v for v in row])
+            for row in rows
+        )
+        + "]\n"
+    ).encode("utf-8")
+
+
+@pytest.mark.parametrize(
+    "table, columns, rows",
+    [
+        ("services", _SERVICE_COLUMNS, _service_rows(20000)),
+        ("log", _LOG_COLUMNS, _log_rows(50000)),
+    ],
+)
+def test_livestatus_response_decoding(
+    benchmark: Benchmark, table: str, columns: list[str], rows: list[list[object]]
+) -> None:
+    connection = livestatus.SingleSiteConnection("unix:/dev/null")
+    query = livestatus.Query(livestatus.QuerySpecification(table, columns))
+    # An explicit output format keeps the client from negotiating JSON
+    python3_query = livestatus.Query(f"{query}OutputFormat: python3\n")
+    python3_response = _render_python3(rows)
+    json_response = _render_json(rows)
+
+    assert connection.parse_raw_response(python3_response, python3_query) == rows
+    assert connection.parse_raw_response(json_response, query) == rows
+
+    benchmark(
+        "python3",
+        lambda: connection.parse_raw_response(python3_response, python3_query),
+        rounds=1,
+        items=len(rows),
+    )
+    benchmark(
+        "json",
+        lambda: connection.parse_raw_response(json_response, query),
+        rounds=3,
+        items=len(rows),
+    )
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+
+import time
+from pathlib import Path
+
+import pytest
+
+from tests.performance.conftest import Benchmark
+
+from cmk.utils.hostaddress import HostAddress, HostName
+
+from cmk import piggyback
+from cmk.piggyback import _storage
+
+_SOURCES = [HostName(f"source-{i}") for i in range(3)]
+_PAYLOAD = tuple(b"<<<section_%d>>>\nsome data line with a few values 1 2 3" % i for i in range(10))
+
+
+@pytest.fixture(name="piggyback_paths", autouse=True)
+def fixture_piggyback_paths(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(_storage, "piggyback_dir", tmp_path / "piggyback")
+    monkeypatch.setattr(_storage, "piggyback_source_dir", tmp_path / "piggyback_sources")
+    monkeypatch.setattr(_storage, "piggyback_segments_dir", tmp_path / "piggyback_segments")
+
+
+@pytest.mark.parametrize("layout", list(piggyback.StorageLayout))
+@pytest.mark.parametrize("num_hosts", [1000, 10000])
+def test_piggyback_storage(
+    benchmark: Benchmark, layout: piggyback.StorageLayout, num_hosts: int
+) -> None:
+    piggyback.migrate_storage_layout(layout)
+    hosts = [HostAddress(f"piggybacked-host-{i:06}") for i in range(num_hosts)]
+    now = time.time()
+
+    def store() -> None:
+        for source in _SOURCES:
+            piggyback.store_piggyback_raw_data(source, {h: _PAYLOAD for h in hosts}, now)
+
+    def get_all() -> None:
+        for host in hosts:
+            assert len(piggyback.get_piggyback_raw_data(host)) == len(_SOURCES)
+
+    benchmark("store", store, rounds=3, hosts=num_hosts, sources=len(_SOURCES))
+    benchmark("get_piggyback_raw_data", get_all, rounds=3, hosts=num_hosts)
+    benchmark(
+        "get_piggybacked_host_with_sources",
+        piggyback.get_piggybacked_host_with_sources,
+        rounds=3,
+        hosts=num_hosts,
+    )
+    benchmark(
+        "cleanup_piggyback_files",
+        lambda: piggyback.cleanup_piggyback_files(now - 3600),
+        rounds=3,
+        hosts=num_hosts,
+    )
+
+
+@pytest.mark.parametrize("max_workers", [1, 8])
+def test_piggyback_cleanup_parallel(benchmark: Benchmark, max_workers: int) -> None:
+    hosts = [HostAddress(f"piggybacked-host-{i:06}") for i in range(20000)]
+    now = time.time()
+    for source in _SOURCES:
+        piggyback.store_piggyback_raw_data(source, {h: _PAYLOAD for h in hosts}, now)
+
+    benchmark(
+        "cleanup_piggyback_files",
+        lambda: piggyback.cleanup_piggyback_files(now - 3600, max_workers=max_workers),
+        rounds=3,
+        files=len(hosts) * len(_SOURCES),
+        workers=max_workers,
+    )
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmarks of the host and service ruleset matching
+
+The synthetic configuration resembles a big setup: the hosts are spread over
+a folder hierarchy, carry tags of a few tag groups and explicit labels and the
+rulesets mix tag, folder, host name, regex and label conditions.
+"""
+
+# pylint: disable=protected-access
+
+import pickle
+import random
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+
+import pytest
+
+from tests.performance.conftest import Benchmark
+
+from cmk.ccc.site import omd_site
+
+from cmk.utils.hostaddress import HostName
+from cmk.utils.labels import Labels
+from cmk.utils.rulesets.ruleset_matcher import (
+    LabelManager,
+    RuleConditionsSpec,
+    RulesetMatcher,
+    RulesetMatchObject,
+    RuleSpec,
+    TagCondition,
+    TagsOfHosts,
+)
+from cmk.utils.servicename import ServiceName
+from cmk.utils.tags import TagGroupID, TagID
+
+_TAG_GROUPS: dict[str, list[str]] = {
+    "agent": ["cmk-agent", "no-agent", "special-agents"],
+    "snmp_ds": ["no-snmp", "snmp-v2", "snmp-v1"],
+    "address_family": ["ip-v4-only", "ip-v6-only", "ip-v4v6"],
+    "criticality": ["prod", "critical", "test", "offline"],
+    "networking": ["lan", "wan", "dmz"],
+    "location": [f"dc{n}" for n in range(8)],
+}
+_SERVICES = [
+    *(f"Interface {n}" for n in range(20)),
+    *(f"Filesystem /var/lib/{n}" for n in range(10)),
+    "CPU load",
+    "CPU utilization",
+    "Memory",
+    "Check_MK",
+    "Check_MK Discovery",
+    "Uptime",
+    "NTP Time",
+]
+_SERVICE_LABELS: dict[str, Labels] = {
+    service: {"cmk/service_type": service.split()[0], "criticality": f"c{n % 3}"}
+    for n, service in enumerate(_SERVICES)
+}
+_NUM_HOST_RULESETS = 20
+_NUM_SERVICE_RULESETS = 20
+_RULES_PER_RULESET = 15
+
+
+@dataclass(frozen=True)
+class _Config:
+    hosts: Sequence[HostName]
+    host_tags: TagsOfHosts
+    host_paths: dict[HostName, str]
+    explicit_host_labels: dict[HostName, Labels]
+    host_label_rules: Sequence[RuleSpec[dict[str, str]]]
+    host_rulesets: Sequence[Sequence[RuleSpec[object]]]
+    service_rulesets: Sequence[Sequence[RuleSpec[object]]]
+
+    def matcher(self) -> RulesetMatcher:
+        return RulesetMatcher(
+            host_tags=self.host_tags,
+            host_paths=self.host_paths,
+            label_manager=LabelManager(
+                explicit_host_labels=self.explicit_host_labels,
+                host_label_rules=self.host_label_rules,
+                service_label_rules=(),
+                discovered_labels_of_service=lambda *args, **kw: {},
+            ),
+            all_configured_hosts=self.hosts,
+            clusters_of={},
+            nodes_of={},
+        )
+
+
+def _folder(rng: random.Random) -> str:
+    return "/wato/" + "".join(f"{level}{rng.randrange(10)}/" for level in "abc"[: rng.randrange(4)])
+
+
+def _tag_condition(rng: random.Random, tag_ids: list[str]) -> TagCondition:
+    match rng.randrange(4):
+        case 0:
+            return {"$ne": TagID(rng.choice(tag_ids))}
+        case 1:
+            return {"$or": [TagID(t) for t in rng.sample(tag_ids, 2)]}
+        case 2:
+            return {"$nor": [TagID(t) for t in rng.sample(tag_ids, 2)]}
+    return TagID(rng.choice(tag_ids))
+
+
+def _host_condition(rng: random.Random, num_hosts: int) -> RuleConditionsSpec:
+    condition = RuleConditionsSpec(host_folder=_folder(rng))
+    match rng.randrange(6):
+        case 0:
+            pass  # Folder only
+        case 1:
+            condition["host_name"] = [
+                HostName(f"host{rng.randrange(num_hosts)}") for _ in range(rng.randint(1, 20))
+            ]
+        case 2:
+            condition["host_name"] = [{"$regex": f"host{rng.randrange(100)}"}]
+        case 3:
+            condition["host_label_groups"] = [
+                ("and", [("and", f"env:{rng.choice(['prod', 'test', 'dev'])}")]),
+                ("not", [("and", "cmk/os_family:windows")]),
+            ]
+        case _:
+            groups = rng.sample(sorted(_TAG_GROUPS), rng.randint(1, 3))
+            condition["host_tags"] = {
+                TagGroupID(group): _tag_condition(rng, _TAG_GROUPS[group]) for group in groups
+            }
+    return condition
+
+
+def _service_condition(rng: random.Random) -> RuleConditionsSpec:
+    condition = RuleConditionsSpec(
+        service_description=[
+            {"$regex": rng.choice(["Interface ", "Filesystem /var/", "CPU", "Check_"])}
+        ]
+    )
+    if rng.randrange(3) == 0:
+        condition["service_label_groups"] = [
+            ("and", [("and", f"criticality:c{rng.randrange(3)}")]),
+            ("not", [("and", "cmk/service_type:Interface"), ("or", "cmk/service_type:CPU")]),
+        ]
+    return condition
+
+
+def _config(num_hosts: int) -> _Config:
+    rng = random.Random(num_hosts)
+    hosts = [HostName(f"host{n}") for n in range(num_hosts)]
+    host_tags: TagsOfHosts = {
+        host: {
+            TagGroupID(group): TagID(rng.choice(tag_ids)) for group, tag_ids in _TAG_GROUPS.items()
+        }
+        for host in hosts
+    }
+    host_paths = {host: _folder(rng) + "hosts.mk" for host in hosts}
+    explicit_host_labels: dict[HostName, Labels] = {
+        host: {
+            "cmk/os_family": rng.choice(["linux", "windows", "aix"]),
+            "env": rng.choice(["prod", "test", "dev"]),
+            "team": f"team{rng.randrange(30)}",
+        }
+        for host in hosts
+    }
+    host_label_rules: list[RuleSpec[dict[str, str]]] = [
+        RuleSpec(
+            id=f"label{n}",
+            value={"tier": f"tier{n}"},
+            condition=RuleConditionsSpec(
+                host_folder=_folder(rng),
+                host_tags={TagGroupID("criticality"): TagID(_TAG_GROUPS["criticality"][n % 4])},
+            ),
+        )
+        for n in range(10)
+    ]
+    host_rulesets = [
+        [
+            RuleSpec(id=f"h{r}-{n}", value=n, condition=_host_condition(rng, num_hosts))
+            for n in range(_RULES_PER_RULESET)
+        ]
+        for r in range(_NUM_HOST_RULESETS)
+    ]
+    service_rulesets = [
+        [
+            RuleSpec(
+                id=f"s{r}-{n}",
+                value=n,
+                condition=_host_condition(rng, num_hosts) | _service_condition(rng),
+            )
+            for n in range(_RULES_PER_RULESET)
+        ]
+        for r in range(_NUM_SERVICE_RULESETS)
+    ]
+    return _Config(
+        hosts=hosts,
+        host_tags=host_tags,
+        host_paths=host_paths,
+        explicit_host_labels=explicit_host_labels,
+        host_label_rules=host_label_rules,
+        host_rulesets=host_rulesets,
+        service_rulesets=service_rulesets,
+    )
+
+
+@pytest.fixture(name="site")
+def fixture_site(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    # The builtin host labels contain the site
+    monkeypatch.setenv("OMD_SITE", "NO_SITE")
+    omd_site.cache_clear()
+    yield
+    omd_site.cache_clear()
+
+
+@pytest.mark.usefixtures("site")
+@pytest.mark.parametrize("num_hosts", [1000, 10000, pytest.param(100000, marks=pytest.mark.slow)])
+def test_ruleset_matching(benchmark: Benchmark, num_hosts: int) -> None:
+    config = _config(num_hosts)
+    rounds = 3 if num_hosts <= 1000 else 1
+    # The rulesets are evaluated for samples of the hosts, all hosts would take
+    # way too long at the bigger scales.
+    label_hosts = config.hosts[:: num_hosts // 1000]
+    lookup_hosts = config.hosts[:: num_hosts // 200]
+    service_hosts = config.hosts[:: num_hosts // 10]
+    matcher = config.matcher()
+
+    def compute_labels() -> None:
+        matcher.clear_caches()
+        matcher.ruleset_optimizer._RulesetOptimizer__labels_of_host.clear()  # type: ignore[attr-defined]
+        for host in label_hosts:
+            matcher.labels_of_host(host)
+
+    def all_matching_hosts() -> None:
+        matcher.ruleset_optimizer.clear_caches()
+        for ruleset in config.host_rulesets:
+            for rule in ruleset:
+                matcher.ruleset_optimizer._all_matching_hosts(rule["condition"], False)
+
+    def get_host_values() -> None:
+        for host in lookup_hosts:
+            for ruleset in config.host_rulesets:
+                matcher.get_host_values(host, ruleset)
+
+    def get_host_values_cold() -> None:
+        matcher.clear_caches()
+        get_host_values()
+
+    def get_service_ruleset_values() -> None:
+        for host in service_hosts:
+            for service in _SERVICES:
+                match_object = RulesetMatchObject(
+                    host, ServiceName(service), _SERVICE_LABELS[service]
+                )
+                for ruleset in config.service_rulesets:
+                    for _value in matcher.get_service_ruleset_values(match_object, ruleset):
+                        pass
+
+    benchmark("create matcher", config.matcher, rounds=rounds, hosts=num_hosts)
+    benchmark(
+        "labels_of_host", compute_labels, rounds=rounds, items=len(label_hosts), hosts=num_hosts
+    )
+    benchmark(
+        "_all_matching_hosts",
+        all_matching_hosts,
+        rounds=rounds,
+        items=_NUM_HOST_RULESETS * _RULES_PER_RULESET,
+        hosts=num_hosts,
+    )
+    benchmark(
+        "get_host_values (cold)",
+        get_host_values_cold,
+        rounds=rounds,
+        items=len(lookup_hosts) * _NUM_HOST_RULESETS,
+        hosts=num_hosts,
+    )
+    benchmark(
+        "get_host_values (cached)",
+        get_host_values,
+        rounds=rounds,
+        items=len(lookup_hosts) * _NUM_HOST_RULESETS,
+        hosts=num_hosts,
+    )
+    matcher.ruleset_optimizer.clear_ruleset_caches()
+    benchmark(
+        "get_service_ruleset_values",
+        get_service_ruleset_values,
+        rounds=rounds,
+        items=len(service_hosts) * len(_SERVICES) * _NUM_SERVICE_RULESETS,
+        hosts=num_hosts,
+    )
+
+    # As a helper process starting with the matches of the core config creation
+    match_cache = pickle.dumps(matcher.ruleset_optimizer.dump_match_cache())
+
+    def load_match_cache() -> None:
+        config.matcher().ruleset_optimizer.load_match_cache(pickle.loads(match_cache))
+
+    benchmark(
+        "create matcher and load match cache",
+        load_match_cache,
+        rounds=rounds,
+        hosts=num_hosts,
+        kib=len(match_cache) // 1024,
+    )
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Benchmarks of the stored walk backends
+
+The synthetic walk resembles a big switch: interface tables with some
+thousand rows, the lookups walk the columns as the interface checks do.
+"""
+
+import logging
+from pathlib import Path
+
+import pytest
+
+from tests.performance.conftest import Benchmark
+
+from cmk.utils.hostaddress import HostAddress, HostName
+
+from cmk.snmplib import SNMPBackend, SNMPBackendEnum, SNMPHostConfig, SNMPVersion
+
+from cmk.fetchers.snmp_backend import IndexedWalkSNMPBackend, StoredWalkSNMPBackend
+
+_SNMP_CONFIG = SNMPHostConfig(
+    is_ipv6_primary=False,
+    hostname=HostName("benchmark"),
+    ipaddress=HostAddress("127.0.0.1"),
+    credentials="",
+    port=0,
+    bulkwalk_enabled=True,
+    snmp_version=SNMPVersion.V2C,
+    bulk_walk_size_of=0,
+    timing={},
+    oid_range_limits={},
+    snmpv3_contexts=[],
+    character_encoding=None,
+    snmp_backend=SNMPBackendEnum.STORED_WALK,
+)
+_COLUMNS = range(1, 23)
+# The columns fetched by the interface checks
+_WALKED_OIDS = [
+    ".1.3.6.1.2.1.1.1.0",
+    *(f".1.3.6.1.2.1.2.2.1.{column}" for column in _COLUMNS),
+    *(f".1.3.6.1.2.1.31.1.1.1.{column}" for column in _COLUMNS),
+]
+
+
+def _write_walk(path: Path, num_rows: int) -> None:
+    with path.open("w") as f:
+        f.write('.1.3.6.1.2.1.1.1.0 "Some switch"\n')
+        for table in ("1.3.6.1.2.1.2.2.1", "1.3.6.1.2.1.31.1.1.1"):
+            for column in _COLUMNS:
+                for row in range(1, num_rows + 1):
+                    f.write(f'.{table}.{column}.{row} "value of {column}.{row}"\n')
+
+
+@pytest.mark.parametrize("num_rows", [5000])
+def test_stored_walk(benchmark: Benchmark, tmp_path: Path, num_rows: int) -> None:
+    walk_path = tmp_path / "benchmark"
+    _write_walk(walk_path, num_rows)
+    logger = logging.getLogger("cmk.helper.snmp")
+    kib = walk_path.stat().st_size // 1024
+
+    def walk(backend: SNMPBackend) -> None:
+        for oid in _WALKED_OIDS:
+            backend.walk(oid, context="")
+
+    benchmark(
+        "StoredWalkSNMPBackend",
+        lambda: walk(StoredWalkSNMPBackend(_SNMP_CONFIG, logger, walk_path)),
+        rounds=1,
+        items=len(_WALKED_OIDS),
+        kib=kib,
+    )
+    benchmark(
+        "IndexedWalkSNMPBackend",
+        lambda: walk(IndexedWalkSNMPBackend(_SNMP_CONFIG, logger, walk_path)),
+        rounds=3,
+        items=len(_WALKED_OIDS),
+        kib=kib,
+    )
+    index_dir = tmp_path / "index"
+    walk(IndexedWalkSNMPBackend(_SNMP_CONFIG, logger, walk_path, index_dir=index_dir))
+    benchmark(
+        "IndexedWalkSNMPBackend (stored index)",
+        lambda: walk(IndexedWalkSNMPBackend(_SNMP_CONFIG, logger, walk_path, index_dir=index_dir)),
+        rounds=3,
+        items=len(_WALKED_OIDS),
+        kib=kib,
+    )
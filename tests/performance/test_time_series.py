@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import random
+
+from tests.performance.conftest import Benchmark
+
+from cmk.gui.graphing._timeseries import op_func_wrapper, time_series_math, time_series_operators
+from cmk.gui.time_series import TimeSeries
+
+# A dashboard of 50 graphs with 4 curves each, showing 4 weeks of one minute values
+_GRAPHS = 50
+_CURVES = 4
+_STEP = 60
+_POINTS = 4 * 7 * 24 * 60
+
+
+def _time_series() -> TimeSeries:
+    return TimeSeries(
+        [None if random.random() < 0.05 else random.uniform(0, 100) for _ in range(_POINTS)],
+        (0, _POINTS * _STEP, _STEP),
+    )
+
+
+def test_resample(benchmark: Benchmark) -> None:
+    series = [_time_series() for _ in range(_GRAPHS * _CURVES)]
+
+    def downsample() -> None:
+        for time_series in series:
+            time_series.downsample_array((0, _POINTS * _STEP, 5 * _STEP), "average")
+
+    def forward_fill_resample() -> None:
+        for time_series in series:
+            time_series.forward_fill_resample_array((0, _POINTS * _STEP, _STEP // 2))
+
+    benchmark("downsample", downsample, rounds=3, items=len(series) * _POINTS)
+    benchmark("forward fill", forward_fill_resample, rounds=3, items=len(series) * _POINTS)
+
+
+def test_time_series_math(benchmark: Benchmark) -> None:
+    graphs = [[_time_series() for _ in range(_CURVES)] for _ in range(_GRAPHS)]
+    _op_title, op_func = time_series_operators()["+"]
+
+    def point_wise() -> None:
+        for curves in graphs:
+            TimeSeries(
+                [op_func_wrapper(op_func, list(tsp)) for tsp in zip(*curves)], curves[0].twindow
+            )
+
+    def vectorized() -> None:
+        for curves in graphs:
+            time_series_math("+", curves)
+
+    benchmark("point-wise", point_wise, rounds=3, items=_GRAPHS * _POINTS)
+    benchmark("vectorized", vectorized, rounds=3, items=_GRAPHS * _POINTS)
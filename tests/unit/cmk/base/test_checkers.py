@@ -14,14 +14,19 @@ from pytest import MonkeyPatch
 
 from tests.testlib.base import Scenario
 
+from cmk.utils.agentdatatype import AgentRawData
 from cmk.utils.hostaddress import HostName
 
+from cmk.fetchers import Fetcher, Mode, ProgramFetcher
+from cmk.fetchers.filecache import FileCache, FileCacheOptions, NoCache
+
 from cmk.checkengine.checkresults import ServiceCheckResult, SubmittableServiceCheckResult
-from cmk.checkengine.fetcher import HostKey, SourceType
+from cmk.checkengine.fetcher import FetcherType, HostKey, SourceInfo, SourceType
 from cmk.checkengine.parameters import TimespecificParameters, TimespecificParameterSet
 
 from cmk.base import checkers, config
 from cmk.base.plugins.agent_based.agent_based_api.v1.type_defs import CheckResult
+from cmk.base.sources import Source
 
 from cmk.agent_based.prediction_backend import (
     InjectedParameters,
@@ -279,3 +284,86 @@ def test_prediction_injection() -> None:
             ("my_reference_metric", *prediction),
         )
     }
+
+
+class _SleepingFetcher(Fetcher[AgentRawData]):
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def _fetch_from_io(self, mode: Mode) -> AgentRawData:
+        time.sleep(self.seconds)
+        return AgentRawData(b"<<<section>>>")
+
+
+class _SleepingSource(Source[AgentRawData]):
+    def __init__(self, ident: str, seconds: float) -> None:
+        self.ident = ident
+        self.seconds = seconds
+
+    def source_info(self) -> SourceInfo:
+        return SourceInfo(HostName("host"), None, self.ident, FetcherType.PROGRAM, SourceType.HOST)
+
+    def fetcher(self) -> Fetcher[AgentRawData]:
+        return _SleepingFetcher(self.seconds)
+
+    def file_cache(
+        self, *, simulation: bool, file_cache_options: FileCacheOptions
+    ) -> FileCache[AgentRawData]:
+        return NoCache(HostName("host"))
+
+
+@pytest.mark.parametrize("max_concurrent_fetches", [1, 4])
+def test_fetch_all(max_concurrent_fetches: int) -> None:
+    start = time.monotonic()
+    fetched = checkers._fetch_all(
+        [_SleepingSource(f"source{n}", 0.1 * n) for n in range(4)],
+        simulation=False,
+        file_cache_options=FileCacheOptions(),
+        mode=Mode.CHECKING,
+        max_concurrent_fetches=max_concurrent_fetches,
+    )
+    wall_time = time.monotonic() - start
+
+    # The results are in the order of the sources, each with its own duration
+    assert [source_info.ident for source_info, _raw_data, _duration in fetched] == [
+        f"source{n}" for n in range(4)
+    ]
+    assert all(raw_data.ok == b"<<<section>>>" for _source_info, raw_data, _duration in fetched)
+    # The elapsed time is measured in clock ticks
+    assert all(
+        duration.process.elapsed >= 0.1 * n - 0.02 for n, (_, _, duration) in enumerate(fetched)
+    )
+    # Concurrent fetches overlap, the host only waits for the slowest one
+    assert (wall_time < 0.6) is (max_concurrent_fetches > 1)
+
+
+class _ProgramSource(_SleepingSource):
+    def __init__(self, ident: str, cmdline: str) -> None:
+        super().__init__(ident, 0.0)
+        self.cmdline = cmdline
+
+    def fetcher(self) -> Fetcher[AgentRawData]:
+        return ProgramFetcher(cmdline=self.cmdline, stdin=None, is_cmc=False)
+
+
+def test_fetch_all_concurrently_accounts_children_times() -> None:
+    fetched = checkers._fetch_all(
+        [
+            _SleepingSource("sleeping", 0.1),
+            _ProgramSource("program", "i=0; while [ $i -lt 200000 ]; do i=$((i+1)); done"),
+        ],
+        simulation=False,
+        file_cache_options=FileCacheOptions(),
+        mode=Mode.CHECKING,
+        max_concurrent_fetches=2,
+    )
+
+    (_, _, sleeping), (_, _, program) = fetched
+    assert sleeping.process.children_user == sleeping.process.children_system == 0.0
+    assert program.process.children_user + program.process.children_system > 0.0
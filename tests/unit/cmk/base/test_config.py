@@ -2924,6 +2924,7 @@ def test_save_packed_config(monkeypatch: MonkeyPatch, config_path: VersionedConf
     config.save_packed_config(config_path, config_cache)
 
     assert precompiled_check_config.exists()
+    assert config.RulesetMatchCacheStore.from_serial(config_path).read()["hosts"] == ["bla1"]
 
 
 def test_load_packed_config(config_path: VersionedConfigPath) -> None:
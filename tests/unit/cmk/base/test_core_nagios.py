@@ -28,6 +28,7 @@ from cmk.checkengine.checking import CheckPluginName
 from cmk.checkengine.discovery import AutocheckEntry
 
 from cmk.base import config, core_nagios
+from cmk.base.core_nagios._precompile_host_checks import precompile_hostchecks
 
 import cmk.ccc.debug
 import cmk.ccc.version as cmk_version
@@ -350,6 +351,28 @@ class TestHostCheckStore:
 
         assert os.access(store.host_check_file_path(config_path, hostname), os.X_OK)
 
+    def test_reuse(self, config_path: VersionedConfigPath) -> None:
+        hostname = HostName("aaa")
+        store = core_nagios.HostCheckStore()
+        previous_config_path = config_path.previous_config_path()
+        store.write(previous_config_path, hostname, "xyz")
+
+        assert not store.reuse(previous_config_path, config_path, hostname, "changed")
+        assert not store.host_check_file_path(config_path, hostname).exists()
+
+        assert store.reuse(previous_config_path, config_path, hostname, "xyz")
+        assert store.host_check_source_file_path(config_path, hostname).samefile(
+            store.host_check_source_file_path(previous_config_path, hostname)
+        )
+        assert store.host_check_file_path(config_path, hostname).samefile(
+            store.host_check_file_path(previous_config_path, hostname)
+        )
+
+    def test_reuse_without_previous_config(self, config_path: VersionedConfigPath) -> None:
+        assert not core_nagios.HostCheckStore().reuse(
+            config_path.previous_config_path(), config_path, HostName("aaa"), "xyz"
+        )
+
 
 def test_dump_precompiled_hostcheck(
     monkeypatch: MonkeyPatch, config_path: VersionedConfigPath
@@ -399,6 +422,29 @@ def test_dump_precompiled_hostcheck_not_existing_host(
     assert host_check is None
 
 
+def test_precompile_hostchecks_reuses_unchanged(
+    monkeypatch: MonkeyPatch, config_path: VersionedConfigPath
+) -> None:
+    ts = Scenario()
+    for hostname in (HostName("host1"), HostName("host2")):
+        ts.add_host(hostname)
+        ts.set_autochecks(hostname, [AutocheckEntry(CheckPluginName("uptime"), None, {}, {})])
+    ts.set_option("ipaddresses", {HostName("host1"): "127.0.0.1", HostName("host2"): "127.0.0.2"})
+    config_cache = ts.apply(monkeypatch)
+
+    previous_config_path = config_path.previous_config_path()
+    result = precompile_hostchecks(previous_config_path, config_cache, max_workers=1)
+    assert (result.rebuilt, result.reused) == (2, 0)
+
+    result = precompile_hostchecks(config_path, config_cache, max_workers=1)
+    assert (result.rebuilt, result.reused) == (0, 2)
+    assert (
+        core_nagios.HostCheckStore.host_check_file_path(config_path, HostName("host1"))
+        .read_bytes()
+        .startswith(importlib.util.MAGIC_NUMBER)
+    )
+
+
 def mock_argument_function(params: Mapping[str, str]) -> str:
     return "--arg1 arument1 --host_alias $HOSTALIAS$"
 
@@ -4,6 +4,7 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import socket
+import threading
 from collections.abc import Mapping
 from pathlib import Path
 from typing import TypeAlias
@@ -328,6 +329,38 @@ class TestIPLookupCache:
         assert cache[cache_id1] == HostAddress("127.0.0.1")
         assert cache[cache_id2] == HostAddress("127.0.0.2")
 
+    def test_update_batched(self, tmp_path: Path) -> None:
+        def persisted() -> ip_lookup.IPLookupCache:
+            cache = ip_lookup.IPLookupCache({})
+            cache.load_persisted()
+            return cache
+
+        cache_id1 = HostName("host1"), socket.AF_INET
+        cache_id2 = HostName("host2"), socket.AF_INET
+        cache_id3 = HostName("host3"), socket.AF_INET
+
+        ip_lookup_cache = ip_lookup.IPLookupCache({})
+        with ip_lookup_cache.persisting_batched(batch_size=2):
+            ip_lookup_cache[cache_id1] = HostAddress("127.0.0.1")
+            assert ip_lookup_cache[cache_id1] == HostAddress("127.0.0.1")
+            assert not persisted()
+
+            # Written by another process in the meantime
+            other_cache = ip_lookup.IPLookupCache({})
+            other_cache[cache_id3] = HostAddress("127.0.0.3")
+
+            ip_lookup_cache[cache_id2] = HostAddress("127.0.0.2")
+            assert persisted() == {
+                cache_id1: HostAddress("127.0.0.1"),
+                cache_id2: HostAddress("127.0.0.2"),
+                cache_id3: HostAddress("127.0.0.3"),
+            }
+
+            ip_lookup_cache[cache_id1] = HostAddress("127.0.0.11")
+            assert persisted()[cache_id1] == HostAddress("127.0.0.1")
+
+        assert persisted()[cache_id1] == HostAddress("127.0.0.11")
+
     def test_clear(self, tmp_path: Path) -> None:
         ip_lookup.IPLookupCache(
             {(HostName("host1"), socket.AF_INET): HostAddress("127.0.0.1")}
@@ -407,6 +440,43 @@ def test_update_dns_cache(monkeypatch: MonkeyPatch) -> None:
     assert cache.get((HostName("dual"), socket.AF_INET6)) is None
 
 
+def test_update_dns_cache_timeout(monkeypatch: MonkeyPatch) -> None:
+    resolver_stuck = threading.Event()
+
+    def getaddrinfo(host: str, port: None, family: socket.AddressFamily) -> object:
+        if host == "slow":
+            resolver_stuck.wait(5)
+        return [(family, None, None, None, (HostAddress("127.0.0.13"), 1337))]
+
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+
+    ts = Scenario()
+    ts.add_host(HostName("slow"))
+    ts.add_host(HostName("fast"))
+    config_cache = ts.apply(monkeypatch)
+
+    try:
+        result = ip_lookup.update_dns_cache(
+            ip_lookup_configs=(
+                config_cache.ip_lookup_config(hn) for hn in sorted(config_cache.hosts_config.hosts)
+            ),
+            configured_ipv4_addresses={},
+            configured_ipv6_addresses={},
+            simulation_mode=False,
+            override_dns=None,
+            timeout=0.1,
+        )
+    finally:
+        resolver_stuck.set()
+    for thread in threading.enumerate():
+        if thread.name.startswith("ip_lookup"):
+            thread.join()
+
+    assert result == (1, ["slow"])
+    # The late result of the timed out lookup is dropped
+    assert ip_lookup._get_ip_lookup_cache().get((HostName("slow"), socket.AF_INET)) is None
+
+
 @pytest.mark.parametrize(
     "hostname_str, tags, result_address",
     [
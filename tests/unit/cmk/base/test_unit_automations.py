@@ -5,6 +5,8 @@
 
 # pylint: disable=protected-access
 
+from pathlib import Path
+
 from pytest import MonkeyPatch
 
 from tests.testlib.base import Scenario
@@ -122,3 +124,33 @@ def test_service_labels(monkeypatch):
             "CPU temp": {"label1": "val1"},
         }
     )
+
+
+def test_delete_hosts_removes_snmpwalk_index(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setattr(automations, "snmpwalks_dir", str(tmp_path))
+    (tmp_path / ".index").mkdir()
+    (tmp_path / "test-host").write_text(".1.3.6.1.2.1.1.1.0 walk\n")
+    (tmp_path / ".index" / "test-host").write_bytes(b"index")
+
+    automations.AutomationDeleteHosts().execute(["test-host"])
+
+    # The walk is kept, only its index is removed
+    assert (tmp_path / "test-host").exists()
+    assert not (tmp_path / ".index" / "test-host").exists()
+
+
+def test_rename_hosts_moves_snmpwalk_index(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setattr(automations, "snmpwalks_dir", str(tmp_path))
+    (tmp_path / ".index").mkdir()
+    (tmp_path / "old").write_text(".1.3.6.1.2.1.1.1.0 walk\n")
+    (tmp_path / ".index" / "old").write_bytes(b"index")
+
+    automation = automations.AutomationRenameHosts()
+    automation._finished_history_files[("old", "new")] = []
+
+    actions = automation._rename_host_files("old", "new")
+
+    assert "snmpwalk" in actions
+    assert (tmp_path / "new").exists()
+    assert (tmp_path / ".index" / "new").read_bytes() == b"index"
+    assert not (tmp_path / ".index" / "old").exists()
@@ -3,6 +3,8 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+# pylint: disable=protected-access
+
 import logging
 
 from tests.unit.cmk.ec.helpers import new_event
@@ -12,6 +14,7 @@ from cmk.utils.hostaddress import HostName
 import cmk.ec.export as ec
 from cmk.ec.config import Config, MatchGroups, ServiceLevel
 from cmk.ec.main import create_history, EventServer, StatusTableEvents, StatusTableHistory
+from cmk.ec.perfcounters import Perfcounters
 
 RULE = ec.Rule(
     actions=[],
@@ -61,3 +64,21 @@ def test_event_rewrite(
 
     assert event["text"] == "SUPERWARN"
     assert event["state"] == 2
+
+
+def test_process_event_batches(
+    event_server: EventServer,
+    perfcounters: Perfcounters,
+) -> None:
+    event_server.process_event_batches(
+        list(
+            event_server.create_events_from_syslog_messages(
+                [b"<78>Mar 22 09:15:00 host app: message %d" % n for n in range(5)], None
+            )
+        ),
+        batch_size=2,
+    )
+
+    assert perfcounters._counters["messages"] == 5
+    assert perfcounters._sizes["batch_size"] > 1
+    assert perfcounters._sizes["queue_depth"] > 2
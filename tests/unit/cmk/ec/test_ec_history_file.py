@@ -56,6 +56,17 @@ def test_file_add_get(history: FileHistory) -> None:
     assert row[column_index("event_host")] == "ABC1"
 
 
+def test_file_add_batched(history: FileHistory, settings: ec.Settings) -> None:
+    with history.batched():
+        with history.batched():
+            history.add(event=ec.Event(host=HostName("ABC1"), text="Event1 text"), what="NEW")
+        history.add(event=ec.Event(host=HostName("ABC2"), text="Event2 text"), what="NEW")
+        assert not list(settings.paths.history_dir.value.glob("*.log"))
+
+    (logfile,) = settings.paths.history_dir.value.glob("*.log")
+    assert [line.split("\t")[1] for line in logfile.read_text().splitlines()] == ["NEW", "NEW"]
+
+
 def test_current_history_period(config: Config) -> None:
     """timestamp of the beginning of the current history period correctly returned."""
     with time_machine.travel(datetime.datetime.fromtimestamp(1550000000.0, tz=ZoneInfo("CET"))):
@@ -201,6 +201,18 @@ def test_file_add_get(history_sqlite: SQLiteHistory) -> None:
     assert row["contact_groups"] == ["some string1", "another string1"]  # type: ignore[call-overload]
 
 
+def test_add_batched(history_sqlite: SQLiteHistory) -> None:
+    def num_entries() -> int:
+        return history_sqlite.conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    with history_sqlite.batched():
+        history_sqlite.add(event=ec.Event(host=HostName("ABC1"), text="Event1 text"), what="NEW")
+        history_sqlite.add(event=ec.Event(host=HostName("ABC2"), text="Event2 text"), what="NEW")
+        assert num_entries() == 0
+
+    assert num_entries() == 2
+
+
 def test_housekeeping(history_sqlite: SQLiteHistory) -> None:
     """Add 2 events to history, drop the older one."""
 
@@ -5,12 +5,13 @@
 """Test different EC standalone helper functions"""
 
 import ipaddress
+import socket
 
 import pytest
 from hypothesis import given, settings
 from hypothesis.strategies import ip_addresses
 
-from cmk.ec.main import allowed_ip, unmap_ipv4_address
+from cmk.ec.main import allowed_ip, receive_datagrams, unmap_ipv4_address
 from cmk.ec.rule_matcher import match_ip_network
 
 ACCESS_LIST = [
@@ -75,6 +76,23 @@ def test_unmap_ipv4_address(ip_address: str, expected: str) -> None:
     assert unmap_ipv4_address(ip_address) == expected
 
 
+def test_receive_datagrams() -> None:
+    sender, receiver = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    with sender, receiver:
+        for n in range(5):
+            sender.send(b"message %d" % n)
+
+        assert [m for m, _a in receive_datagrams(receiver, 4096, 3)] == [
+            b"message 0",
+            b"message 1",
+            b"message 2",
+        ]
+        assert [m for m, _a in receive_datagrams(receiver, 4096, 3)] == [
+            b"message 3",
+            b"message 4",
+        ]
+
+
 @pytest.mark.parametrize(
     "pattern, ip, expected",
     (
@@ -34,6 +34,15 @@ def test_perfcounters_count_time() -> None:
     assert c._times["processing"] == 1.04
 
 
+def test_perfcounters_count_size() -> None:
+    c = Perfcounters(logger)
+    assert "batch_size" not in c._sizes
+    c.count_size("batch_size", 100)
+    assert c._sizes["batch_size"] == 100
+    c.count_size("batch_size", 200)
+    assert c._sizes["batch_size"] == pytest.approx(105)
+
+
 def test_perfcounters_do_statistics(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr("time.time", lambda: 1.0)
 
@@ -85,6 +94,7 @@ def test_perfcounters_column_default_values() -> None:
             and column_name.endswith("_rate")
             or column_name.startswith("status_")
             and column_name.endswith("_rate")
+            or column_name.removeprefix("status_average_") in c._size_weights
         ):
             assert isinstance(default_value, float)
             assert default_value == 0.0
@@ -120,6 +130,9 @@ def test_perfcounters_correct_status_values() -> None:
             counter_name = column_name.split("_")[-2]
             assert column_value == c._times.get(counter_name, 0.0)
 
+        elif (counter_name := column_name.removeprefix("status_average_")) in c._size_weights:
+            assert column_value == c._sizes.get(counter_name, 0.0)
+
         elif column_name.startswith("status_average_") and column_name.endswith("_rate"):
             counter_name = column_name.split("_")[-2]
             assert column_value == c._average_rates.get(counter_name, 0.0)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import itertools
+import re
+
+import pytest
+
+from livestatus import SiteId
+
+from cmk.utils.hostaddress import HostName
+
+import cmk.ec.export as ec
+from cmk.ec.rule_index import Literal, required_literal, RuleIndex
+from cmk.ec.rule_matcher import compile_rule, MatchSuccess, RuleMatcher
+
+
+def _rule(rule_id: str, **conditions: object) -> ec.Rule:
+    rule = ec.Rule(id=rule_id, pack="pack", **conditions)  # type: ignore[typeddict-item]
+    compile_rule(rule)
+    return rule
+
+
+def _event(host: str = "host", application: str = "app", text: str = "text") -> ec.Event:
+    return ec.Event(
+        facility=1,
+        priority=2,
+        host=HostName(host),
+        ipaddress="127.0.0.1",
+        application=application,
+        text=text,
+    )
+
+
+@pytest.mark.parametrize(
+    "pattern, expected",
+    [
+        ("Disk Full", Literal("disk full", exact=True)),
+        (re.compile(r"^ODBC error: (.*) failed\.$", re.I), Literal("odbc error: ", exact=False)),
+        (re.compile(r"(.*) failed\.$", re.I), Literal(" failed.", exact=False)),
+        (re.compile(r"ab?c", re.I), Literal("a", exact=False)),
+        (re.compile(r"foo|bar", re.I), None),
+        (re.compile(r"[a-z]+", re.I), None),
+        (re.compile(r"überlauf", re.I), Literal("berlauf", exact=False)),
+    ],
+)
+def test_required_literal(pattern: ec.TextPattern, expected: Literal | None) -> None:
+    assert required_literal(pattern) == expected
+
+
+def test_select_keeps_rule_order() -> None:
+    rules = [
+        _rule("any"),
+        _rule("disk", match="disk full"),
+        _rule("host", match_host="srv01"),
+        _rule("odbc", match="^ODBC error: (.*)$", match_ok="ODBC ok"),
+        _rule("app", match_application="sshd"),
+        _rule("inverted", match="never", invert_matching=True),
+    ]
+    index = RuleIndex(rules)
+    all_rules = index.mask(rules)
+
+    assert [r["id"] for r in index.select(_event(text="Hello"), all_rules)] == [
+        "any",
+        "inverted",
+    ]
+    assert [
+        r["id"]
+        for r in index.select(
+            _event(host="SRV01", application="sshd[42]", text="odbc OK, disk full"), all_rules
+        )
+    ] == ["any", "disk", "host", "odbc", "app", "inverted"]
+    assert [r["id"] for r in index.select(_event(text="disk full"), index.mask(rules[2:]))] == [
+        "inverted"
+    ]
+    assert index.stats.events == 3
+    assert index.stats.selected == 9
+
+
+def test_select_non_ascii_text() -> None:
+    rule = _rule("regex", match="^disk (.*)$")
+    index = RuleIndex([rule])
+
+    # The regex matches "dısk" case insensitively, so the rule must not be ruled out
+    assert index.select(_event(text="DIsk 1"), index.mask([rule])) == [rule]
+    assert index.select(_event(text="dısk 1"), index.mask([rule])) == [rule]
+    assert not index.select(_event(text="desk 1"), index.mask([rule]))
+
+
+def test_select_finds_overlapping_literals() -> None:
+    rules = [
+        _rule("short", match="disk"),
+        _rule("long", match="disk full"),
+        _rule("inner", match="sk f"),
+    ]
+    index = RuleIndex(rules)
+
+    assert index.select(_event(text="The disk full warning"), index.mask(rules)) == rules
+    assert index.select(_event(text="The disk is ok"), index.mask(rules)) == rules[:1]
+
+
+_PATTERNS = ["", "disk", "Disk Full", "^disk (.*)$", "(.*) failed$", "[0-9]+ errors", "srv0[12]"]
+_TEXTS = ["", "Disk full", "disk  full", "mount failed", "12 errors", "SRV01", "srv02x", "dısk x"]
+_HOSTS = ["", "disk", "Disk-Full", "srv01", "SRV02x", "12.errors"]
+
+
+def test_select_never_rules_out_matching_rules() -> None:
+    matcher = RuleMatcher(logger=None, omd_site_id=SiteId("site"), is_active_time_period=bool)
+    rules = [
+        _rule(
+            f"{n}",
+            **{
+                k: v
+                for k, v in (
+                    ("match", match),
+                    ("match_ok", match_ok),
+                    ("match_host", host),
+                    ("match_application", application),
+                )
+                if v
+            },
+        )
+        for n, (match, match_ok, host, application) in enumerate(
+            itertools.product(_PATTERNS, _PATTERNS[:3], _PATTERNS, _PATTERNS[:4])
+        )
+    ]
+    index = RuleIndex(rules)
+
+    for host, application, text in itertools.product(_HOSTS, _TEXTS[:3], _TEXTS):
+        event = _event(host=host, application=application, text=text)
+        selected = {r["id"] for r in index.select(event, index.mask(rules))}
+        for rule in rules:
+            if isinstance(matcher.event_rule_matches(rule, event), MatchSuccess):
+                assert rule["id"] in selected, (rule, event)
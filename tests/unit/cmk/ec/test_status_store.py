@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import logging
+from pathlib import Path
+
+import pytest
+
+from cmk.utils.hostaddress import HostName
+
+import cmk.ec.export as ec
+from cmk.ec.status_store import PackedEventStatus, StatusStore
+
+
+def _store(tmp_path: Path) -> StatusStore:
+    return StatusStore(
+        tmp_path / "status", tmp_path / "status.journal", logging.getLogger("cmk.mkeventd")
+    )
+
+
+def _event(event_id: int, text: str = "text") -> ec.Event:
+    return ec.Event(
+        id=event_id,
+        host=HostName(f"host{event_id}"),
+        text=text,
+        count=1,
+        match_groups=("a", "b"),
+        core_host=None,
+    )
+
+
+def _status(events: list[ec.Event], rule_stats: dict[str, int] | None = None) -> PackedEventStatus:
+    return PackedEventStatus(
+        next_event_id=max((e["id"] for e in events), default=0) + 1,
+        events=events,
+        rule_stats=rule_stats or {},
+        interval_starts={},
+    )
+
+
+def test_load_without_status(tmp_path: Path) -> None:
+    assert _store(tmp_path).load() is None
+
+
+def test_save_changes_incrementally(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+    events = [_event(1), _event(2), _event(3)]
+    assert store.save(_status(events)) == "snapshot of 3 events"
+    assert store.save(_status(events)) == "no changes"
+
+    events[1]["count"] = 2
+    del events[0]
+    events.append(_event(4))
+    assert store.save(_status(events, {"rule": 3})) == "2 changed and 1 removed events"
+    assert (tmp_path / "status.journal").exists()
+
+    assert _store(tmp_path).load() == _status(
+        [_event(2) | {"count": 2}, _event(3), _event(4)], {"rule": 3}
+    )
+
+
+def test_compact(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+    store.save(_status([_event(1)]))
+    store.save(_status([_event(1, "changed")]))
+    assert store.save(_status([_event(1, "changed")]), compact=True) == "snapshot of 1 events"
+
+    assert not (tmp_path / "status.journal").exists()
+    assert _store(tmp_path).load() == _status([_event(1, "changed")])
+
+
+def test_save_after_load_continues_journal(tmp_path: Path) -> None:
+    _store(tmp_path).save(_status([_event(1)]))
+
+    store = _store(tmp_path)
+    status = store.load()
+    assert status is not None
+    status["events"].append(_event(2))
+    status["next_event_id"] = 3
+    assert store.save(status) == "1 changed and 0 removed events"
+
+    assert _store(tmp_path).load() == _status([_event(1), _event(2)])
+
+
+def test_ignore_journal_of_older_snapshot(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+    store.save(_status([_event(1)]))
+    store.save(_status([_event(1, "old")]))
+    journal = (tmp_path / "status.journal").read_bytes()
+    store.save(_status([_event(1, "new")]), compact=True)
+
+    # E.g. a crash after writing the snapshot but before removing the journal
+    (tmp_path / "status.journal").write_bytes(journal)
+    assert _store(tmp_path).load() == _status([_event(1, "new")])
+
+
+@pytest.mark.parametrize("cut_off", [1, 3, 10])
+def test_ignore_incomplete_journal_record(tmp_path: Path, cut_off: int) -> None:
+    store = _store(tmp_path)
+    store.save(_status([_event(1)]))
+    store.save(_status([_event(1), _event(2)]))
+    store.save(_status([_event(1), _event(2), _event(3)]))
+    journal = tmp_path / "status.journal"
+    journal.write_bytes(journal.read_bytes()[:-cut_off])
+
+    store = _store(tmp_path)
+    assert store.load() == _status([_event(1), _event(2)])
+    # The next record has to be readable again
+    status = store.load()
+    assert status is not None
+    status["events"].append(_event(4))
+    status["next_event_id"] = 5
+    store.save(status)
+    assert _store(tmp_path).load() == _status([_event(1), _event(2), _event(4)])
+
+
+def test_load_legacy_status(tmp_path: Path) -> None:
+    status = _status([_event(1)], {"rule": 1})
+    (tmp_path / "status").write_text(repr(status) + "\n", encoding="utf-8")
+
+    store = _store(tmp_path)
+    assert store.load() == status
+    assert store.save(status) == "snapshot of 1 events"
+    assert _store(tmp_path).load() == status
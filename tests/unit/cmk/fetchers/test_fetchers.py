@@ -51,6 +51,7 @@ from cmk.fetchers._ipmi import IPMISensor
 from cmk.fetchers.filecache import (
     AgentFileCache,
     FileCache,
+    FileCacheCompression,
     FileCacheMode,
     MaxAge,
     NoCache,
@@ -80,6 +81,7 @@ def clone_file_cache(file_cache: FileCache) -> FileCache:
         simulation=file_cache.simulation,
         use_only_cache=file_cache.use_only_cache,
         file_cache_mode=file_cache.file_cache_mode,
+        compression=file_cache.compression,
     )
 
 
@@ -148,6 +150,34 @@ class TestAgentFileCache_and_SNMPFileCache:
         assert clone.file_cache_mode is FileCacheMode.READ_WRITE
         assert clone.read(mode) == raw_data
 
+    @pytest.mark.parametrize("compression", [FileCacheCompression.ZLIB, FileCacheCompression.LZMA])
+    def test_read_write_compressed(
+        self,
+        file_cache: FileCache,
+        path: Path,
+        raw_data: AgentRawData | SNMPRawData,
+        compression: FileCacheCompression,
+    ) -> None:
+        mode = Mode.DISCOVERY
+        file_cache.file_cache_mode = FileCacheMode.READ_WRITE
+        file_cache.compression = compression
+
+        file_cache.write(raw_data, mode)
+
+        assert path.read_bytes().startswith(b"\0CMKFC")
+        assert file_cache.read(mode) == raw_data
+
+        # The codec is detected when reading
+        clone = clone_file_cache(file_cache)
+        clone.compression = FileCacheCompression.NONE
+        assert clone.read(mode) == raw_data
+
+    def test_read_corrupt_compressed(self, file_cache: FileCache, path: Path) -> None:
+        file_cache.file_cache_mode = FileCacheMode.READ_WRITE
+        path.write_bytes(b"\0CMKFC\x01not zlib")
+
+        assert file_cache.read(Mode.DISCOVERY) is None
+
     def test_read_only(
         self,
         file_cache: FileCache,
@@ -10,8 +10,42 @@ from pathlib import Path
 
 import pytest
 
+from cmk.utils.hostaddress import HostAddress, HostName
+
+from cmk.snmplib import SNMPBackendEnum, SNMPHostConfig, SNMPVersion
+
 import cmk.fetchers.snmp_backend._utils as utils
-from cmk.fetchers.snmp_backend import StoredWalkSNMPBackend
+from cmk.fetchers.snmp_backend import IndexedWalkSNMPBackend, StoredWalkSNMPBackend
+
+_SNMP_CONFIG = SNMPHostConfig(
+    is_ipv6_primary=False,
+    hostname=HostName("unittest"),
+    ipaddress=HostAddress("127.0.0.1"),
+    credentials="",
+    port=0,
+    bulkwalk_enabled=True,
+    snmp_version=SNMPVersion.V2C,
+    bulk_walk_size_of=0,
+    timing={},
+    oid_range_limits={},
+    snmpv3_contexts=[],
+    character_encoding=None,
+    snmp_backend=SNMPBackendEnum.STORED_WALK,
+)
+
+_WALK = """\
+.1.3.6.1.2.1.1.1.0 "Linux box"
+.1.3.6.1.2.1.1.2.0 .1.3.6.1.4.1.8072.3.2.10
+.1.3.6.1.2.1.2.2.1.1.1 1
+.1.3.6.1.2.1.2.2.1.1.2 2
+.1.3.6.1.2.1.2.2.1.1.10 10
+.1.3.6.1.2.1.2.2.1.2.1 "lo"
+.1.3.6.1.2.1.2.2.1.2.2 "eth0
+second line"
+.1.3.6.1.2.1.2.2.1.2.10 "B2 E0 7D 2C 4D 15 "
+.1.3.6.1.2.1.2.2.1.20
+.1.3.6.1.2.1.25.1.1.0 12345
+"""
 
 
 @pytest.mark.parametrize(
@@ -59,6 +93,85 @@ class TestStoredWalkSNMPBackend:
         ]
 
 
+class TestIndexedWalkSNMPBackend:
+    @pytest.fixture(name="walk_path")
+    def fixture_walk_path(self, tmp_path: Path) -> Path:
+        walk_path = tmp_path / "unittest"
+        walk_path.write_text(_WALK)
+        return walk_path
+
+    @pytest.mark.parametrize(
+        "oid",
+        [
+            ".1.3.6.1.2.1.1.1.0",
+            "1.3.6.1.2.1.1.1.0",
+            ".1.3.6.1.2.1.1",
+            ".1.3.6.1.2.1.2.2.1.1",
+            ".1.3.6.1.2.1.2.2.1.2",
+            ".1.3.6.1.2.1.2.2.1.2.1",
+            ".1.3.6.1.2.1.2.2.1.20",
+            ".1.3.6.1.2.1.2.2.1.*",
+            ".1.3.6.1.2.1.25.1.1",
+            ".1.3.6.1.2.1.3",
+            ".1.3.6.1.2.2",
+            ".2",
+        ],
+    )
+    def test_same_as_stored_walk(self, walk_path: Path, oid: str) -> None:
+        logger = logging.getLogger("test")
+        indexed = IndexedWalkSNMPBackend(_SNMP_CONFIG, logger, walk_path)
+        stored = StoredWalkSNMPBackend(_SNMP_CONFIG, logger, walk_path)
+        assert indexed.walk(oid, context="") == stored.walk(oid, context="")
+        assert indexed.get(oid, context="") == stored.get(oid, context="")
+
+    def test_walk(self, walk_path: Path) -> None:
+        backend = IndexedWalkSNMPBackend(_SNMP_CONFIG, logging.getLogger("test"), walk_path)
+        assert backend.walk(".1.3.6.1.2.1.2.2.1.2", context="") == [
+            (".1.3.6.1.2.1.2.2.1.2.1", b"lo"),
+            (".1.3.6.1.2.1.2.2.1.2.2", b"eth0\nsecond line"),
+            (".1.3.6.1.2.1.2.2.1.2.10", b"\xb2\xe0},M\x15"),
+        ]
+        assert backend.walk(".1.3.6.1.2.1.2.2.1.20.*", context="") == []
+
+    def test_unsorted_walk(self, tmp_path: Path) -> None:
+        walk_path = tmp_path / "unittest"
+        walk_path.write_text(".1.2.10 c\n.1.2.2 b\ninvalid line\n.1.2.x invalid\n.1.1 a\n")
+        backend = IndexedWalkSNMPBackend(_SNMP_CONFIG, logging.getLogger("test"), walk_path)
+        assert backend.walk(".1.2", context="") == [
+            (".1.2.2", b"b\ninvalid line"),
+            (".1.2.10", b"c"),
+        ]
+        assert backend.get(".1.1", context="") == b"a"
+
+    def test_index_file(self, walk_path: Path, tmp_path: Path) -> None:
+        logger = logging.getLogger("test")
+        index_dir = tmp_path / "index"
+        backend = IndexedWalkSNMPBackend(_SNMP_CONFIG, logger, walk_path, index_dir=index_dir)
+        assert backend.get(".1.3.6.1.2.1.25.1.1.0", context="") == b"12345"
+        assert backend.index_path == index_dir / "unittest"
+        index_data = backend.index_path.read_bytes()
+
+        backend = IndexedWalkSNMPBackend(_SNMP_CONFIG, logger, walk_path, index_dir=index_dir)
+        assert backend.get(".1.3.6.1.2.1.25.1.1.0", context="") == b"12345"
+        assert backend.index_path.read_bytes() == index_data
+
+        backend.index_path.write_bytes(index_data[:-1])
+        backend = IndexedWalkSNMPBackend(_SNMP_CONFIG, logger, walk_path, index_dir=index_dir)
+        assert backend.get(".1.3.6.1.2.1.25.1.1.0", context="") == b"12345"
+        assert backend.index_path.read_bytes() == index_data
+
+        walk_path.write_text(_WALK.replace("12345", "42"))
+        backend = IndexedWalkSNMPBackend(_SNMP_CONFIG, logger, walk_path, index_dir=index_dir)
+        assert backend.get(".1.3.6.1.2.1.25.1.1.0", context="") == b"42"
+        assert backend.index_path.read_bytes() != index_data
+
+    def test_empty_walk(self, tmp_path: Path) -> None:
+        walk_path = tmp_path / "unittest"
+        walk_path.touch()
+        backend = IndexedWalkSNMPBackend(_SNMP_CONFIG, logging.getLogger("test"), walk_path)
+        assert backend.walk(".1.3", context="") == []
+
+
 @pytest.fixture
 def create_files(tmpdir):
     tmpdir.mkdir("walkdata")
@@ -136,6 +136,68 @@ def test_fetch_rrd_data_for_graph_with_conversion(
         }
 
 
+def test_fetch_rrd_data_for_graph_batched(
+    mock_livestatus: MockLiveStatusConnection,
+    request_context: None,
+) -> None:
+    services = ["Temperature Zone 6", "Temperature Zone 7"]
+    graph_recipe = _GRAPH_RECIPE.model_copy(
+        update={
+            "metrics": [
+                _GRAPH_RECIPE.metrics[0].model_copy(
+                    update={
+                        "operation": MetricOpRRDSource(
+                            site_id=SiteId("NO_SITE"),
+                            host_name=HostName("my-host"),
+                            service_name=service,
+                            metric_name="temp",
+                            consolidation_func_name="max",
+                            scale=1,
+                        )
+                    }
+                )
+                for service in services
+            ]
+        }
+    )
+    with mock_livestatus(expect_status_query=True) as mock_live:
+        mock_live.add_table(
+            "services",
+            [
+                {
+                    "host_name": "my-host",
+                    "service_description": service,
+                    "rrddata:temp:temp.max:1681985455:1681999855:20": [1, 2, 3, 4, 5, None],
+                }
+                for service in services
+            ],
+        )
+        # One query for all services
+        mock_live.expect_query(
+            """GET services
+Columns: host_name service_description rrddata:temp:temp.max:1681985455:1681999855:20
+Filter: host_name = my-host
+Filter: service_description = Temperature Zone 6
+And: 2
+Filter: host_name = my-host
+Filter: service_description = Temperature Zone 7
+And: 2
+Or: 2
+
+            """,
+            sites=["NO_SITE"],
+        )
+        expected = {
+            RRDDataKey(
+                SiteId("NO_SITE"), HostName("my-host"), service, "temp", "max", 1
+            ): TimeSeries([4, 5, None], time_window=(1, 2, 3))
+            for service in services
+        }
+        assert fetch_rrd_data_for_graph(graph_recipe, _GRAPH_DATA_RANGE) == expected
+        # The same data again within the request is not queried again
+        assert fetch_rrd_data_for_graph(graph_recipe, _GRAPH_DATA_RANGE) == expected
+
+
 def test_translate_and_merge_rrd_columns() -> None:
     assert translate_and_merge_rrd_columns(
         MetricName("my_metric"),
@@ -29,3 +29,28 @@ def test__time_series_math_exc_symbol(args: tuple[Literal["%"], list[TimeSeries]
 def test__time_series_math_stable_singles(operator: Operators) -> None:
     test_ts = TimeSeries([0, 180, 60, 6, 5, 10, None, -2, -3.14])
     assert time_series_math(operator, [test_ts]) == test_ts
+
+
+@pytest.mark.parametrize(
+    "operator, expected",
+    [
+        pytest.param("+", [3.0, 1.0, 4.0, None], id="sum"),
+        pytest.param("*", [2.0, None, 0.0, None], id="product"),
+        pytest.param("-", [-1.0, None, 4.0, None], id="difference"),
+        pytest.param("/", [0.5, None, None, None], id="fraction"),
+        pytest.param("MAX", [2.0, 1.0, 4.0, None], id="maximum"),
+        pytest.param("MIN", [1.0, 1.0, 0.0, None], id="minimum"),
+        pytest.param("AVERAGE", [1.5, 1.0, 2.0, None], id="average"),
+        pytest.param("MERGE", [1.0, 1.0, 4.0, None], id="merge"),
+    ],
+)
+def test__time_series_math_missing_values(
+    operator: Operators, expected: list[float | None]
+) -> None:
+    assert time_series_math(
+        operator,
+        [
+            TimeSeries([1, 1, 4, None], (0, 40, 10)),
+            TimeSeries([2, None, 0, None, 7], (0, 50, 10)),
+        ],
+    ) == TimeSeries(expected, (0, 40, 10))
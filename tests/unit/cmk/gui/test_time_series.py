@@ -101,3 +101,20 @@ class TestTimeseries:
             ).count(None)
             == 2
         )
+
+    def test_missing_values(self) -> None:
+        ts = TimeSeries([1.0, None, float("nan"), 4], time_window=(0, 40, 10))
+        assert ts.values == [1.0, None, None, 4.0]
+        assert ts[1] is None
+        assert ts[-1] == 4.0
+        assert ts == TimeSeries([1, None, None, 4], time_window=(0, 40, 10))
+
+    def test_assign_values(self) -> None:
+        ts = TimeSeries([1, 2, 3], time_window=(0, 30, 10))
+        ts.values = [None, 5]
+        assert list(ts) == [None, 5.0]
+        assert len(ts) == 2
+
+    def test_invalid_consolidation_function(self) -> None:
+        with pytest.raises(ValueError, match="Invalid Aggregation function"):
+            TimeSeries([10, 25, 5, 15, 20, 25]).downsample((10, 30, 10), "last")
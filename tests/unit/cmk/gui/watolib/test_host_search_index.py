@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+from pathlib import Path
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.gui.watolib.host_search_index import HostSearchIndex, stat_key
+
+
+def test_stat_key(tmp_path: Path) -> None:
+    path = tmp_path / "hosts.mk"
+    assert stat_key(path) is None
+    path.write_text("all_hosts = []\n")
+    assert stat_key(path) == stat_key(str(path)) is not None
+
+
+def test_update_and_lookup_folder(tmp_path: Path) -> None:
+    index = HostSearchIndex(tmp_path / "index.pkl", ((1, 2, 3),))
+    index.update_folder(
+        "a/b",
+        ((4, 5, 6),),
+        {
+            HostName("h1"): {
+                "alias": "Alias of h1",
+                "ipaddress": "127.0.0.1",
+                "tag_agent": "cmk-agent",
+                "contactgroups": {"groups": ["all"]},
+            }
+        },
+    )
+
+    # Only the indexed attributes are kept
+    assert index.folder("a/b", ((4, 5, 6),)) == {
+        HostName("h1"): {"alias": "Alias of h1", "ipaddress": "127.0.0.1", "tag_agent": "cmk-agent"}
+    }
+    # The hosts or folder files have changed since
+    assert index.folder("a/b", ((4, 5, 7),)) is None
+    assert index.folder("a", ((4, 5, 6),)) is None
+
+
+def test_save_and_load(tmp_path: Path) -> None:
+    path = tmp_path / "wato" / "index.pkl"
+    index = HostSearchIndex(path, ((1, 2, 3),))
+    index.update_folder("", ((4, 5, 6),), {HostName("h1"): {"site": "heute"}})
+    index.save()
+
+    assert HostSearchIndex(path, ((1, 2, 3),)).folder("", ((4, 5, 6),)) == {
+        HostName("h1"): {"site": "heute"}
+    }
+    # The tag configuration has changed since
+    assert HostSearchIndex(path, ((1, 2, 4),)).folder("", ((4, 5, 6),)) is None
+
+
+def test_load_corrupt_file(tmp_path: Path) -> None:
+    path = tmp_path / "index.pkl"
+    path.write_bytes(b"garbage")
+    assert HostSearchIndex(path, ()).folder("", ()) is None
+
+
+def test_retain(tmp_path: Path) -> None:
+    path = tmp_path / "index.pkl"
+    index = HostSearchIndex(path, ())
+    index.update_folder("a", (), {})
+    index.update_folder("b", (), {})
+    index.save()
+
+    index.retain({"a"})
+    index.save()
+
+    index = HostSearchIndex(path, ())
+    assert index.folder("a", ()) == {}
+    assert index.folder("b", ()) is None
@@ -16,6 +16,7 @@ from collections.abc import Callable, Iterator, Sequence
 from contextlib import contextmanager
 from dataclasses import dataclass
 from itertools import count
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 from zoneinfo import ZoneInfo
 
@@ -23,6 +24,8 @@ import pytest
 import time_machine
 from pytest import MonkeyPatch
 
+from tests.unit.cmk.gui.conftest import SetConfig
+
 from livestatus import SiteId
 
 from cmk.utils.hostaddress import HostAddress, HostName
@@ -37,6 +40,7 @@ from cmk.gui.logged_in import user as logged_in_user
 from cmk.gui.watolib import hosts_and_folders
 from cmk.gui.watolib.host_attributes import HostAttributes
 from cmk.gui.watolib.hosts_and_folders import EffectiveAttributes, Folder, folder_tree
+from cmk.gui.watolib.hosts_database import FolderHosts, hosts_file_stat_key, HostsDatabase
 from cmk.gui.watolib.search import MatchItem
 
 from cmk.ccc.exceptions import MKGeneralException
@@ -1144,3 +1148,86 @@ def test_folder_times() -> None:
 
     folder.persist_instance()
     assert int(meta_data["updated_at"]) > int(current)
+
+
+@pytest.fixture(name="hosts_database")
+def fixture_hosts_database(set_config: SetConfig) -> Iterator[HostsDatabase]:
+    with set_config(wato_use_hosts_database=True):
+        database = hosts_and_folders.hosts_database()
+        assert database is not None
+        yield database
+        database.close()
+        database.path.unlink(missing_ok=True)
+
+
+def _hosts_file_stat_key(folder: Folder) -> tuple[int, int, int]:
+    stat_key = hosts_file_stat_key(Path(folder.hosts_file_path()))
+    assert stat_key is not None
+    return stat_key
+
+
+def test_hosts_database_save_and_load_hosts(
+    hosts_database: HostsDatabase, monkeypatch: MonkeyPatch
+) -> None:
+    tree = folder_tree()
+    folder = tree.root_folder().create_subfolder("db", "db", {})
+    folder.create_hosts([(HostName("h1"), {"alias": "Alias of h1"}, None)])
+
+    folder_hosts = hosts_database.load_folder("db", _hosts_file_stat_key(folder))
+    assert folder_hosts is not None
+    assert list(folder_hosts.all_hosts) == ["h1"]
+    assert folder_hosts.host_attributes[HostName("h1")]["alias"] == "Alias of h1"
+
+    # The hosts of a newly loaded folder come from the database
+    monkeypatch.setattr(Folder, "_load_hosts_file", lambda self: pytest.fail("file was read"))
+    loaded = Folder.load(tree=tree, name="db", parent_folder=tree.root_folder())
+    assert list(loaded.hosts()) == ["h1"]
+    assert loaded.hosts()[HostName("h1")].attributes["alias"] == "Alias of h1"
+
+
+def test_hosts_database_falls_back_to_changed_hosts_file(hosts_database: HostsDatabase) -> None:
+    tree = folder_tree()
+    folder = tree.root_folder().create_subfolder("db", "db", {})
+    folder.create_hosts([(HostName("h1"), {}, None)])
+    stat_key = _hosts_file_stat_key(folder)
+    hosts_database.save_folder(
+        "db",
+        stat_key,
+        FolderHosts(locked=False, host_attributes={}, all_hosts=[HostName("bogus")], clusters={}),
+    )
+
+    # The hosts file is changed outside of the GUI
+    os.utime(folder.hosts_file_path(), ns=(stat_key[1] + 10**9, stat_key[1] + 10**9))
+
+    loaded = Folder.load(tree=tree, name="db", parent_folder=tree.root_folder())
+    assert list(loaded.hosts()) == ["h1"]
+    # The entry is refreshed with the content of the file
+    folder_hosts = hosts_database.load_folder("db", _hosts_file_stat_key(folder))
+    assert folder_hosts is not None
+    assert list(folder_hosts.all_hosts) == ["h1"]
+
+
+def test_hosts_database_host_moved_to_other_folder(hosts_database: HostsDatabase) -> None:
+    tree = folder_tree()
+    folder_a = tree.root_folder().create_subfolder("a", "a", {})
+    folder_b = tree.root_folder().create_subfolder("b", "b", {})
+    folder_a.create_hosts([(HostName("h1"), {}, None), (HostName("h2"), {}, None)])
+
+    folder_a.move_hosts([HostName("h1")], folder_b)
+
+    assert hosts_database.folders_of_host(HostName("h1")) == ["b"]
+    host = hosts_and_folders.Host.host(HostName("h1"))
+    assert host is not None
+    assert host.folder().path() == "b"
+
+
+def test_hosts_database_delete_folder(hosts_database: HostsDatabase) -> None:
+    tree = folder_tree()
+    folder = tree.root_folder().create_subfolder("a", "a", {})
+    folder.create_subfolder("b", "b", {}).create_hosts([(HostName("h1"), {}, None)])
+    assert hosts_database.folders_of_host(HostName("h1")) == ["a/b"]
+
+    tree.root_folder().delete_subfolder("a")
+
+    assert not hosts_database.folders_of_host(HostName("h1"))
+    assert hosts_and_folders.Host.host(HostName("h1")) is None
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+from pathlib import Path
+
+from cmk.utils.hostaddress import HostName
+
+from cmk.gui.watolib.host_attributes import HostAttributes
+from cmk.gui.watolib.hosts_database import FolderHosts, hosts_file_stat_key, HostsDatabase
+
+
+def _folder_hosts(*host_names: str) -> FolderHosts:
+    return FolderHosts(
+        locked=False,
+        host_attributes={
+            HostName(name): HostAttributes(alias=f"Alias of {name}") for name in host_names
+        },
+        all_hosts=[HostName(name) for name in host_names],
+        clusters={},
+    )
+
+
+def test_save_and_load_folder(tmp_path: Path) -> None:
+    database = HostsDatabase(tmp_path / "hosts.sqlite")
+    database.save_folder("a/b", (1, 2, 3), _folder_hosts("h1", "h2"))
+
+    assert database.load_folder("a/b", (1, 2, 3)) == _folder_hosts("h1", "h2")
+    # The hosts file has changed since
+    assert database.load_folder("a/b", (1, 2, 4)) is None
+    assert database.load_folder("a", (1, 2, 3)) is None
+
+    database.save_folder("a/b", (5, 6, 7), _folder_hosts("h2"))
+    assert database.load_folder("a/b", (5, 6, 7)) == _folder_hosts("h2")
+
+    # Another process sees the same data
+    assert HostsDatabase(database.path).load_folder("a/b", (5, 6, 7)) == _folder_hosts("h2")
+
+
+def test_folders_of_host(tmp_path: Path) -> None:
+    database = HostsDatabase(tmp_path / "hosts.sqlite")
+    database.save_folder("a", (1, 2, 3), _folder_hosts("h1"))
+    database.save_folder("b", (1, 2, 3), _folder_hosts("h2", "h3"))
+
+    assert database.folders_of_host(HostName("h3")) == ["b"]
+    assert not database.folders_of_host(HostName("unknown"))
+
+    database.remove_folder("b")
+    assert not database.folders_of_host(HostName("h3"))
+    assert database.load_folder("b", (1, 2, 3)) is None
+
+
+def test_hosts_file_stat_key(tmp_path: Path) -> None:
+    hosts_mk = tmp_path / "hosts.mk"
+    assert hosts_file_stat_key(hosts_mk) is None
+    hosts_mk.write_text("all_hosts += []\n")
+    stat_key = hosts_file_stat_key(hosts_mk)
+    assert stat_key is not None and stat_key[0] == 16
+
+
+def test_remove_folder_tree(tmp_path: Path) -> None:
+    database = HostsDatabase(tmp_path / "hosts.sqlite")
+    for folder_path in ("a", "a/b", "a/b/c", "ab"):
+        database.save_folder(folder_path, (1, 2, 3), _folder_hosts(folder_path.replace("/", "-")))
+
+    database.remove_folder_tree("a/b")
+
+    assert database.load_folder("a", (1, 2, 3)) == _folder_hosts("a")
+    assert database.load_folder("a/b", (1, 2, 3)) is None
+    assert database.load_folder("a/b/c", (1, 2, 3)) is None
+    assert database.load_folder("ab", (1, 2, 3)) == _folder_hosts("ab")
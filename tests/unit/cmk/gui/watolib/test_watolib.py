@@ -108,6 +108,7 @@ def test_registered_configvars() -> None:
         "event_limit",
         "eventsocket_queue_len",
         "failed_notification_horizon",
+        "file_cache_compression",
         "hard_query_limit",
         "history_lifetime",
         "history_rotation",
@@ -127,6 +128,8 @@ def test_registered_configvars() -> None:
         "log_messages",
         "log_rulehits",
         "login_screen",
+        "max_concurrent_fetches",
+        "message_batch_size",
         "mkeventd_connect_timeout",
         "mkeventd_notify_contactgroup",
         "mkeventd_notify_facility",
@@ -200,6 +203,7 @@ def test_registered_configvars() -> None:
         "wato_max_snapshots",
         "wato_pprint_config",
         "wato_use_git",
+        "wato_use_hosts_database",
         "graph_timeranges",
         "agent_controller_certificates",
         "rest_api_etag_locking",
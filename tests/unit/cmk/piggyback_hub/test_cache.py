@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+from pathlib import Path
+
+from cmk.utils.agentdatatype import AgentRawData
+from cmk.utils.hostaddress import HostName
+
+from cmk.piggyback import PiggybackFileInfo, PiggybackRawDataInfo
+from cmk.piggyback._hub import HubPayload
+from cmk.piggyback_hub._cache import PayloadCache
+
+_REF_TIME = 1640000000.0
+
+
+def test_store_and_get() -> None:
+    cache = PayloadCache()
+    cache.store(HostName("source2"), {HostName("host"): b"two\n"}, _REF_TIME + 10)
+    cache.store(HostName("source1"), {HostName("host"): b"one\n"}, _REF_TIME)
+
+    assert cache.get(HostName("host")) == [
+        HubPayload(HostName("source1"), _REF_TIME, _REF_TIME, b"one\n"),
+        HubPayload(HostName("source2"), _REF_TIME + 10, _REF_TIME + 10, b"two\n"),
+    ]
+    assert not cache.get(HostName("unknown"))
+
+
+def test_not_updated_payload_keeps_timestamp() -> None:
+    cache = PayloadCache()
+    cache.store(HostName("source"), {HostName("host"): b"data\n"}, _REF_TIME)
+    cache.store(HostName("source"), {HostName("other"): b"data\n"}, _REF_TIME + 10)
+
+    assert cache.get(HostName("host")) == [
+        HubPayload(HostName("source"), _REF_TIME, _REF_TIME + 10, b"data\n"),
+    ]
+
+
+def test_remove_source() -> None:
+    cache = PayloadCache()
+    cache.store(HostName("source"), {HostName("host"): b"data\n"}, _REF_TIME)
+    cache.remove_source(HostName("source"))
+
+    assert cache.get(HostName("host")) == [
+        HubPayload(HostName("source"), _REF_TIME, None, b"data\n"),
+    ]
+
+
+def test_evict() -> None:
+    cache = PayloadCache()
+    cache.store(HostName("source"), {HostName("old"): b"data\n"}, _REF_TIME)
+    cache.store(HostName("source"), {HostName("new"): b"data\n"}, _REF_TIME + 10)
+
+    assert cache.evict(_REF_TIME + 5) == 1
+    assert not cache.get(HostName("old"))
+    assert cache.get(HostName("new"))
+    assert cache.num_piggybacked_hosts == 1
+
+
+def test_load_keeps_more_recent_payloads() -> None:
+    cache = PayloadCache()
+    cache.store(HostName("source"), {HostName("host"): b"new\n"}, _REF_TIME + 10)
+    cache.load(
+        HostName("host"),
+        [
+            PiggybackRawDataInfo(
+                info=PiggybackFileInfo(
+                    source=HostName("source"),
+                    file_path=Path("/dev/null"),
+                    last_update=int(_REF_TIME),
+                    last_contact=int(_REF_TIME),
+                ),
+                raw_data=AgentRawData(b"old\n"),
+            )
+        ],
+    )
+
+    assert cache.get(HostName("host")) == [
+        HubPayload(HostName("source"), _REF_TIME + 10, _REF_TIME + 10, b"new\n"),
+    ]
+
+
+def test_load_prefers_files_within_the_same_second() -> None:
+    cache = PayloadCache()
+    cache.store(HostName("source"), {HostName("host"): b"cached\n"}, _REF_TIME + 0.5)
+    cache.load(
+        HostName("host"),
+        [
+            PiggybackRawDataInfo(
+                info=PiggybackFileInfo(
+                    source=HostName("source"),
+                    file_path=Path("/dev/null"),
+                    last_update=int(_REF_TIME),
+                    last_contact=int(_REF_TIME),
+                ),
+                raw_data=AgentRawData(b"on disk\n"),
+            )
+        ],
+    )
+
+    assert cache.get(HostName("host")) == [
+        HubPayload(HostName("source"), int(_REF_TIME), _REF_TIME + 0.5, b"on disk\n"),
+    ]
+
+
+def test_reload_keeps_changes_while_loading() -> None:
+    cache = PayloadCache()
+    cache.store(HostName("removed"), {HostName("host"): b"gone\n"}, _REF_TIME)
+
+    def load(loaded: PayloadCache) -> None:
+        loaded.store(HostName("source1"), {HostName("host"): b"from disk\n"}, _REF_TIME)
+        cache.store(HostName("source2"), {HostName("host"): b"stored\n"}, _REF_TIME + 10)
+
+    assert not cache.loaded
+    cache.reload(load)
+    assert cache.loaded
+
+    assert cache.get(HostName("host")) == [
+        HubPayload(HostName("source1"), _REF_TIME, _REF_TIME, b"from disk\n"),
+        HubPayload(HostName("source2"), _REF_TIME + 10, _REF_TIME + 10, b"stored\n"),
+    ]
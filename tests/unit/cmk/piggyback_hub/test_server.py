@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+
+import logging
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import pytest
+
+from cmk.utils.hostaddress import HostAddress, HostName
+
+from cmk import piggyback
+from cmk.piggyback import _hub
+from cmk.piggyback._hub import Command, Decoder, Encoder
+from cmk.piggyback_hub._cache import PayloadCache
+from cmk.piggyback_hub._server import PiggybackHubServer
+
+_REF_TIME = 1640000000.0
+
+
+@pytest.fixture(name="hub")
+def fixture_hub(monkeypatch: pytest.MonkeyPatch) -> Iterator[PiggybackHubServer]:
+    # unix socket paths are limited in length, don't use tmp_path
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        socket_path = Path(tmp_dir, "hub")
+        monkeypatch.setattr(_hub, "piggyback_hub_socket", socket_path)
+        server = PiggybackHubServer(socket_path, PayloadCache(), logging.getLogger(), None)
+        server.cache.reload(lambda cache: None)
+        thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01})
+        thread.start()
+        try:
+            yield server
+        finally:
+            server.shutdown()
+            thread.join()
+            server.server_close()
+
+
+def _wait_until(condition: Callable[[], bool]) -> None:
+    """The stores are not answered, so wait for the hub to process them"""
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_hub_not_running() -> None:
+    assert _hub.get_payloads(HostName("host")) is None
+
+
+def test_store_and_get_via_hub(hub: PiggybackHubServer) -> None:
+    piggyback.store_piggyback_raw_data(
+        HostAddress("source"), {HostAddress("host"): (b"line1", b"line2")}, _REF_TIME
+    )
+
+    _wait_until(lambda: len(hub.cache) == 1)
+    assert _hub.get_payloads(HostName("host")) == [
+        _hub.HubPayload(HostName("source"), _REF_TIME, _REF_TIME, b"line1\nline2\n")
+    ]
+    (raw_data,) = piggyback.get_piggyback_raw_data(HostAddress("host"))
+    assert raw_data.raw_data == b"line1\nline2\n"
+    assert raw_data.info.last_update == int(_REF_TIME)
+    assert raw_data.info.last_contact == int(_REF_TIME)
+
+
+def test_hub_serves_cached_data(hub: PiggybackHubServer) -> None:
+    piggyback.store_piggyback_raw_data(
+        HostAddress("source"), {HostAddress("host"): (b"on disk",)}, _REF_TIME
+    )
+    _wait_until(lambda: len(hub.cache) == 1)
+    hub.cache.store(HostName("source"), {HostName("host"): b"cached\n"}, _REF_TIME)
+
+    (raw_data,) = piggyback.get_piggyback_raw_data(HostAddress("host"))
+    assert raw_data.raw_data == b"cached\n"
+    (raw_data,) = piggyback.get_piggyback_raw_data(HostAddress("host"), use_hub=False)
+    assert raw_data.raw_data == b"on disk\n"
+
+
+def test_files_while_hub_loads(hub: PiggybackHubServer, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(hub, "cache", PayloadCache())
+    piggyback.store_piggyback_raw_data(
+        HostAddress("source"), {HostAddress("host"): (b"on disk",)}, _REF_TIME
+    )
+    _wait_until(lambda: len(hub.cache) == 1)
+
+    assert _hub.get_payloads(HostName("host")) is None
+    (raw_data,) = piggyback.get_piggyback_raw_data(HostAddress("host"))
+    assert raw_data.raw_data == b"on disk\n"
+
+
+def test_hub_owns_the_payloads(hub: PiggybackHubServer) -> None:
+    hub.cache.store(HostName("source"), {HostName("host"): b"cached\n"}, _REF_TIME)
+
+    (raw_data,) = piggyback.get_piggyback_raw_data(HostAddress("host"))
+    assert raw_data.raw_data == b"cached\n"
+    assert not piggyback.get_piggyback_raw_data(HostAddress("host"), use_hub=False)
+
+
+def test_remove_source_and_cleanup_via_hub(hub: PiggybackHubServer) -> None:
+    piggyback.store_piggyback_raw_data(
+        HostAddress("source"), {HostAddress("host"): (b"data",)}, _REF_TIME
+    )
+    _wait_until(lambda: len(hub.cache) == 1)
+    piggyback.store_piggyback_raw_data(HostAddress("source"), {}, _REF_TIME + 10)
+
+    (payload,) = hub.cache.get(HostName("host"))
+    assert payload.last_contact is None
+
+    piggyback.cleanup_piggyback_files(_REF_TIME + 5)
+    assert not hub.cache.get(HostName("host"))
+
+
+@pytest.mark.parametrize(
+    "max_age, expected_max_age",
+    [
+        pytest.param(None, 100.0, id="from cleanup"),
+        pytest.param(3600.0, 3600.0, id="configured"),
+    ],
+)
+def test_max_age_from_cleanup(
+    monkeypatch: pytest.MonkeyPatch, max_age: float | None, expected_max_age: float
+) -> None:
+    monkeypatch.setattr("time.time", lambda: _REF_TIME)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        server = PiggybackHubServer(
+            Path(tmp_dir, "hub"), PayloadCache(), logging.getLogger(), max_age
+        )
+        try:
+            server.process(Decoder(Encoder(Command.CLEANUP).timestamp(_REF_TIME - 100).frame()[4:]))
+        finally:
+            server.server_close()
+
+    assert server._max_age == expected_max_age
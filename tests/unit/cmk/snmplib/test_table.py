@@ -34,6 +34,7 @@ from cmk.snmplib import (
     SNMPTable,
     SNMPVersion,
     SpecialColumn,
+    WalkCacheStats,
 )
 
 from cmk.checkengine.fetcher import SourceType
@@ -113,6 +114,104 @@ def test_get_snmp_table(
     assert get_all_snmp_tables(snmp_info) == expected_values
 
 
+class TableBackend(SNMPBackend):
+    """A table with the columns 1 to 6 and three rows"""
+
+    base = ".1.3.6.1.2.1.2.2.1"
+
+    def __init__(self, *args: object, **kw: object) -> None:
+        super().__init__(*args, **kw)  # type: ignore[arg-type]
+        self.walked: list[str] = []
+
+    def get(self, /, *args: object, **kw: object) -> NoReturn:
+        assert False
+
+    def walk(self, /, oid, *, context, **kw):
+        self.walked.append(oid)
+        return [
+            (row_oid, row_oid.encode())
+            for row_oid in (f"{self.base}.{c}.{r}" for c in range(1, 7) for r in (1, 2, 3))
+            if row_oid.startswith(f"{oid}.")
+        ]
+
+
+def _table_tree(*columns: str) -> BackendSNMPTree:
+    return BackendSNMPTree(
+        base=TableBackend.base,
+        oids=[BackendOIDSpec(SpecialColumn.END, "string", False)]
+        + [BackendOIDSpec(c, "string", False) for c in columns],
+    )
+
+
+def _get_table(
+    backend: TableBackend, tree: BackendSNMPTree, walk_cache: dict, stats: WalkCacheStats
+) -> Sequence[SNMPTable]:
+    return get_snmp_table(
+        section_name=SectionName("unit_test"),
+        tree=tree,
+        walk_cache=walk_cache,
+        backend=backend,
+        log=logger.debug,
+        stats=stats,
+    )
+
+
+def test_get_snmp_table_walks_columns_separately() -> None:
+    backend = TableBackend(SNMPConfig, logger)
+    stats = WalkCacheStats()
+
+    table = _get_table(backend, _table_tree("1", "2", "4"), {}, stats)
+
+    assert backend.walked == [f"{TableBackend.base}.{c}" for c in (1, 2, 4)]
+    assert table == [
+        [str(r), *(f"{TableBackend.base}.{c}.{r}" for c in (1, 2, 4))] for r in (1, 2, 3)
+    ]
+    assert stats == WalkCacheStats(requested=3, walks=3)
+    assert stats.avoided == 0
+
+
+def test_get_snmp_table_serves_columns_from_enclosing_walk() -> None:
+    backend = TableBackend(SNMPConfig, logger)
+    stats = WalkCacheStats()
+    walk_cache: dict = {}
+    _get_table(
+        backend,
+        BackendSNMPTree(
+            base=TableBackend.base.rsplit(".", 1)[0],
+            oids=[BackendOIDSpec("1", "string", False)],
+        ),
+        walk_cache,
+        stats,
+    )
+
+    table = _get_table(backend, _table_tree("5"), walk_cache, stats)
+
+    assert backend.walked == [TableBackend.base]
+    assert table == [[str(r), f"{TableBackend.base}.5.{r}"] for r in (1, 2, 3)]
+    assert stats.subtree_hits == 1
+    assert stats.avoided == 1
+
+
+def test_get_snmp_table_does_not_serve_uncached_columns_from_cached_walk() -> None:
+    backend = TableBackend(SNMPConfig, logger)
+    stats = WalkCacheStats()
+    walk_cache: dict = {}
+    _get_table(
+        backend,
+        BackendSNMPTree(
+            base=TableBackend.base.rsplit(".", 1)[0],
+            oids=[BackendOIDSpec("1", "string", True)],
+        ),
+        walk_cache,
+        stats,
+    )
+
+    _get_table(backend, _table_tree("5"), walk_cache, stats)
+
+    assert backend.walked == [TableBackend.base, f"{TableBackend.base}.5"]
+    assert stats.subtree_hits == 0
+
+
 @pytest.mark.parametrize(
     "encoding, columns, expected",
     [
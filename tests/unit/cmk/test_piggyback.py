@@ -5,13 +5,18 @@
 
 # pylint: disable=protected-access
 
+import os
 import pprint
+from collections.abc import Sequence
+
+import pytest
 
 import cmk.utils.log
 import cmk.utils.paths
 from cmk.utils.hostaddress import HostAddress
 
 from cmk import piggyback
+from cmk.piggyback import _segments
 
 _TEST_HOST_NAME = HostAddress("test-host")
 
@@ -153,3 +158,176 @@ def test_get_source_and_piggyback_hosts() -> None:
             ),
         ],
     }
+
+
+@pytest.fixture(name="segment_layout")
+def fixture_segment_layout() -> None:
+    piggyback.migrate_storage_layout(piggyback.StorageLayout.SEGMENT)
+
+
+@pytest.mark.usefixtures("segment_layout")
+def test_segment_layout_store_and_get() -> None:
+    piggyback.store_piggyback_raw_data(
+        HostAddress("source"),
+        {_TEST_HOST_NAME: (b"line1", b"line2"), HostAddress("other-host"): _PAYLOAD},
+        timestamp=_REF_TIME,
+    )
+
+    stored = _get_only_raw_data_element(_TEST_HOST_NAME)
+
+    assert not cmk.utils.paths.piggyback_dir.exists()
+    assert stored.info.file_path == cmk.utils.paths.piggyback_segments_dir / "source"
+    assert stored.info.last_update == _REF_TIME
+    assert stored.info.last_contact == _REF_TIME
+    assert stored.raw_data == b"line1\nline2\n"
+
+
+@pytest.mark.usefixtures("segment_layout")
+def test_segment_layout_not_updated() -> None:
+    piggyback.store_piggyback_raw_data(
+        HostAddress("source1"), {_TEST_HOST_NAME: _PAYLOAD}, _REF_TIME
+    )
+    piggyback.store_piggyback_raw_data(
+        HostAddress("source1"), {HostAddress("some-other-host"): _PAYLOAD}, _REF_TIME + 10
+    )
+
+    info = _get_only_raw_data_element(_TEST_HOST_NAME).info
+
+    assert info.last_contact == _REF_TIME + 10
+    assert info.last_update == _REF_TIME
+    assert set(piggyback.get_piggybacked_host_with_sources()) == {
+        _TEST_HOST_NAME,
+        HostAddress("some-other-host"),
+    }
+
+
+@pytest.mark.usefixtures("segment_layout")
+def test_segment_layout_cleanup() -> None:
+    piggyback.store_piggyback_raw_data(
+        HostAddress("source1"), {_TEST_HOST_NAME: _PAYLOAD}, _REF_TIME
+    )
+    piggyback.store_piggyback_raw_data(
+        HostAddress("source1"), {HostAddress("some-other-host"): _PAYLOAD}, _REF_TIME + 10
+    )
+
+    piggyback.cleanup_piggyback_files(cut_off_timestamp=_REF_TIME + 5)
+
+    assert not piggyback.get_piggyback_raw_data(_TEST_HOST_NAME)
+    assert piggyback.get_piggyback_raw_data(HostAddress("some-other-host"))
+
+    piggyback.cleanup_piggyback_files(cut_off_timestamp=_REF_TIME + 15)
+
+    assert not piggyback.get_piggybacked_host_with_sources()
+    assert not (cmk.utils.paths.piggyback_segments_dir / "source1").exists()
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_cleanup_piggyback_files_report(max_workers: int) -> None:
+    piggyback.store_piggyback_raw_data(
+        HostAddress("source1"), {_TEST_HOST_NAME: _PAYLOAD}, _REF_TIME
+    )
+    piggyback.store_piggyback_raw_data(
+        HostAddress("source2"),
+        {_TEST_HOST_NAME: _PAYLOAD, HostAddress("some-other-host"): _PAYLOAD},
+        _REF_TIME + 10,
+    )
+
+    report = piggyback.cleanup_piggyback_files(
+        cut_off_timestamp=_REF_TIME + 5, max_workers=max_workers
+    )
+
+    assert report.scanned_source_status_files == 2
+    assert report.removed_source_status_files == 1
+    assert report.scanned_piggybacked_files == 3
+    assert report.removed_piggybacked_files == 1
+    assert report.removed_piggybacked_folders == 0
+    assert [i.source for i in _infos(_TEST_HOST_NAME)] == ["source2"]
+
+    report = piggyback.cleanup_piggyback_files(
+        cut_off_timestamp=_REF_TIME + 15, max_workers=max_workers
+    )
+
+    assert report.removed_piggybacked_files == 2
+    assert report.removed_piggybacked_folders == 2
+    assert not list(cmk.utils.paths.piggyback_dir.iterdir())
+    assert not piggyback.get_piggybacked_host_with_sources()
+
+
+def test_migrate_storage_layout_roundtrip() -> None:
+    piggyback.store_piggyback_raw_data(
+        HostAddress("source1"), {_TEST_HOST_NAME: _PAYLOAD}, _REF_TIME
+    )
+    piggyback.store_piggyback_raw_data(
+        HostAddress("source2"), {_TEST_HOST_NAME: _PAYLOAD}, _REF_TIME + 10
+    )
+    expected = [(i.source, i.last_update, i.last_contact) for i in _infos(_TEST_HOST_NAME)]
+
+    assert piggyback.migrate_storage_layout(piggyback.StorageLayout.SEGMENT) == 2
+    assert piggyback.get_storage_layout() is piggyback.StorageLayout.SEGMENT
+    assert not list(cmk.utils.paths.piggyback_dir.iterdir())
+    assert [(i.source, i.last_update, i.last_contact) for i in _infos(_TEST_HOST_NAME)] == expected
+
+    assert piggyback.migrate_storage_layout(piggyback.StorageLayout.DIRECTORY) == 2
+    assert piggyback.get_storage_layout() is piggyback.StorageLayout.DIRECTORY
+    assert [(i.source, i.last_update, i.last_contact) for i in _infos(_TEST_HOST_NAME)] == expected
+    assert all(i.file_path.parent.name == _TEST_HOST_NAME for i in _infos(_TEST_HOST_NAME))
+
+
+def test_migrate_storage_layout_keeps_more_recent_data() -> None:
+    piggyback.store_piggyback_raw_data(
+        HostAddress("source1"), {_TEST_HOST_NAME: (b"old",)}, _REF_TIME
+    )
+    piggyback.migrate_storage_layout(piggyback.StorageLayout.SEGMENT)
+    piggyback.store_piggyback_raw_data(
+        HostAddress("source1"), {_TEST_HOST_NAME: (b"new",)}, _REF_TIME + 10
+    )
+
+    # data of both layouts is considered, the most recent one wins
+    (cmk.utils.paths.piggyback_dir / _TEST_HOST_NAME).mkdir(parents=True)
+    (outdated := cmk.utils.paths.piggyback_dir / _TEST_HOST_NAME / "source1").write_bytes(b"old\n")
+    os.utime(outdated, (_REF_TIME, _REF_TIME))
+    assert _get_only_raw_data_element(_TEST_HOST_NAME).raw_data == b"new\n"
+
+    piggyback.migrate_storage_layout(piggyback.StorageLayout.SEGMENT)
+    assert _get_only_raw_data_element(_TEST_HOST_NAME).raw_data == b"new\n"
+
+
+@pytest.mark.usefixtures("segment_layout")
+def test_segment_layout_move_for_host_rename() -> None:
+    piggyback.store_piggyback_raw_data(
+        HostAddress("source1"), {_TEST_HOST_NAME: _PAYLOAD}, _REF_TIME
+    )
+
+    assert piggyback.move_for_host_rename(_TEST_HOST_NAME, "renamed-host") == ("piggyback-load",)
+    assert not piggyback.get_piggyback_raw_data(_TEST_HOST_NAME)
+    assert piggyback.get_piggyback_raw_data(HostAddress("renamed-host"))
+
+    assert piggyback.move_for_host_rename("source1", "renamed-source") == ("piggyback-pig",)
+    assert _get_only_raw_data_element(HostAddress("renamed-host")).info.source == "renamed-source"
+
+
+def test_segment_roundtrip() -> None:
+    entries = {
+        HostAddress(f"host-{i}"): _segments.SegmentEntry(_REF_TIME + i, b"payload %d\n" % i)
+        for i in range(100)
+    }
+    reader = _segments.SegmentReader(_segments.serialize_segment(entries))
+
+    assert len(reader) == 100
+    assert dict(reader.items()) == entries
+    assert reader.lookup(HostAddress("host-42")) == entries[HostAddress("host-42")]
+    assert reader.lookup(HostAddress("host-100")) is None
+    assert reader.lookup(HostAddress("")) is None
+
+
+def test_segment_reader_empty() -> None:
+    assert not list(_segments.SegmentReader(b"").items())
+
+
+def test_segment_reader_invalid() -> None:
+    with pytest.raises(ValueError):
+        _segments.SegmentReader(b"not a piggyback segment")
+
+
+def _infos(host_name: HostAddress) -> Sequence[piggyback.PiggybackFileInfo]:
+    return [rd.info for rd in piggyback.get_piggyback_raw_data(host_name)]
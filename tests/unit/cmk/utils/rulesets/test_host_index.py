@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+from cmk.utils.hostaddress import HostName
+from cmk.utils.rulesets.host_index import HostIndex
+
+_HOSTS = [HostName(f"host{n}") for n in range(20)]
+
+
+def test_host_index_mask() -> None:
+    index = HostIndex(_HOSTS)
+    assert len(index) == 20
+    assert index.all == 2**20 - 1
+    assert index.mask([HostName("host0"), HostName("host9"), HostName("unknown")]) == 1 | 1 << 9
+    assert list(index.ids_of(1 | 1 << 9 | 1 << 19)) == [0, 9, 19]
+    assert list(index.hosts_of(index.mask(_HOSTS[5:8]))) == _HOSTS[5:8]
+    assert not list(index.ids_of(0))
+
+
+def test_host_set() -> None:
+    index = HostIndex(_HOSTS)
+    host_set = index.host_set(index.mask(_HOSTS[::2]))
+    assert len(host_set) == 10
+    assert host_set == set(_HOSTS[::2])
+    assert HostName("host2") in host_set
+    assert HostName("host3") not in host_set
+    assert HostName("unknown") not in host_set
+    assert host_set & {HostName("host2"), HostName("host3")} == {HostName("host2")}
+    assert not index.host_set(0)
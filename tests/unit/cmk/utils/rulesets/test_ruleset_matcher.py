@@ -267,6 +267,61 @@ def test_basic_get_host_values() -> None:
     assert list(matcher.get_host_values(HostName("host2"), ruleset=ruleset)) == ["BLUB"]
 
 
+def _matcher_of_hosts(hosts: Sequence[HostName]) -> RulesetMatcher:
+    return RulesetMatcher(
+        host_tags={hostname: {} for hostname in hosts},
+        host_paths={},
+        label_manager=LabelManager(
+            explicit_host_labels={HostName("host1"): {"os": "linux"}},
+            host_label_rules=(),
+            service_label_rules=(),
+            discovered_labels_of_service=lambda *args, **kw: {},
+        ),
+        all_configured_hosts=hosts,
+        clusters_of={},
+        nodes_of={},
+    )
+
+
+@pytest.mark.parametrize(
+    "hosts",
+    [
+        pytest.param(["abc", "xyz", "host1", "host2"], id="same hosts"),
+        pytest.param(["host2", "host1", "xyz"], id="other order, less hosts"),
+    ],
+)
+def test_load_match_cache(hosts: Sequence[str]) -> None:
+    matcher = _matcher_of_hosts([HostName(h) for h in ("abc", "xyz", "host1", "host2")])
+    for hostname in matcher.ruleset_optimizer.all_processed_hosts():
+        matcher.get_host_values(hostname, ruleset=ruleset)
+        matcher.labels_of_host(hostname)
+
+    other_matcher = _matcher_of_hosts([HostName(h) for h in hosts])
+    assert other_matcher.ruleset_optimizer.load_match_cache(
+        matcher.ruleset_optimizer.dump_match_cache()
+    )
+    assert other_matcher.ruleset_optimizer._all_matching_hosts_match_cache
+    assert other_matcher.ruleset_optimizer._all_matching_hosts(
+        ruleset[1]["condition"], with_foreign_hosts=False
+    ) == {HostName("host1"), HostName("host2")}
+    assert list(other_matcher.get_host_values(HostName("host1"), ruleset=ruleset)) == [
+        "BLA",
+        "BLUB",
+    ]
+    assert other_matcher.labels_of_host(HostName("host1"))["os"] == "linux"
+
+
+def test_load_match_cache_of_other_hosts() -> None:
+    matcher = _matcher_of_hosts([HostName("host1")])
+    matcher.get_host_values(HostName("host1"), ruleset=ruleset)
+
+    other_matcher = _matcher_of_hosts([HostName("host1"), HostName("host2")])
+    assert not other_matcher.ruleset_optimizer.load_match_cache(
+        matcher.ruleset_optimizer.dump_match_cache()
+    )
+    assert not other_matcher.ruleset_optimizer._all_matching_hosts_match_cache
+
+
 def test_basic_get_host_values_subfolders() -> None:
     matcher = RulesetMatcher(
         host_tags={
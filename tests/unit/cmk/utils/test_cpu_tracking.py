@@ -4,10 +4,11 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import json
+import threading
 
 import pytest
 
-from cmk.utils.cpu_tracking import Snapshot
+from cmk.utils.cpu_tracking import CPUTracker, Snapshot
 
 
 def json_identity(serializable: object) -> object:
@@ -50,3 +51,29 @@ class TestCpuTracking:
 
     def test_json_serialization_now(self, now: Snapshot) -> None:
         assert Snapshot.deserialize(json_identity(now.serialize())) == now
+
+    def test_take_thread(self) -> None:
+        snapshot = Snapshot.take_thread()
+        assert snapshot.process.children_user == snapshot.process.children_system == 0.0
+        assert snapshot.process.elapsed > 0.0
+
+
+def test_cpu_tracker_per_thread() -> None:
+    stop = threading.Event()
+
+    def burn_cpu() -> None:
+        while not stop.is_set():
+            pass
+
+    # Burns CPU while the tracker runs, but in another thread
+    burner = threading.Thread(target=burn_cpu)
+    burner.start()
+    try:
+        with CPUTracker(lambda msg: None, per_thread=True) as tracker:
+            stop.wait(0.2)
+    finally:
+        stop.set()
+        burner.join()
+
+    assert tracker.duration.process.elapsed >= 0.19
+    assert tracker.duration.process.user < 0.1
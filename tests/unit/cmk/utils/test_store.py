@@ -859,6 +859,53 @@ def tests_standard_format_loader():
     assert variables["all_hosts"] == ["test"]
 
 
+def tests_standard_format_loader_with_code_cache(tmp_path: Path) -> None:
+    hosts_mk = tmp_path / "hosts.mk"
+    hosts_mk.write_text(_hosts_mk_test_data)
+    code_cache = store.CodeCache(tmp_path / "cache")
+
+    for _run in range(2):
+        variables = get_hosts_file_variables()
+        StandardStorageLoader(get_standard_hosts_storage(), code_cache).read_and_apply(
+            hosts_mk.with_suffix(""), variables
+        )
+        assert variables["all_hosts"] == ["test"]
+
+    assert (code_cache.stats.hits, code_cache.stats.misses) == (1, 1)
+
+
+def test_code_cache(tmp_path: Path) -> None:
+    code_cache = store.CodeCache(tmp_path / "cache")
+    filename = str(tmp_path / "rules.mk")
+
+    def run(source: str) -> object:
+        variables: dict[str, object] = {"x": [1]}
+        exec(code_cache.compile(source, filename), variables)  # nosec B102 # BNS:aee528
+        return variables["x"]
+
+    assert run("x += [2]") == [1, 2]
+    assert run("x += [2]") == [1, 2]
+    assert run("x += [3]") == [1, 3]
+    assert run("x += [3]") == [1, 3]
+    assert (code_cache.stats.hits, code_cache.stats.misses) == (2, 2)
+    assert len(list(code_cache.cache_dir.iterdir())) == 1
+
+    # A new process, the cache is on disk
+    assert store.CodeCache(code_cache.cache_dir).compile("x += [3]", filename).co_filename == (
+        filename
+    )
+
+
+def test_code_cache_broken_entry(tmp_path: Path) -> None:
+    code_cache = store.CodeCache(tmp_path / "cache")
+    code_cache.compile("x = 1", "rules.mk")
+    for path in code_cache.cache_dir.iterdir():
+        path.write_bytes(b"garbage")
+
+    assert isinstance(code_cache.compile("x = 1", "rules.mk"), types.CodeType)
+    assert code_cache.stats.misses == 2
+
+
 def test_pydantic_store_serialization(tmp_path: Path) -> None:
     store_path = tmp_path / "MyModel"
 
@@ -8,10 +8,13 @@
 # pylint: disable=redefined-outer-name
 
 import errno
+import json
 import socket
 import ssl
-from collections.abc import Sequence
-from contextlib import closing
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import closing, suppress
 from pathlib import Path
 
 import pytest
@@ -25,6 +28,8 @@ from omdlib.certs import CertificateAuthority  # pylint: disable=wrong-import-or
 from cmk.utils.certs import root_cert_path, RootCA
 from cmk.utils.livestatus_helpers.testing import MockLiveStatusConnection
 
+from cmk.livestatus_client import _RowDecoder
+
 
 # Override top level fixture to make livestatus connects possible here
 @pytest.fixture(autouse=True, scope="module")
@@ -286,6 +291,190 @@ def test_set_auth_user(patch_omd_site: None, user_id: livestatus.UserId, allowed
     livestatus.LocalConnection().set_auth_user("mydomain", user_id)
 
 
+def _fake_site(path: Path, delay: float, body: bytes, close_first: bool = False) -> None:
+    """Answer each query on the Unix socket after a delay, sending the body in pieces"""
+    server = socket.socket(socket.AF_UNIX)
+    server.bind(str(path))
+    server.listen(2)
+
+    def answer_queries(conn: socket.socket) -> None:
+        while True:
+            query = b""
+            while not query.endswith(b"\n\n"):
+                if not (data := conn.recv(4096)):
+                    return
+                query += data
+            time.sleep(delay)
+            response = b"200 %11d\n" % len(body) + body
+            for start in range(0, len(response), 7):
+                conn.sendall(response[start : start + 7])
+
+    def serve() -> None:
+        with server:
+            if close_first:
+                # Like a keepalive connection closed by the other side
+                server.accept()[0].close()
+            while True:
+                conn, _addr = server.accept()
+                with conn, suppress(OSError):
+                    answer_queries(conn)
+
+    threading.Thread(target=serve, daemon=True).start()
+
+
+@pytest.fixture(name="multisite_connection")
+def fixture_multisite_connection(tmp_path: Path) -> Iterator[livestatus.MultiSiteConnection]:
+    _fake_site(tmp_path / "slow", 0.3, b'[["slow", 1],\n["slow", 2]]\n')
+    _fake_site(tmp_path / "fast", 0.0, b'[["fast", 1]]')
+    _fake_site(tmp_path / "broken", 0.0, b'[["broken", 1]]', close_first=True)
+    sites = livestatus.SiteConfigurations(
+        {
+            livestatus.SiteId(name): livestatus.SiteConfiguration(socket=f"unix:{tmp_path / name}")
+            for name in ["slow", "fast", "broken"]
+        }
+    )
+    connection = livestatus.MultiSiteConnection(sites)
+    yield connection
+    connection.disconnect()
+
+
+def test_query_parallel(multisite_connection: livestatus.MultiSiteConnection) -> None:
+    multisite_connection.set_prepend_site(True)
+    assert multisite_connection.query("GET hosts\nColumns: name") == [
+        ["slow", "slow", 1],
+        ["slow", "slow", 2],
+        ["fast", "fast", 1],
+        ["broken", "broken", 1],
+    ]
+    assert not multisite_connection.dead_sites()
+    response_times = multisite_connection.response_times
+    assert response_times.keys() == {"slow", "fast", "broken"}
+    # The fast site did not have to wait for the slow one
+    assert response_times[livestatus.SiteId("fast")] < response_times[livestatus.SiteId("slow")]
+
+
+def test_query_parallel_malformed_response(tmp_path: Path) -> None:
+    path = tmp_path / "malformed"
+    server = socket.socket(socket.AF_UNIX)
+    server.bind(str(path))
+    server.listen(1)
+
+    def serve() -> None:
+        with server, server.accept()[0] as conn:
+            conn.recv(4096)
+            conn.sendall(b"this is no livestatus response")
+            time.sleep(1)
+
+    threading.Thread(target=serve, daemon=True).start()
+    connection = livestatus.MultiSiteConnection(
+        livestatus.SiteConfigurations(
+            {livestatus.SiteId("malformed"): livestatus.SiteConfiguration(socket=f"unix:{path}")}
+        )
+    )
+
+    assert not connection.query("GET hosts\nColumns: name")
+    assert str(connection.dead_sites()[livestatus.SiteId("malformed")]["exception"]).startswith(
+        "Unhandled exception: Malformed response header"
+    )
+
+
+@pytest.mark.parametrize("json_format", [True, False])
+@pytest.mark.parametrize("chunk_size", [1, 3, 1000])
+@pytest.mark.parametrize(
+    "rows",
+    [
+        [],
+        [["heute", 1]],
+        [["heute", 1, [1.5, "a,\\nb"]], ["gestern", 0, []], ["morgen", None, ["ä]"]]],
+    ],
+)
+def test_row_decoder(json_format: bool, chunk_size: int, rows: list[list[object]]) -> None:
+    # Rendered like the Livestatus renderers do it: one row per line
+    body = (
+        "[" + ",\n".join(json.dumps(row) if json_format else repr(row) for row in rows) + "]\n"
+    ).encode("utf-8")
+    decoder = _RowDecoder([] if json_format else None)
+
+    decoded = []
+    for start in range(0, len(body), chunk_size):
+        decoded.extend(decoder.feed(body[start : start + chunk_size]))
+    decoded.extend(decoder.close())
+
+    assert decoded == rows
+
+
+def test_row_decoder_single_line() -> None:
+    decoder = _RowDecoder([])
+    assert not decoder.feed(b'[["a", 1], ["b", 2]]')
+    assert decoder.close() == [["a", 1], ["b", 2]]
+
+
+def test_row_decoder_malformed() -> None:
+    decoder = _RowDecoder([])
+    with pytest.raises(livestatus.MKLivestatusQueryError):
+        decoder.feed(b'[["a", 1],\n["b" 2],\n["c", 3]]')
+
+
+def test_row_decoder_blobs() -> None:
+    decoder = _RowDecoder([1])
+    # The JSON renderer sends blobs as latin-1 encoded strings
+    assert decoder.feed(b'[["h1", "\\u00e4\\u001f"],\n["h2", ""]]\n') == [["h1", b"\xe4\x1f"]]
+    assert decoder.close() == [["h2", b""]]
+
+
+@pytest.mark.parametrize(
+    "query, blob_positions",
+    [
+        (livestatus.Query("GET hosts\nColumns: name"), []),
+        (
+            livestatus.Query("GET hosts\nColumns: name mk_inventory\nColumns: mk_inventory_gz"),
+            [1, 2],
+        ),
+        (livestatus.Query("GET services\nColumns: host_name\nStats: state = 0"), []),
+        (livestatus.Query("GET hosts\nColumns: name\nColumnHeaders: on"), []),
+        (livestatus.Query("GET hosts\nColumns: name mk_inventory\nColumnHeaders: on"), None),
+        (livestatus.Query("GET hosts\nColumns: name\nOutputFormat: python\n"), None),
+        (livestatus.Query("GET hosts"), None),
+        (livestatus.Query(livestatus.QuerySpecification("status")), None),
+        (
+            livestatus.Query(
+                livestatus.QuerySpecification("hosts", ["name", "structured_status"], "Limit: 1\n")
+            ),
+            [1],
+        ),
+    ],
+)
+def test_query_blob_column_positions(
+    query: livestatus.Query, blob_positions: list[int] | None
+) -> None:
+    assert query.blob_column_positions() == blob_positions
+    assert query.supports_json_format() is (blob_positions is not None)
+
+
+def test_query_rows(multisite_connection: livestatus.MultiSiteConnection) -> None:
+    multisite_connection.set_prepend_site(True)
+    rows = multisite_connection.query_rows("GET hosts\nColumns: name")
+    assert next(rows) == ["slow", "slow", 1]
+    assert list(rows) == [["slow", "slow", 2], ["fast", "fast", 1], ["broken", "broken", 1]]
+    assert not multisite_connection.dead_sites()
+
+
+def test_query_rows_stopped_early(multisite_connection: livestatus.MultiSiteConnection) -> None:
+    rows = multisite_connection.query_rows("GET hosts\nColumns: name")
+    assert next(rows) == ["slow", 1]
+    rows.close()
+
+    assert not multisite_connection.dead_sites()
+    assert len(multisite_connection.connections) == 3
+    # The unread responses have been dropped along with the connections
+    assert multisite_connection.query("GET hosts\nColumns: name") == [
+        ["slow", 1],
+        ["slow", 2],
+        ["fast", 1],
+        ["broken", 1],
+    ]
+
+
 @pytest.mark.parametrize(
     "filter_condition, values, join, result",
     [